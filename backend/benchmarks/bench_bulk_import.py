@@ -0,0 +1,67 @@
+"""Bulk import: the parsed-object path (json.loads the whole file, then
+import_portfolio, as baseline CV extraction does) vs the streaming bulk
+importer, on both storage backends.
+
+Imports n synthetic items into an empty store that already holds 1000
+projects, with 2% invalid and 2% duplicate rows, and reports wall time
+and peak traced memory.
+
+Usage: python benchmarks/bench_bulk_import.py [--items 1000,10000,50000]
+"""
+import argparse
+import io
+import json
+import tempfile
+import time
+import tracemalloc
+
+from synthetic import make_projects
+
+from bulk_import import bulk_import, import_portfolio
+from data_manager import DataManager
+from sqlite_store import SQLiteDataManager
+
+
+def make_portfolio(n: int) -> dict:
+    items = make_projects(n + 1000)
+    existing, new = items[:1000], items[1000:]
+    for i in range(0, n, 50):
+        new[i] = {"title": f"Broken {i}", "description": "", "date_range": ""}  # Missing category
+    for i in range(25, n, 50):
+        new[i] = dict(new[i - 1])  # Duplicate within the file
+    return existing, {"personal_info": {"name": "Jane"}, "projects": new}
+
+
+def parsed(manager, payload: bytes):
+    return import_portfolio(manager, json.loads(payload.decode("utf-8")))
+
+
+def streaming(manager, payload: bytes):
+    return bulk_import(manager, io.BytesIO(payload), "json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", default="1000,10000,50000")
+    args = parser.parse_args()
+
+    print(f"{'items':>6} {'backend':<7} {'method':<10} {'seconds':>8} {'peak MB':>8} {'imported':>9}")
+    for n in (int(size) for size in args.items.split(",")):
+        existing, portfolio = make_portfolio(n)
+        payload = json.dumps(portfolio).encode("utf-8")
+        for backend, manager_class in (("json", DataManager), ("sqlite", SQLiteDataManager)):
+            for name, fn in (("parsed", parsed), ("streaming", streaming)):
+                with tempfile.TemporaryDirectory() as tmp:
+                    manager = manager_class(tmp)
+                    manager.commit_import([dict(p) for p in existing])
+                    tracemalloc.start()
+                    start = time.perf_counter()
+                    result = fn(manager, payload)
+                    elapsed = time.perf_counter() - start
+                    peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+                    tracemalloc.stop()
+                    print(f"{n:>6} {backend:<7} {name:<10} {elapsed:>8.2f} {peak:>8.1f} {result['imported']:>9}")
+
+
+if __name__ == "__main__":
+    main()
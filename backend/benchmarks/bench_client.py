@@ -0,0 +1,74 @@
+"""Per-request overhead of a fresh genai.Client vs the pooled shared client.
+
+Calls the fake Gemini server (zero model latency) so the numbers are client
+construction, connection setup and request plumbing only.
+
+Usage: python benchmarks/bench_client.py [--calls 200]
+"""
+import argparse
+import os
+import statistics
+import time
+
+from fake_gemini import start_fake_gemini
+from synthetic import BACKEND_DIR  # noqa: F401  (puts the backend on sys.path)
+
+from google import genai
+from gemini_client import get_client, reset_client
+
+MODEL = "gemini-test"
+
+
+def fresh_client_call(base_url: str):
+    """The old path: build a client (and a new session) for every request"""
+    client = genai.Client(api_key=os.environ["GEMINI_API_KEY"], http_options={"base_url": base_url})
+    return client.models.generate_content(model=MODEL, contents="ping")
+
+
+def pooled_client_call(base_url: str):
+    return get_client().models.generate_content(model=MODEL, contents="ping")
+
+
+def measure(fn, calls: int, *args) -> dict:
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {"p50_ms": round(statistics.median(samples), 3), "p99_ms": round(samples[int(len(samples) * 0.99) - 1], 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    _, base_url, fake = start_fake_gemini(latency=0)
+    os.environ["GEMINI_API_KEY"] = "fake-key"
+    os.environ["GEMINI_BASE_URL"] = base_url
+    reset_client()
+
+    start = time.perf_counter()
+    for _ in range(args.calls):
+        genai.Client(api_key="fake-key")
+    construct_ms = (time.perf_counter() - start) * 1000 / args.calls
+
+    start = time.perf_counter()
+    for _ in range(args.calls):
+        get_client()
+    lookup_ms = (time.perf_counter() - start) * 1000 / args.calls
+
+    fresh = measure(fresh_client_call, args.calls, base_url)
+    fresh_connections = fake.connections
+    pooled_client_call(base_url)  # first call creates the client and connection
+    pooled = measure(pooled_client_call, args.calls, base_url)
+    pooled_connections = fake.connections - fresh_connections
+
+    print(f"client construction: {construct_ms:.3f}ms  shared client lookup: {lookup_ms:.4f}ms")
+    print(f"request via fresh client:  p50 {fresh['p50_ms']}ms  p99 {fresh['p99_ms']}ms  connections opened: {fresh_connections}")
+    print(f"request via pooled client: p50 {pooled['p50_ms']}ms  p99 {pooled['p99_ms']}ms  connections opened: {pooled_connections}")
+
+
+if __name__ == "__main__":
+    main()
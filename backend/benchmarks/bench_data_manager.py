@@ -0,0 +1,95 @@
+"""Read latency of DataManager with the in-memory store vs re-parsing JSON.
+
+Usage: python benchmarks/bench_data_manager.py [--projects 10000] [--repeat 200]
+"""
+import argparse
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from synthetic import make_history, make_projects
+
+from data_manager import DataManager
+from models import CVHistoryItem, Project
+
+
+def legacy_get_project(projects_file: Path, project_id: str):
+    """The pre-cache read path: parse the whole file, then scan linearly"""
+    with open(projects_file, 'r', encoding='utf-8') as f:
+        projects = json.load(f)
+    for proj in projects:
+        if proj["id"] == project_id:
+            return Project(**proj)
+    return None
+
+
+def legacy_get_all_projects(projects_file: Path):
+    with open(projects_file, 'r', encoding='utf-8') as f:
+        return [Project(**item) for item in json.load(f)]
+
+
+def legacy_get_cv_history(metadata_file: Path):
+    with open(metadata_file, 'r', encoding='utf-8') as f:
+        metadata = json.load(f)
+    return [CVHistoryItem(**item) for item in metadata.get("cv_history", [])]
+
+
+def measure(fn, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "p50_ms": round(statistics.median(samples), 4),
+        "p99_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--projects", type=int, default=10000)
+    parser.add_argument("--history", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DataManager(tmp)
+        manager._save_json(manager.projects_file, make_projects(args.projects))
+        manager._save_json(manager.metadata_file, {
+            "baseline_cv_uploaded_at": None,
+            "cv_history": make_history(args.history),
+        })
+        manager.clear_cache()
+        target_id = f"p{args.projects - 1:07d}"
+
+        cases = {
+            "get_project": (
+                lambda: legacy_get_project(manager.projects_file, target_id),
+                lambda: manager.get_project(target_id),
+            ),
+            "get_all_projects": (
+                lambda: legacy_get_all_projects(manager.projects_file),
+                manager.get_all_projects,
+            ),
+            "get_cv_history": (
+                lambda: legacy_get_cv_history(manager.metadata_file),
+                manager.get_cv_history,
+            ),
+        }
+
+        print(f"{args.projects} projects, {args.history} history items, {args.repeat} reads each")
+        print(f"{'operation':<18} {'legacy p50':>12} {'cached p50':>12} {'speedup':>9}")
+        for name, (legacy, cached) in cases.items():
+            before = measure(legacy, args.repeat)
+            cached()  # warm the cache once, as the first request would
+            after = measure(cached, args.repeat)
+            speedup = before["p50_ms"] / max(after["p50_ms"], 1e-6)
+            print(f"{name:<18} {before['p50_ms']:>10.3f}ms {after['p50_ms']:>10.3f}ms {speedup:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
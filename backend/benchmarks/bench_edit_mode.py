@@ -0,0 +1,67 @@
+"""Output tokens and latency of full-document vs section-edit generation.
+
+Generates against the fake Gemini server, whose output time grows with
+output tokens (--tokens-per-second): in "full" mode it re-emits the whole
+baseline CV like a real model, in "edits" mode it returns section edits.
+
+Usage: python benchmarks/bench_edit_mode.py [--tokens-per-second 150] [--calls 3]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from fake_gemini import start_fake_gemini
+from synthetic import BACKEND_DIR, make_projects
+
+from cv_edits import check_latex_fragment, split_cv_sections
+from gemini_client import reset_client
+from gemini_service import generate_cv_async
+from models import Project
+
+with open(os.path.join(BACKEND_DIR, "..", "data", "sample_baseline_cv.tex"), encoding="utf-8") as f:
+    BASELINE_CV = f.read()
+
+JOB_DESCRIPTION = "Backend engineer to build Kafka and PostgreSQL data pipelines on Kubernetes."
+PROJECTS = [Project(**p) for p in make_projects(20)]
+
+
+async def run(mode: str, calls: int) -> tuple:
+    os.environ["GENERATION_MODE"] = mode
+    samples, result = [], None
+    for _ in range(calls):
+        start = time.perf_counter()
+        result = await generate_cv_async(BASELINE_CV, PROJECTS, JOB_DESCRIPTION, max_items=3)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--tokens-per-second", type=float, default=150)
+    parser.add_argument("--calls", type=int, default=3)
+    args = parser.parse_args()
+
+    _, base_url, _ = start_fake_gemini(latency=args.latency, tokens_per_second=args.tokens_per_second)
+    os.environ.update(GEMINI_API_KEY="fake-key", GEMINI_BASE_URL=base_url)
+    reset_client()
+
+    print(f"fake model: {args.latency}s + output at {args.tokens_per_second:.0f} tok/s")
+    print(f"{'mode':<6} {'output tokens':>14} {'prompt tokens':>14} {'latency':>10} {'selected':>9} {'valid':>6}")
+    for mode in ("full", "edits"):
+        latency, result = asyncio.run(run(mode, args.calls))
+        usage = result["token_usage"]
+        try:
+            for section in split_cv_sections(result["tailored_cv"]):
+                check_latex_fragment(section.body)
+            valid = "yes"
+        except ValueError:
+            valid = "no"
+        print(f"{mode:<6} {usage['output_tokens']:>14} {usage['prompt_tokens']:>14} {latency:>8.0f}ms "
+              f"{len(result['selected_item_ids']):>9} {valid:>6}")
+
+
+if __name__ == "__main__":
+    main()
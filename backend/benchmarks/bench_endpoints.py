@@ -0,0 +1,394 @@
+"""Endpoint suite: p50/p99 latency and throughput of every API endpoint
+under concurrency, against the fake Gemini server.
+
+Starts the API under uvicorn in a subprocess with TENANT_AUTH=header and
+gives each portfolio size its own user, seeded with n synthetic projects
+through the bulk import. Each endpoint then gets --requests calls
+(--generations for the ones that call the model) from --concurrency
+client threads over keep-alive connections. PDF downloads compile with
+benchmarks/fake_latex.py.
+
+Results are written to --output as JSON, tagged with the git commit.
+--compare reads an earlier result file, prints the change per endpoint
+and exits non-zero when any p50 or p99 grew by more than --threshold.
+
+Usage: python benchmarks/bench_endpoints.py [--sizes 10,100,1000,10000] [--concurrency 16]
+                                            [--requests 200] [--generations 40]
+                                            [--latency 0.2] [--tokens-per-second 0]
+                                            [--only generate] [--output results.json]
+                                            [--compare baseline.json] [--threshold 0.2]
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+from fake_gemini import start_fake_gemini
+from synthetic import BACKEND_DIR, make_projects
+
+with open(os.path.join(BACKEND_DIR, "..", "data", "sample_baseline_cv.tex"), encoding="utf-8") as f:
+    BASELINE_CV = f.read()
+
+PERSONAL_INFO = {"name": "Jane Doe", "email": "jane@example.com", "location": "Berlin"}
+SKILLS = [{"category": "Languages", "items": ["Python", "Go", "TypeScript"]},
+          {"category": "Infrastructure", "items": ["Docker", "Kubernetes", "AWS"]}]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def git_commit() -> dict:
+    def git(*args):
+        return subprocess.run(["git", *args], cwd=BACKEND_DIR, capture_output=True, text=True).stdout.strip()
+    try:
+        return {"commit": git("rev-parse", "--short", "HEAD") or None, "dirty": bool(git("status", "--porcelain"))}
+    except OSError:
+        return {"commit": None, "dirty": None}
+
+
+def multipart(filename: str, content: bytes) -> tuple:
+    """Body and content type of a form upload with one "file" field"""
+    boundary = uuid.uuid4().hex
+    body = (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f'Content-Type: application/octet-stream\r\n\r\n'
+    ).encode() + content + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+class Client:
+    """HTTP client for one user, with a keep-alive connection per thread"""
+
+    def __init__(self, port: int, user_id: str):
+        self.port = port
+        self.user_id = user_id
+        self._local = threading.local()
+
+    def request(self, method: str, path: str, body=None, content_type: str = "application/json") -> tuple:
+        """Send one request; returns (status, response body, latency in ms)"""
+        if body is not None and not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+        headers = {"X-User-ID": self.user_id}
+        if body is not None:
+            headers["Content-Type"] = content_type
+        for attempt in range(2):
+            conn = getattr(self._local, "conn", None)
+            if conn is None:
+                conn = self._local.conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=600)
+            start = time.perf_counter()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                resp = conn.getresponse()
+                data = resp.read()
+            except (http.client.RemoteDisconnected, ConnectionError):
+                # The server closed an idle keep-alive connection; reconnect once
+                conn.close()
+                self._local.conn = None
+                if attempt:
+                    raise
+                continue
+            if resp.will_close:
+                conn.close()
+                self._local.conn = None
+            return resp.status, data, (time.perf_counter() - start) * 1000
+
+
+class Endpoint:
+    """One benchmarked call: make(i) returns (method, path, body[, content type])
+    for the i-th request"""
+
+    def __init__(self, name: str, make, count: int, keep: bool = False):
+        self.name = name
+        self.make = make
+        self.count = count
+        self.keep = keep  # Return response bodies, for endpoints that feed later ones
+
+
+def succeeded(status: int, data: bytes) -> bool:
+    # Streaming endpoints answer 200 and report failures as events
+    return (200 <= status < 300 or status == 304) and b"event: error\n" not in data
+
+
+def percentiles(samples: list) -> dict:
+    samples = sorted(samples)
+    return {
+        "p50_ms": round(statistics.median(samples), 2),
+        "p99_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 2),
+        "mean_ms": round(statistics.fmean(samples), 2),
+    }
+
+
+def run_endpoint(client: Client, endpoint: Endpoint, concurrency: int) -> tuple:
+    """Send endpoint.count requests from concurrency threads; returns (result, kept bodies)"""
+    def call(i):
+        status, data, latency = client.request(*endpoint.make(i))
+        return status, latency, succeeded(status, data), data if endpoint.keep else None
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        calls = list(pool.map(call, range(endpoint.count)))
+    elapsed = time.perf_counter() - start
+    result = {
+        "endpoint": endpoint.name,
+        "requests": len(calls),
+        "errors": sum(1 for _, _, ok, _ in calls if not ok),
+        "statuses": {str(code): n for code, n in sorted(Counter(status for status, _, _, _ in calls).items())},
+        **percentiles([latency for _, latency, _, _ in calls]),
+        "throughput_rps": round(len(calls) / elapsed, 2),
+    }
+    return result, [data for status, _, ok, data in calls if ok and data is not None]
+
+
+def job_text(n: int, i: int) -> dict:
+    # Unique per request so every generation reaches the model instead of the cache
+    return {"text": f"Python backend engineer, FastAPI and Kubernetes ({n}/{i}/{uuid.uuid4().hex[:8]})",
+            "company": f"Company {i % 20}", "position": "Backend Engineer"}
+
+
+def seed(client: Client, n: int):
+    """Baseline CV (extracted by the fake model) plus n projects"""
+    for method, path, body, content_type in (
+        ("POST", "/api/cv/baseline", *multipart("baseline.tex", BASELINE_CV.encode())),
+        ("POST", "/api/portfolio/import/bulk",
+         *multipart("projects.jsonl", "".join(json.dumps(p) + "\n" for p in make_projects(n)).encode())),
+    ):
+        status, data, _ = client.request(method, path, body, content_type)
+        if status >= 300:
+            raise RuntimeError(f"Seeding {path} failed with {status}: {data[:300]!r}")
+
+
+def wait_for_jobs(client: Client, job_ids: list, timeout: float = 600):
+    deadline = time.monotonic() + timeout
+    pending = list(job_ids)
+    while pending and time.monotonic() < deadline:
+        pending = [job_id for job_id in pending
+                   if json.loads(client.request("GET", f"/api/cv/jobs/{job_id}")[1])["status"] in ("queued", "running")]
+        time.sleep(0.1)
+
+
+def run_size(client: Client, n: int, args, only) -> list:
+    """Benchmark every endpoint against one user holding n projects"""
+    seed(client, n)
+    results = []
+    ids = [p["id"] for p in make_projects(n)]
+    # A fixed slice of the portfolio, re-imported on every call so the size stays put
+    import_items = make_projects(min(n, 50))
+    import_file = json.dumps(import_items).encode()
+    portfolio_file = json.dumps({"personal_info": PERSONAL_INFO, "skills": SKILLS, "projects": import_items}).encode()
+    gens = args.generations
+
+    def run(endpoint: Endpoint) -> list:
+        if only and not any(part in endpoint.name for part in only):
+            return []
+        result, kept = run_endpoint(client, endpoint, args.concurrency)
+        results.append({"projects": n, **result})
+        print(f"{n:>6} {result['endpoint']:<46} {result['requests']:>5} {result['errors']:>4} "
+              f"{result['p50_ms']:>9.1f} {result['p99_ms']:>9.1f} {result['throughput_rps']:>8.1f}", flush=True)
+        return kept
+
+    def created_ids(kept: list) -> list:
+        return [json.loads(data)["id"] for data in kept]
+
+    reqs = args.requests
+    for endpoint in (
+        Endpoint("GET /", lambda i: ("GET", "/"), reqs),
+        Endpoint("GET /health", lambda i: ("GET", "/health"), reqs),
+        Endpoint("GET /metrics", lambda i: ("GET", "/metrics"), reqs),
+        Endpoint("GET /api/projects", lambda i: ("GET", "/api/projects"), reqs),
+        Endpoint("GET /api/projects?limit=50", lambda i: ("GET", "/api/projects?limit=50&sort=title"), reqs),
+        Endpoint("GET /api/projects?q=&technology=",
+                 lambda i: ("GET", "/api/projects?q=pipeline&technology=Python&limit=50"), reqs),
+        Endpoint("GET /api/projects/{project_id}", lambda i: ("GET", f"/api/projects/{ids[i % len(ids)]}"), reqs),
+        Endpoint("POST /api/personal-info", lambda i: ("POST", "/api/personal-info", PERSONAL_INFO), reqs),
+        Endpoint("GET /api/personal-info", lambda i: ("GET", "/api/personal-info"), reqs),
+        Endpoint("POST /api/skills", lambda i: ("POST", "/api/skills", SKILLS), reqs),
+        Endpoint("GET /api/skills", lambda i: ("GET", "/api/skills"), reqs),
+        Endpoint("GET /api/cv/baseline", lambda i: ("GET", "/api/cv/baseline"), reqs),
+        Endpoint("GET /api/portfolio/export", lambda i: ("GET", "/api/portfolio/export"), reqs),
+    ):
+        run(endpoint)
+
+    kept = run(Endpoint("POST /api/projects", lambda i: ("POST", "/api/projects", {
+        "title": f"Benchmark project {i}", "description": "Created by bench_endpoints.py",
+        "technologies": ["Python"], "date_range": "2026", "category": "project"}), reqs, keep=True))
+    new_ids = created_ids(kept)
+    if new_ids:
+        run(Endpoint("PUT /api/projects/{project_id}", lambda i: ("PUT", f"/api/projects/{new_ids[i % len(new_ids)]}",
+                                                                  {"description": f"Updated {i}"}), len(new_ids)))
+        run(Endpoint("DELETE /api/projects/{project_id}",
+                     lambda i: ("DELETE", f"/api/projects/{new_ids[i]}"), len(new_ids)))
+
+    for endpoint in (
+        Endpoint("POST /api/projects/import",
+                 lambda i: ("POST", "/api/projects/import", *multipart("projects.json", import_file)), reqs // 4 or 1),
+        Endpoint("POST /api/portfolio/import",
+                 lambda i: ("POST", "/api/portfolio/import", *multipart("portfolio.json", portfolio_file)), reqs // 4 or 1),
+        Endpoint("POST /api/portfolio/import/bulk?dry_run=true",
+                 lambda i: ("POST", "/api/portfolio/import/bulk?dry_run=true",
+                            *multipart("projects.json", import_file)), reqs // 4 or 1),
+        # Each upload differs, so extraction calls the model every time
+        Endpoint("POST /api/cv/baseline", lambda i: ("POST", "/api/cv/baseline", *multipart(
+            "baseline.tex", (BASELINE_CV + f"\n% upload {i}\n").encode())), gens),
+    ):
+        run(endpoint)
+
+    kept = run(Endpoint("POST /api/cv/generate", lambda i: ("POST", "/api/cv/generate", {
+        "job_description": job_text(n, i), "max_items": 5}), gens, keep=True))
+    job_ids = [json.loads(data)["job_id"] for data in kept]
+    run(Endpoint("POST /api/cv/generate/stream", lambda i: ("POST", "/api/cv/generate/stream", {
+        "job_description": job_text(n, i), "max_items": 5}), gens))
+    run(Endpoint("POST /api/cv/generate/batch (3 jobs)", lambda i: ("POST", "/api/cv/generate/batch", {
+        "job_descriptions": [job_text(n, i * 3 + k) for k in range(3)], "max_items": 5}), max(1, gens // 3)))
+
+    kept = run(Endpoint("POST /api/cv/generate (background)", lambda i: ("POST", "/api/cv/generate", {
+        "job_description": job_text(n, i), "max_items": 5, "background": True}), gens, keep=True))
+    queued = [json.loads(data)["job_id"] for data in kept]
+    if queued:
+        run(Endpoint("GET /api/cv/jobs/{job_id}", lambda i: ("GET", f"/api/cv/jobs/{queued[i % len(queued)]}"), reqs))
+        wait_for_jobs(client, queued)
+
+    run(Endpoint("GET /api/cv/history?limit=50", lambda i: ("GET", "/api/cv/history?limit=50"), reqs))
+    if job_ids:
+        for name, suffix in (("", ""), ("/content", "/content"), ("/pdf", "/pdf")):
+            run(Endpoint(f"GET /api/cv/generated/{{job_id}}{name}",
+                         lambda i, suffix=suffix: ("GET", f"/api/cv/generated/{job_ids[i % len(job_ids)]}{suffix}"),
+                         reqs))
+    return results
+
+
+def start_api(tmp: Path, env: dict) -> tuple:
+    """uvicorn serving main:app from tmp/run (so data lives in tmp/data); returns (process, port)"""
+    run_dir = tmp / "run"
+    run_dir.mkdir()
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", BACKEND_DIR,
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=run_dir, env=env
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"API exited with code {server.returncode}")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return server, port
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("API did not start within 60s")
+
+
+def fake_engine(directory: Path, seconds: float) -> str:
+    """Executable wrapper running fake_latex.py with a fixed compile time"""
+    script = directory / "pdflatex"
+    fake = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_latex.py")
+    script.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{fake}" --seconds {seconds} "$@"\n')
+    script.chmod(0o755)
+    return str(script)
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> int:
+    """Print the change per endpoint; returns the number of regressions"""
+    before = {(r["projects"], r["endpoint"]): r for r in baseline["results"]}
+    settings = ("concurrency", "requests", "generations", "latency", "tokens_per_second", "latex_seconds", "backend")
+    differing = [key for key in settings if baseline["config"].get(key) != current["config"].get(key)]
+    if differing:
+        print(f"\nwarning: runs differ in {', '.join(differing)}; the comparison is not like for like")
+    print(f"\nvs {baseline.get('commit') or 'baseline'}: p50/p99 change, throughput change"
+          f" (regression: latency +{threshold:.0%})")
+    regressions = 0
+    for result in current["results"]:
+        old = before.get((result["projects"], result["endpoint"]))
+        if old is None:
+            continue
+        changes = [result[key] / old[key] - 1 if old[key] else 0.0 for key in ("p50_ms", "p99_ms", "throughput_rps")]
+        regressed = changes[0] > threshold or changes[1] > threshold
+        regressions += regressed
+        print(f"{result['projects']:>6} {result['endpoint']:<46} {changes[0]:>+8.0%} {changes[1]:>+8.0%} "
+              f"{changes[2]:>+8.0%}{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10,100,1000,10000", help="portfolio sizes (projects)")
+    parser.add_argument("--concurrency", type=int, default=16, help="client threads")
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+    parser.add_argument("--generations", type=int, default=40, help="requests per model-backed endpoint")
+    parser.add_argument("--latency", type=float, default=0.2, help="fake model latency in seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=0, help="fake model output rate (0: instant)")
+    parser.add_argument("--latex-seconds", type=float, default=0.2, help="fake PDF compile time")
+    parser.add_argument("--backend", choices=["json", "sqlite"], default="json")
+    parser.add_argument("--only", default="", help="comma-separated substrings of endpoint names to run")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="earlier --output file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="latency growth counted as a regression")
+    args = parser.parse_args()
+    only = [part for part in args.only.split(",") if part]
+
+    _, fake_url, fake = start_fake_gemini(latency=args.latency, tokens_per_second=args.tokens_per_second)
+    report = {
+        **git_commit(),
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "results": [],
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        env = {
+            **os.environ,
+            "GEMINI_API_KEY": "fake-key",
+            "GEMINI_BASE_URL": fake_url,
+            "STORAGE_BACKEND": args.backend,
+            "TENANT_AUTH": "header",
+            # Let the client's concurrency reach the model instead of queueing in the limits
+            "GEMINI_MAX_CONCURRENCY": str(args.concurrency * 3),
+            "TENANT_MAX_CONCURRENT_GENERATIONS": str(args.concurrency * 3),
+            "TENANT_MAX_QUEUED_JOBS": str(args.generations),
+            "JOB_QUEUE_MAX": str(args.generations),
+            "LATEX_ENGINE": "pdflatex",
+            "LATEX_ENGINE_PATH": fake_engine(tmp, args.latex_seconds),
+        }
+        server, port = start_api(tmp, env)
+        try:
+            print(f"{'size':>6} {'endpoint':<46} {'reqs':>5} {'err':>4} {'p50 ms':>9} {'p99 ms':>9} {'req/s':>8}")
+            for n in (int(size) for size in args.sizes.split(",")):
+                report["results"].extend(run_size(Client(port, f"bench-{n}"), n, args, only))
+        finally:
+            server.terminate()
+            server.wait()
+    report["model_requests"] = fake.requests
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nwrote {args.output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            if compare(json.load(f), report, args.threshold):
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
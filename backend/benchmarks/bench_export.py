@@ -0,0 +1,70 @@
+"""Portfolio export: one JSON document built in memory vs the streaming
+NDJSON export, on both storage backends.
+
+Seeds n synthetic projects and 1000 history entries, then reports wall
+time, output size and peak traced memory of each export (the stream is
+consumed chunk by chunk and discarded, as a socket would).
+
+Usage: python benchmarks/bench_export.py [--projects 1000,10000,50000]
+"""
+import argparse
+import json
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from synthetic import BACKEND_DIR, make_projects  # noqa: F401 (puts backend/ on sys.path)
+
+from data_manager import DataManager
+from file_responses import ndjson_chunks
+from sqlite_store import SQLiteDataManager
+
+
+def seed(manager, n: int):
+    manager.commit_import(make_projects(n))
+    manager.save_generated_cvs([
+        {"latex_content": "x", "job_id": f"job{i:05d}", "company": f"Company {i % 50}",
+         "generated_at": datetime(2024, 1, 1 + i % 28).isoformat()}
+        for i in range(1000)
+    ])
+
+
+def in_memory(manager) -> int:
+    document = {
+        "personal_info": manager.get_personal_info().dict(),
+        "skills": [skill.dict() for skill in manager.get_skills()],
+        "projects": [project.dict() for project in manager.get_all_projects()],
+        "cv_history": [item.dict() for item in manager.get_cv_history()],
+    }
+    return len(json.dumps(document, ensure_ascii=False).encode("utf-8"))
+
+
+def streaming(manager) -> int:
+    return sum(len(chunk) for chunk in ndjson_chunks(manager.iter_export()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--projects", default="1000,10000,50000")
+    args = parser.parse_args()
+
+    print(f"{'projects':>8} {'backend':<7} {'method':<10} {'seconds':>8} {'MB out':>7} {'peak MB':>8}")
+    for n in (int(size) for size in args.projects.split(",")):
+        for backend, manager_class in (("json", DataManager), ("sqlite", SQLiteDataManager)):
+            with tempfile.TemporaryDirectory() as tmp:
+                manager = manager_class(tmp)
+                seed(manager, n)
+                manager.get_all_projects()  # Warm the caches both methods share
+                for name, fn in (("in-memory", in_memory), ("streaming", streaming)):
+                    tracemalloc.start()
+                    start = time.perf_counter()
+                    size = fn(manager)
+                    elapsed = time.perf_counter() - start
+                    peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+                    tracemalloc.stop()
+                    print(f"{n:>8} {backend:<7} {name:<10} {elapsed:>8.2f} {size / 1024 / 1024:>7.1f} {peak:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Baseline CV extraction: local LaTeX parser vs the model.
+
+Times parse_latex_cv on data/sample_baseline_cv.tex and extraction through
+the fake Gemini server with the local parser disabled.
+
+Usage: python benchmarks/bench_extraction.py [--runs 200] [--latency 2.0]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from fake_gemini import start_fake_gemini
+from synthetic import BACKEND_DIR
+
+from gemini_client import reset_client
+from gemini_service import extract_cv_data_async
+from latex_parser import parse_latex_cv
+
+with open(os.path.join(BACKEND_DIR, "..", "data", "sample_baseline_cv.tex"), encoding="utf-8") as f:
+    BASELINE_CV = f.read()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--model-runs", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=2.0, help="fake model latency in seconds")
+    args = parser.parse_args()
+
+    samples = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        data, confidence = parse_latex_cv(BASELINE_CV)
+        samples.append((time.perf_counter() - start) * 1000)
+    entries = sum(len(data[key]) for key in ("projects", "experience", "education", "certifications"))
+    print(f"local parser: {statistics.median(samples):.2f}ms median, confidence {confidence}, "
+          f"{entries} entries, {len(data['skills'])} skill categories")
+
+    _, base_url, _ = start_fake_gemini(latency=args.latency)
+    os.environ.update(GEMINI_API_KEY="fake-key", GEMINI_BASE_URL=base_url, LOCAL_PARSER_MIN_CONFIDENCE="2")
+    reset_client()
+    samples = []
+    for _ in range(args.model_runs):
+        start = time.perf_counter()
+        asyncio.run(extract_cv_data_async(BASELINE_CV))
+        samples.append((time.perf_counter() - start) * 1000)
+    print(f"model ({args.latency}s fake latency): {statistics.median(samples):.0f}ms median")
+
+
+if __name__ == "__main__":
+    main()
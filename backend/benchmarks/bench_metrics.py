@@ -0,0 +1,60 @@
+"""Metrics recording overhead: cost of the stage timer, in-flight gauge
+and model I/O counters per call, with recording on and off, next to an
+empty loop. Also times rendering /metrics once many series exist.
+
+Usage: python benchmarks/bench_metrics.py [--calls 200000]
+"""
+import argparse
+import time
+
+from synthetic import BACKEND_DIR  # noqa: F401 (puts backend/ on sys.path)
+
+import metrics
+
+
+def per_call_ns(fn, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+def stage():
+    with metrics.stage("generate", "prompt_build"):
+        pass
+
+
+def in_flight():
+    with metrics.generation_in_flight():
+        pass
+
+
+def model_io():
+    metrics.record_model_io("generate", "x" * 2000, "y" * 500, {"prompt_tokens": 500, "output_tokens": 125})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200000)
+    args = parser.parse_args()
+
+    baseline = per_call_ns(lambda: None, args.calls)
+    print(f"{'recorder':<12} {'off ns':>8} {'on ns':>8}   (empty call: {baseline:.0f} ns)")
+    for name, fn in (("stage", stage), ("in_flight", in_flight), ("model_io", model_io)):
+        metrics.REGISTRY.enabled = False
+        off = per_call_ns(fn, args.calls) - baseline
+        metrics.REGISTRY.enabled = True
+        on = per_call_ns(fn, args.calls) - baseline
+        print(f"{name:<12} {off:>8.0f} {on:>8.0f}")
+
+    for route in range(200):
+        for status in ("200", "404"):
+            metrics.HTTP_REQUESTS.inc("GET", f"/api/route/{route}", status)
+            metrics.HTTP_DURATION.observe(0.01, "GET", f"/api/route/{route}")
+    start = time.perf_counter()
+    text = metrics.REGISTRY.render()
+    print(f"render: {(time.perf_counter() - start) * 1000:.1f} ms for {text.count(chr(10))} lines")
+
+
+if __name__ == "__main__":
+    main()
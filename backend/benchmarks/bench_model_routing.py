@@ -0,0 +1,86 @@
+"""Generation latency with and without hedging to a faster fallback model.
+
+The fake server answers the primary model in --primary-latency seconds and
+the fallback in --fallback-latency, and makes a random --slow-rate share of
+all requests take --slow-latency instead. Calls are run once with the
+primary model alone and once with GENERATION_LATENCY_BUDGET_SECONDS set, so
+slow primary calls are hedged to the fallback.
+
+Usage: python benchmarks/bench_model_routing.py [--calls 200] [--budget 0.5]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from collections import Counter
+
+from fake_gemini import start_fake_gemini
+from synthetic import make_projects
+
+from gemini_client import reset_client
+from gemini_service import generate_cv_async
+from model_routing import routing_stats
+from models import Project
+
+BASELINE_CV = "\\documentclass{article}\n\\begin{document}\nJane Doe\n\\end{document}\n"
+JOB_DESCRIPTION = "Backend engineer for Kafka pipelines on Kubernetes"
+PROJECTS = [Project(**p) for p in make_projects(10)]
+PRIMARY, FALLBACK = "primary-model", "fast-model"
+
+
+async def run_calls(calls: int, concurrency: int) -> tuple:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, models = [], Counter()
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            result = await generate_cv_async(BASELINE_CV, PROJECTS, JOB_DESCRIPTION)
+            latencies.append((time.perf_counter() - start) * 1000)
+            models[result["model"]] += 1
+
+    await asyncio.gather(*(one() for _ in range(calls)))
+    return sorted(latencies), models
+
+
+def report(name: str, latencies: list, models: Counter, stats_before: dict):
+    stats = routing_stats()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{name:<24} {statistics.median(latencies):>8.0f}ms {p99:>8.0f}ms {latencies[-1]:>8.0f}ms "
+          f"{stats['hedged'] - stats_before['hedged']:>7} {models[FALLBACK]:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--primary-latency", type=float, default=0.2)
+    parser.add_argument("--fallback-latency", type=float, default=0.1)
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--slow-latency", type=float, default=2.0)
+    parser.add_argument("--budget", type=float, default=0.5)
+    args = parser.parse_args()
+
+    _, base_url, _ = start_fake_gemini(
+        latency=args.primary_latency, model_latency={FALLBACK: args.fallback_latency},
+        slow_rate=args.slow_rate, slow_latency=args.slow_latency
+    )
+    os.environ.update(GEMINI_API_KEY="fake-key", GEMINI_BASE_URL=base_url, GENERATION_MODEL=PRIMARY)
+    reset_client()
+
+    print(f"{args.slow_rate:.0%} of calls take {args.slow_latency}s; primary {args.primary_latency}s, "
+          f"fallback {args.fallback_latency}s")
+    print(f"{'routing':<24} {'p50':>10} {'p99':>10} {'max':>10} {'hedged':>7} {'fallback':>10}")
+
+    os.environ["GENERATION_FALLBACK_MODEL"] = ""
+    before = routing_stats()
+    report("primary only", *asyncio.run(run_calls(args.calls, args.concurrency)), before)
+
+    os.environ.update(GENERATION_FALLBACK_MODEL=FALLBACK, GENERATION_LATENCY_BUDGET_SECONDS=str(args.budget))
+    before = routing_stats()
+    report(f"hedge after {args.budget}s", *asyncio.run(run_calls(args.calls, args.concurrency)), before)
+
+
+if __name__ == "__main__":
+    main()
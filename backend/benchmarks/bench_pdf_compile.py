@@ -0,0 +1,100 @@
+"""PDF compile throughput of the LaTeX compile pool at N concurrent jobs.
+
+Compiles distinct copies of data/sample_baseline_cv.tex through
+LatexCompiler.get_pdf with several pool sizes, then downloads them all
+again to time the content-hash cache. Uses tectonic or pdflatex when
+installed; with --fake-seconds (or no TeX install) benchmarks/fake_latex.py
+stands in, which measures the pool and cache overhead only.
+
+Usage: python benchmarks/bench_pdf_compile.py [--jobs 16] [--workers 1,2,4] [--fake-seconds 0.5]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from synthetic import BACKEND_DIR
+
+from pdf_compiler import LatexCompiler, find_engine
+
+with open(os.path.join(BACKEND_DIR, "..", "data", "sample_baseline_cv.tex"), encoding="utf-8") as f:
+    BASELINE_CV = f.read()
+
+
+def fake_engine(directory: Path, seconds: float) -> str:
+    """Executable wrapper running fake_latex.py with a fixed compile time"""
+    script = directory / "pdflatex"
+    fake = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_latex.py")
+    script.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{fake}" --seconds {seconds} "$@"\n')
+    script.chmod(0o755)
+    return str(script)
+
+
+async def run(compiler: LatexCompiler, generated_dir: Path, jobs: int) -> tuple:
+    documents = [(f"job{i:04d}", BASELINE_CV + f"\n% variant {i}\n") for i in range(jobs)]
+
+    async def timed(job_id, latex):
+        start = time.perf_counter()
+        _, cached = await compiler.get_pdf(generated_dir, job_id, latex)
+        return time.perf_counter() - start, cached
+
+    start = time.perf_counter()
+    cold = await asyncio.gather(*(timed(job_id, latex) for job_id, latex in documents))
+    cold_elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    warm = await asyncio.gather(*(timed(job_id, latex) for job_id, latex in documents))
+    warm_elapsed = time.perf_counter() - start
+    return cold, cold_elapsed, warm, warm_elapsed
+
+
+def percentile(samples, share):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=16, help="concurrent compile requests")
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--fake-seconds", type=float, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        engine, executable = find_engine()
+        if args.fake_seconds is not None or not executable:
+            seconds = args.fake_seconds if args.fake_seconds is not None else 0.5
+            engine, executable = "pdflatex", fake_engine(tmp, seconds)
+            print(f"engine: fake_latex.py ({seconds}s per compile)")
+        else:
+            print(f"engine: {engine} ({executable})")
+
+        print(f"{'workers':>7} {'jobs':>5} {'docs/s':>8} {'p50':>9} {'p99':>9} {'cached p50':>11} {'cached docs/s':>14}")
+        for workers in (int(w) for w in args.workers.split(",")):
+            generated_dir = tmp / f"generated-{workers}"
+            generated_dir.mkdir()
+            compiler = LatexCompiler(tmp / f"latex-{workers}", engine=engine, workers=workers, executable=executable)
+
+            async def session():
+                await compiler.start(BASELINE_CV)
+                try:
+                    return await run(compiler, generated_dir, args.jobs)
+                finally:
+                    await compiler.stop()
+
+            cold, cold_elapsed, warm, warm_elapsed = asyncio.run(session())
+            if any(cached for _, cached in cold) or not all(cached for _, cached in warm):
+                print("unexpected cache state")
+            cold_latency = [seconds for seconds, _ in cold]
+            warm_latency = [seconds for seconds, _ in warm]
+            print(f"{workers:>7} {args.jobs:>5} {args.jobs / cold_elapsed:>8.2f} "
+                  f"{statistics.median(cold_latency) * 1000:>7.0f}ms {percentile(cold_latency, 0.99) * 1000:>7.0f}ms "
+                  f"{statistics.median(warm_latency) * 1000:>9.2f}ms {args.jobs / warm_elapsed:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
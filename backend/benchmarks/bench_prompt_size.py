@@ -0,0 +1,101 @@
+"""Prompt size and generation latency with local pre-ranking and compact encoding.
+
+For each portfolio size, builds the generation prompt from every project
+(the old path), from the top max_items * PROMPT_CANDIDATES_PER_ITEM
+projects picked by DataManager.rank_projects, and from those projects with
+PROMPT_ENCODING=compact. Each variant is timed against the fake Gemini
+server, whose time to first token grows with prompt tokens.
+
+Usage: python benchmarks/bench_prompt_size.py [--sizes 50,500,5000] [--prompt-tokens-per-second 20000]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+from fake_gemini import start_fake_gemini
+from synthetic import BACKEND_DIR, make_projects
+
+from data_manager import DataManager
+from gemini_client import reset_client
+from gemini_service import build_generation_prompt, generate_cv_async
+from models import ProjectUpdate
+
+with open(os.path.join(BACKEND_DIR, "..", "data", "sample_baseline_cv.tex"), encoding="utf-8") as f:
+    BASELINE_CV = f.read()
+
+JOB_DESCRIPTION = (
+    "Backend engineer to build and scale Kafka and PostgreSQL data pipelines on Kubernetes. "
+    "Strong Python and Go, experience with Terraform on AWS and observability dashboards."
+)
+
+
+def timed_ms(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+async def generation_latency_ms(projects, calls: int, encoding: str) -> float:
+    os.environ["PROMPT_ENCODING"] = encoding
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        await generate_cv_async(BASELINE_CV, projects, JOB_DESCRIPTION, max_items=5)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="50,500,5000")
+    parser.add_argument("--max-items", type=int, default=5)
+    parser.add_argument("--candidates-per-item", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.05, help="fixed fake model latency in seconds")
+    parser.add_argument("--prompt-tokens-per-second", type=float, default=20000)
+    parser.add_argument("--calls", type=int, default=3)
+    args = parser.parse_args()
+
+    _, base_url, _ = start_fake_gemini(latency=args.latency, prompt_tokens_per_second=args.prompt_tokens_per_second)
+    os.environ["GEMINI_API_KEY"] = "fake-key"
+    os.environ["GEMINI_BASE_URL"] = base_url
+    reset_client()
+    top_k = args.max_items * args.candidates_per_item
+
+    print(f"top_k={top_k}, fake model: {args.latency}s + prompt at {args.prompt_tokens_per_second:.0f} tok/s")
+    print(f"{'projects':>8} {'full tokens':>12} {'ranked tokens':>14} {'compact tokens':>15} {'reduction':>10} "
+          f"{'index build':>12} {'rank':>9} {'incr. update':>13} {'full gen':>10} {'ranked gen':>11} {'compact gen':>12}")
+    for size in [int(n) for n in args.sizes.split(",")]:
+        with tempfile.TemporaryDirectory() as tmp:
+            manager = DataManager(tmp)
+            manager._insert_projects(make_projects(size))
+            all_projects = manager.get_all_projects()
+
+            _, build_ms = timed_ms(manager.rank_projects, JOB_DESCRIPTION, top_k)
+            ranked, rank_ms = timed_ms(manager.rank_projects, JOB_DESCRIPTION, top_k)
+            # An edit patches the index in place instead of rebuilding it
+            manager.update_project(all_projects[0].id, ProjectUpdate(bullets=["Ran Kafka on Kubernetes"]))
+            _, update_ms = timed_ms(manager.rank_projects, JOB_DESCRIPTION, top_k)
+
+            full_prompt = build_generation_prompt(BASELINE_CV, all_projects, JOB_DESCRIPTION, max_items=args.max_items)
+            ranked_prompt = build_generation_prompt(BASELINE_CV, ranked, JOB_DESCRIPTION, max_items=args.max_items)
+            compact_prompt = build_generation_prompt(BASELINE_CV, ranked, JOB_DESCRIPTION, max_items=args.max_items,
+                                                     encoding="compact")
+            full_tokens, ranked_tokens, compact_tokens = (
+                len(full_prompt) // 4, len(ranked_prompt) // 4, len(compact_prompt) // 4
+            )
+
+            full_gen = asyncio.run(generation_latency_ms(all_projects, args.calls, "json"))
+            ranked_gen = asyncio.run(generation_latency_ms(ranked, args.calls, "json"))
+            compact_gen = asyncio.run(generation_latency_ms(ranked, args.calls, "compact"))
+
+            print(f"{size:>8} {full_tokens:>12} {ranked_tokens:>14} {compact_tokens:>15} "
+                  f"{full_tokens / compact_tokens:>9.1f}x "
+                  f"{build_ms:>10.1f}ms {rank_ms:>7.2f}ms {update_ms:>11.2f}ms "
+                  f"{full_gen:>8.0f}ms {ranked_gen:>9.0f}ms {compact_gen:>10.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Gemini retry, rate-limit and circuit-breaker behaviour against the fake server.
+
+Runs a burst of concurrent generations in three scenarios: a flaky upstream
+failing a share of requests with 503 (with and without retries), a full
+outage (the circuit opens and later calls fail fast without reaching the
+upstream), and a client-side rate limit (the burst is spread out to the
+configured rate).
+
+Usage: python benchmarks/bench_resilience.py [--calls 40] [--concurrency 8] [--fail-rate 0.3]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from fake_gemini import start_fake_gemini
+from synthetic import make_projects
+
+from gemini_client import reset_client
+from gemini_service import generate_cv_async
+from models import Project
+from model_routing import get_model_route
+from resilience import get_resilient_caller, reset_resilient_callers
+
+BASELINE_CV = "\\documentclass{article}\n\\begin{document}\nJane Doe\n\\end{document}\n"
+JOB_DESCRIPTION = "Backend engineer for Kafka pipelines on Kubernetes"
+PROJECTS = [Project(**p) for p in make_projects(10)]
+
+
+async def run_burst(calls: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async def one():
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await generate_cv_async(BASELINE_CV, PROJECTS, JOB_DESCRIPTION)
+            except Exception:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(calls)))
+    return {
+        "ok": calls - errors,
+        "elapsed_s": time.perf_counter() - start,
+        "p50_ms": statistics.median(latencies),
+        "max_ms": max(latencies),
+    }
+
+
+def scenario(name: str, config, calls: int, concurrency: int, **env):
+    for key, value in env.items():
+        os.environ[key] = str(value)
+    reset_resilient_callers()
+    upstream_before = config.requests
+    result = asyncio.run(run_burst(calls, concurrency))
+    stats = get_resilient_caller(get_model_route("generation").primary).stats()
+    print(f"{name:<28} {result['ok']:>4}/{calls:<4} {config.requests - upstream_before:>9} "
+          f"{stats['retries']:>8} {stats['circuit_rejections']:>9} {stats['circuit_state']:>9} "
+          f"{result['p50_ms']:>8.0f}ms {result['max_ms']:>8.0f}ms {result['elapsed_s']:>8.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--fail-rate", type=float, default=0.3)
+    parser.add_argument("--rate-per-minute", type=float, default=600)
+    args = parser.parse_args()
+
+    _, base_url, config = start_fake_gemini(latency=args.latency, fail_status=503, fail_rate=args.fail_rate)
+    os.environ.update(GEMINI_API_KEY="fake-key", GEMINI_BASE_URL=base_url, GEMINI_RETRY_BASE_SECONDS="0.05",
+                      GEMINI_RETRY_MAX_SECONDS="1", GEMINI_RATE_LIMIT_PER_MINUTE="0",
+                      GENERATION_FALLBACK_MODEL="")
+    reset_client()
+
+    print(f"{'scenario':<28} {'ok':>9} {'upstream':>9} {'retries':>8} {'rejected':>9} {'circuit':>9} "
+          f"{'p50':>10} {'max':>10} {'elapsed':>9}")
+    scenario(f"flaky {args.fail_rate:.0%}, no retries", config, args.calls, args.concurrency,
+             GEMINI_MAX_RETRIES=0, GEMINI_CIRCUIT_FAILURES=0)
+    scenario(f"flaky {args.fail_rate:.0%}, 3 retries", config, args.calls, args.concurrency,
+             GEMINI_MAX_RETRIES=3, GEMINI_CIRCUIT_FAILURES=0)
+
+    config.fail_rate = 0  # fail_status alone: every request fails
+    scenario("outage, no breaker", config, args.calls, args.concurrency,
+             GEMINI_MAX_RETRIES=3, GEMINI_CIRCUIT_FAILURES=0)
+    scenario("outage, breaker after 5", config, args.calls, args.concurrency,
+             GEMINI_MAX_RETRIES=3, GEMINI_CIRCUIT_FAILURES=5, GEMINI_CIRCUIT_RESET_SECONDS=30)
+
+    config.fail_status = 0
+    scenario(f"healthy, {args.rate_per_minute:.0f}/min limit", config, args.calls, args.concurrency,
+             GEMINI_RATE_LIMIT_PER_MINUTE=args.rate_per_minute, GEMINI_RATE_LIMIT_BURST=5)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Selected-item detection: per-project substring scan vs TitleMatcher.
+
+Puts five synthetic project titles into the sample baseline CV, then finds
+them among n projects with the old `title.lower() in latex.lower()` loop
+and with the Aho-Corasick matcher, both freshly built ("matcher") and
+reused for unchanged items ("cached"), reporting time and false
+positives. The portfolio also holds decoys the substring scan mistakes
+for matches: each chosen title minus its last digit ("Go API 1" inside
+"Go API 12") and words found inside other words ("Script" in JavaScript).
+
+Usage: python benchmarks/bench_title_matching.py [--sizes 100,1000,5000] [--runs 20]
+"""
+import argparse
+import os
+import time
+
+from synthetic import BACKEND_DIR, make_projects
+
+from title_matcher import TitleMatcher, get_title_matcher
+
+with open(os.path.join(BACKEND_DIR, "..", "data", "sample_baseline_cv.tex"), encoding="utf-8") as f:
+    BASELINE_CV = f.read()
+
+
+def substring_scan(projects, latex_cv):
+    return [p["id"] for p in projects if p["title"].lower() in latex_cv.lower()]
+
+
+def matcher_scan(projects, latex_cv):
+    matcher = TitleMatcher([(p["id"], p["title"]) for p in projects])
+    return TitleMatcher.selected_ids(matcher.find(latex_cv))
+
+
+def cached_matcher_scan(projects, latex_cv):
+    matcher = get_title_matcher([(p["id"], p["title"]) for p in projects])
+    return TitleMatcher.selected_ids(matcher.find(latex_cv))
+
+
+def timed(fn, runs, *args):
+    start = time.perf_counter()
+    for _ in range(runs):
+        result = fn(*args)
+    return (time.perf_counter() - start) / runs * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="100,1000,5000")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'projects':>8} {'method':<10} {'ms/CV':>9} {'found':>6} {'false +':>8}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        projects = make_projects(size)
+        chosen = projects[10:size:max(1, size // 5)][:5]
+        decoys = [p["title"][:-1] for p in chosen] + ["Script", "Red", "Act"]
+        projects += [dict(projects[0], id=f"decoy{i}", title=title) for i, title in enumerate(decoys)]
+        expected = {p["id"] for p in chosen}
+        items = "\n".join(f"\\resumeProjectHeading{{\\textbf{{{p['title']}}}}}{{2023}}" for p in chosen)
+        latex_cv = BASELINE_CV.replace("\\end{document}", items + "\n\\end{document}")
+        for name, fn in (("substring", substring_scan), ("matcher", matcher_scan),
+                         ("cached", cached_matcher_scan)):
+            ms, found = timed(fn, args.runs, projects, latex_cv)
+            false_positives = len(set(found) - expected)
+            missed = expected - set(found)
+            print(f"{size:>8} {name:<10} {ms:>9.2f} {len(found):>6} {false_positives:>8}"
+                  + (f"  missed {len(missed)}" if missed else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""Local stand-in for the Gemini REST API, for load tests and benchmarks.
+
+Serves generateContent and streamGenerateContent for any model with a
+configurable latency, prompt processing rate and output token rate, and
+can fail all, the first N or a random share of requests. Latency can be
+set per model, and a random share of requests can be made slow. Point the backend at it with
+GEMINI_BASE_URL=http://127.0.0.1:<port>/ and any GEMINI_API_KEY.
+
+Usage: python benchmarks/fake_gemini.py [--port 8765] [--latency 2.0] [--tokens-per-second 200]
+                                        [--prompt-tokens-per-second 20000]
+                                        [--fail-status 503 [--fail-first 3 | --fail-rate 0.2]]
+                                        [--model-latency gemini-2.0-flash=0.5] [--slow-rate 0.1 --slow-latency 5]
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FAKE_CV = r"""\documentclass[11pt,a4paper]{article}
+\begin{document}
+\section*{Projects}
+%s
+\end{document}"""
+
+FAKE_EXTRACTION = {
+    "personal_info": {"name": "Jane Doe", "email": "jane@example.com"},
+    "skills": [{"category": "Languages", "items": ["Python", "Go"]}],
+    "projects": [{"title": "Fake Project", "description": "", "technologies": [], "date_range": "", "bullets": []}],
+    "experience": [],
+    "education": [],
+    "certifications": [],
+}
+
+
+class FakeGeminiConfig:
+    """Behaviour knobs shared by all request handlers"""
+
+    def __init__(self, latency: float = 2.0, tokens_per_second: float = 0, prompt_tokens_per_second: float = 0,
+                 fail_status: int = 0, fail_first: int = 0, fail_rate: float = 0, model_latency: dict = None,
+                 slow_rate: float = 0, slow_latency: float = 0):
+        self.latency = latency
+        self.model_latency = model_latency or {}  # model name -> latency, overriding latency
+        self.slow_rate = slow_rate  # share of requests that take slow_latency instead (tail latency)
+        self.slow_latency = slow_latency
+        self.tokens_per_second = tokens_per_second
+        self.prompt_tokens_per_second = prompt_tokens_per_second  # 0: prompt size adds no latency
+        self.fail_status = fail_status  # e.g. 429 or 503 to exercise error paths
+        # With fail_status: fail only the first N requests and/or this share of
+        # requests at random; neither set fails every request
+        self.fail_first = fail_first
+        self.fail_rate = fail_rate
+        self.requests = 0
+        self.connections = 0
+        self.lock = threading.Lock()
+
+    def latency_for(self, model: str) -> float:
+        if self.slow_rate and random.random() < self.slow_rate:
+            return self.slow_latency
+        return self.model_latency.get(model, self.latency)
+
+    def should_fail(self, request_number: int) -> bool:
+        if not self.fail_status:
+            return False
+        if not self.fail_first and not self.fail_rate:
+            return True
+        return request_number <= self.fail_first or random.random() < self.fail_rate
+
+
+def fake_edits(prompt: str) -> str:
+    """Section edits (GENERATION_MODE=edits) rewriting the projects section
+    with the first few database items"""
+    sections = re.findall(r'^%%% section: (\S+)', prompt, re.MULTILINE)
+    target = next((s for s in sections if "project" in s), sections[0] if sections else "projects")
+    items = (re.findall(r'^### (.+?)(?: \(.*\))?\nID: (\S+)', prompt, re.MULTILINE)
+             or re.findall(r'"title": "([^"]+)"[\s\S]*?"id": "([^"]+)"', prompt))
+    lines = [f"%%% section: {target}"]
+    for title, item_id in items[:3]:
+        lines += [f"%%% item: {item_id}", f"\\textbf{{{title}}}", "\\begin{itemize}",
+                  "    \\item Rewritten bullet for the target role", "\\end{itemize}"]
+    return "\n".join(lines)
+
+
+def fake_response_text(prompt: str) -> str:
+    """Pick a plausible answer for the prompt"""
+    if "CV data extraction assistant" in prompt:
+        return json.dumps(FAKE_EXTRACTION)
+    if "%%% section:" in prompt:
+        return fake_edits(prompt)
+    # Mention the first few project titles so selection detection has work to do
+    titles = re.findall(r'"title": "([^"]+)"', prompt) or re.findall(r'^### (.+?)(?: \(.*\))?$', prompt, re.MULTILINE)
+    titles = titles[:5]
+    items = "\n".join(f"\\textbf{{{title}}}" for title in titles)
+    # Re-emit the baseline from the prompt like a real model would, so output size tracks CV length
+    baseline = re.search(r'```latex\n(.*?\\end\{document\})', prompt, re.DOTALL)
+    if baseline:
+        return "```latex\n" + baseline.group(1).replace("\\end{document}", items + "\n\\end{document}") + "\n```"
+    return "```latex\n" + FAKE_CV % items + "\n```"
+
+
+def response_body(text: str, prompt_tokens: int = 0) -> dict:
+    return {
+        "candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "finishReason": "STOP"}],
+        "usageMetadata": {"promptTokenCount": prompt_tokens, "candidatesTokenCount": max(1, len(text) // 4)},
+    }
+
+
+def make_handler(config: FakeGeminiConfig):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True  # keep-alive responses would otherwise wait on delayed ACKs
+
+        def log_message(self, format, *args):
+            pass
+
+        def setup(self):
+            super().setup()
+            with config.lock:
+                config.connections += 1
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            with config.lock:
+                config.requests += 1
+                request_number = config.requests
+            if config.should_fail(request_number):
+                self._send_json(config.fail_status, {"error": {"code": config.fail_status, "message": "fake failure", "status": "UNAVAILABLE"}})
+                return
+
+            request = json.loads(body or b"{}")
+            prompt = "".join(
+                part.get("text", "")
+                for content in request.get("contents", [])
+                for part in content.get("parts", [])
+            )
+            text = fake_response_text(prompt)
+            prompt_tokens = len(prompt) // 4
+            model = re.search(r'models/([^:/]+):', self.path)
+            time.sleep(config.latency_for(model.group(1) if model else ""))
+            if config.prompt_tokens_per_second:
+                time.sleep(prompt_tokens / config.prompt_tokens_per_second)
+
+            if ":streamGenerateContent" in self.path:
+                self._stream(text)
+            else:
+                if config.tokens_per_second:
+                    time.sleep(len(text) / 4 / config.tokens_per_second)
+                self._send_json(200, response_body(text, prompt_tokens))
+
+        def _send_json(self, status: int, payload: dict):
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _stream(self, text: str):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            chunk_size = 64
+            for start in range(0, len(text), chunk_size):
+                chunk = text[start:start + chunk_size]
+                if config.tokens_per_second:
+                    time.sleep(len(chunk) / 4 / config.tokens_per_second)
+                self.wfile.write(b"data: " + json.dumps(response_body(chunk)).encode() + b"\r\n\r\n")
+                self.wfile.flush()
+            self.close_connection = True
+
+    return Handler
+
+
+def start_fake_gemini(port: int = 0, **options) -> tuple:
+    """Start the fake server in a background thread; returns (server, base_url, config)"""
+    config = FakeGeminiConfig(**options)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(config))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/", config
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=2.0)
+    parser.add_argument("--tokens-per-second", type=float, default=0)
+    parser.add_argument("--prompt-tokens-per-second", type=float, default=0)
+    parser.add_argument("--fail-status", type=int, default=0)
+    parser.add_argument("--fail-first", type=int, default=0)
+    parser.add_argument("--fail-rate", type=float, default=0)
+    parser.add_argument("--model-latency", action="append", default=[], metavar="MODEL=SECONDS")
+    parser.add_argument("--slow-rate", type=float, default=0)
+    parser.add_argument("--slow-latency", type=float, default=0)
+    args = parser.parse_args()
+    model_latency = {model: float(seconds) for model, seconds in (item.split("=", 1) for item in args.model_latency)}
+
+    server, base_url, _ = start_fake_gemini(args.port, latency=args.latency, tokens_per_second=args.tokens_per_second,
+                                            prompt_tokens_per_second=args.prompt_tokens_per_second,
+                                            fail_status=args.fail_status, fail_first=args.fail_first,
+                                            fail_rate=args.fail_rate, model_latency=model_latency,
+                                            slow_rate=args.slow_rate, slow_latency=args.slow_latency)
+    print(f"Fake Gemini listening on {base_url} (latency {args.latency}s)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Stand-in for pdflatex, for benchmarking the PDF compile pool without a TeX install.
+
+Takes the pdflatex arguments LatexCompiler passes, waits --seconds to
+simulate a compile and writes cv.pdf and cv.log into the working
+directory. A document containing \\undefinedcommand fails the way
+pdflatex does.
+
+Usage: python benchmarks/fake_latex.py --seconds 0.5 [pdflatex arguments] cv.tex
+"""
+import argparse
+import sys
+import time
+
+MINIMAL_PDF = b"""%PDF-1.4
+1 0 obj << /Type /Catalog /Pages 2 0 R >> endobj
+2 0 obj << /Type /Pages /Kids [3 0 R] /Count 1 >> endobj
+3 0 obj << /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] >> endobj
+trailer << /Root 1 0 R >>
+%%EOF
+"""
+
+
+def main():
+    # pdflatex options start with a single dash, so no -h and no prefix matching
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0], add_help=False, allow_abbrev=False)
+    parser.add_argument("--seconds", type=float, default=0.5)
+    args, rest = parser.parse_known_args()
+    source = next(arg for arg in rest if arg.endswith(".tex"))
+    with open(source, encoding="utf-8") as f:
+        latex = f.read()
+
+    time.sleep(args.seconds)
+    if "\\undefinedcommand" in latex:
+        line = latex[:latex.index("\\undefinedcommand")].count("\n") + 1
+        with open("cv.log", "w", encoding="utf-8") as f:
+            f.write(f"./cv.tex:{line}: Undefined control sequence.\nl.{line} \\undefinedcommand\n")
+        sys.exit(1)
+    with open("cv.log", "w", encoding="utf-8") as f:
+        f.write("Output written on cv.pdf (1 page).\n")
+    with open("cv.pdf", "wb") as f:
+        f.write(MINIMAL_PDF + latex.encode("utf-8")[:1000])
+
+
+if __name__ == "__main__":
+    main()
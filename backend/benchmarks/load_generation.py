@@ -0,0 +1,120 @@
+"""Load test: CRUD latency while CV generations are in flight.
+
+Runs the API under uvicorn against the fake Gemini server, measures read
+endpoint latency idle, then again while --generations slow generation
+requests are outstanding. With non-blocking model calls the two should
+be about the same.
+
+Usage: python benchmarks/load_generation.py [--generations 60] [--latency 3.0]
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from fake_gemini import start_fake_gemini
+from synthetic import make_projects
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def request(base_url: str, method: str, path: str, payload=None) -> float:
+    """Send one request; returns latency in milliseconds"""
+    data = json.dumps(payload).encode() if payload is not None else None
+    req = urllib.request.Request(base_url + path, data=data, method=method,
+                                 headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    with urllib.request.urlopen(req, timeout=600) as resp:
+        resp.read()
+    return (time.perf_counter() - start) * 1000
+
+
+def percentiles(samples: list) -> dict:
+    samples = sorted(samples)
+    return {
+        "p50_ms": round(statistics.median(samples), 2),
+        "p99_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 2),
+    }
+
+
+def measure_crud(base_url: str, project_id: str, rounds: int) -> dict:
+    paths = ["/api/projects?limit=50", f"/api/projects/{project_id}", "/api/skills", "/api/personal-info", "/health"]
+    samples = []
+    for _ in range(rounds):
+        for path in paths:
+            samples.append(request(base_url, "GET", path))
+    return percentiles(samples)
+
+
+def start_api(port: int):
+    import uvicorn
+    import main as api
+    server = uvicorn.Server(uvicorn.Config(api.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, api
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--generations", type=int, default=60)
+    parser.add_argument("--latency", type=float, default=3.0)
+    parser.add_argument("--projects", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    _, fake_url, fake = start_fake_gemini(latency=args.latency)
+    os.environ.update({
+        "GEMINI_API_KEY": "fake-key",
+        "GEMINI_BASE_URL": fake_url,
+        "GEMINI_MAX_CONCURRENCY": str(args.generations),
+        "TENANT_MAX_CONCURRENT_GENERATIONS": str(args.generations),
+    })
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # main.py keeps its data in ../data relative to the working directory
+        os.makedirs(os.path.join(tmp, "run"))
+        os.chdir(os.path.join(tmp, "run"))
+        port = free_port()
+        server, api = start_api(port)
+        base_url = f"http://127.0.0.1:{port}"
+
+        projects = make_projects(args.projects)
+        api.tenants.default.commit_import(projects)
+        api.tenants.default.save_baseline_cv(r"\documentclass{article}\begin{document}Baseline\end{document}")
+
+        idle = measure_crud(base_url, projects[0]["id"], args.rounds)
+
+        payload = {"job_description": {"text": "Python backend engineer"}, "max_items": 5}
+        pool = ThreadPoolExecutor(max_workers=args.generations)
+        futures = [pool.submit(request, base_url, "POST", "/api/cv/generate", payload) for _ in range(args.generations)]
+        while fake.requests < args.generations and not any(f.done() for f in futures):
+            time.sleep(0.05)
+        busy = measure_crud(base_url, projects[0]["id"], args.rounds)
+        generation = percentiles([f.result() for f in futures])
+        pool.shutdown()
+        server.should_exit = True
+
+    print(json.dumps({
+        "generations_in_flight": args.generations,
+        "model_latency_s": args.latency,
+        "crud_idle": idle,
+        "crud_during_generation": busy,
+        "generation": generation,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
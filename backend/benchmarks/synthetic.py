@@ -0,0 +1,57 @@
+"""Synthetic portfolio data shared by the benchmark scripts"""
+import os
+import random
+import sys
+
+# Benchmarks import the backend modules the same way main.py does
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+TECHNOLOGIES = [
+    "Python", "JavaScript", "TypeScript", "Go", "Rust", "Java", "React", "Vue.js",
+    "Node.js", "FastAPI", "Django", "Flask", "PostgreSQL", "MongoDB", "Redis",
+    "Docker", "Kubernetes", "AWS", "GCP", "Terraform", "Kafka", "GraphQL",
+    "PyTorch", "TensorFlow", "Spark", "Airflow", "Elasticsearch", "gRPC",
+]
+VERBS = ["Built", "Designed", "Led", "Implemented", "Optimized", "Migrated", "Automated", "Scaled"]
+NOUNS = ["pipeline", "service", "dashboard", "platform", "API", "scheduler", "search engine", "data lake"]
+CATEGORIES = ["project", "experience", "education", "certification"]
+
+
+def make_project(i: int, rng: random.Random) -> dict:
+    """Build one project dict in the projects.json format"""
+    techs = rng.sample(TECHNOLOGIES, 4)
+    noun = rng.choice(NOUNS)
+    return {
+        "id": f"p{i:07d}",
+        "title": f"{techs[0]} {noun} {i}",
+        "description": f"{rng.choice(VERBS)} a {noun} using {', '.join(techs)} for team {i % 97}.",
+        "technologies": techs,
+        "date_range": f"Jan {2015 + i % 10} - Dec {2016 + i % 10}",
+        "category": CATEGORIES[i % len(CATEGORIES)] if i % 3 == 0 else "project",
+        "bullets": [
+            f"{rng.choice(VERBS)} {noun} with {tech} serving {rng.randint(1, 900)}k users"
+            for tech in techs[:3]
+        ],
+    }
+
+
+def make_projects(n: int, seed: int = 42) -> list:
+    """Build n synthetic projects deterministically"""
+    rng = random.Random(seed)
+    return [make_project(i, rng) for i in range(n)]
+
+
+def make_history(n: int) -> list:
+    """Build n synthetic CV history entries, newest first"""
+    return [
+        {
+            "job_id": f"j{i:07d}",
+            "company": f"Company {i % 50}",
+            "position": "Software Engineer",
+            "generated_at": f"2026-01-{1 + i % 28:02d}T12:00:{i % 60:02d}",
+            "file_path": f"../data/generated/j{i:07d}.tex",
+        }
+        for i in range(n)
+    ]
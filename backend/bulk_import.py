@@ -0,0 +1,313 @@
+import codecs
+import io
+import json
+import uuid
+from typing import BinaryIO, Iterator, List, NamedTuple, Optional
+
+from pydantic import TypeAdapter, ValidationError
+
+from data_manager import generate_stable_id
+from models import PersonalInfo, Project, SkillCategory
+
+
+# Portfolio sections holding items, and the category their items default to
+SECTION_CATEGORIES = {"education": "education", "experience": "experience", "projects": "project",
+                      "certifications": "certification"}
+CATEGORY_SECTIONS = {category: section for section, category in SECTION_CATEGORIES.items()}
+MAX_REPORTED_ERRORS = 1000
+READ_SIZE = 64 * 1024
+
+PROJECTS = TypeAdapter(List[Project])
+SKILLS = TypeAdapter(List[SkillCategory])
+DECODER = json.JSONDecoder()
+
+
+class ImportFormatError(ValueError):
+    """Raised when the file is not JSON/JSONL of the expected shape"""
+
+
+class Record(NamedTuple):
+    section: Optional[str]  # Portfolio key, None for a plain list of items
+    row: Optional[int]  # 1-based item number (JSON) or line number (JSONL)
+    value: object
+    error: Optional[str] = None  # Set when the row could not be parsed
+
+
+class JsonStream:
+    """Incremental reader for one JSON document: values are decoded as
+    soon as their bytes arrive, so large arrays never sit in memory whole"""
+
+    def __init__(self, f: BinaryIO):
+        self.f = f
+        self.decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        data = self.f.read(READ_SIZE)
+        self.eof = not data
+        self.buffer = self.buffer[self.pos:] + self.decoder.decode(data, final=self.eof)
+        self.pos = 0
+
+    def peek(self) -> str:
+        """Next non-whitespace character, "" at the end of the input"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buffer) or self.eof:
+                return self.buffer[self.pos:self.pos + 1]
+            self._fill()
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            found = self.peek() or "end of file"
+            raise ImportFormatError(f"Invalid JSON: expected '{char}', found '{found}'")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = DECODER.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                if self.eof:
+                    raise ImportFormatError(f"Invalid JSON: {e.msg}") from None
+                self._fill()
+                continue
+            if end == len(self.buffer) and not self.eof:
+                self._fill()  # A number may continue in the next chunk
+                continue
+            self.pos = end
+            return value
+
+    def array(self) -> Iterator:
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() == ",":
+                self.pos += 1
+            else:
+                self.expect("]")
+                return
+
+
+def read_json_records(f: BinaryIO, items_only: bool = False) -> Iterator[Record]:
+    """Records from a JSON array of items or (unless items_only) a portfolio
+    object, whose item sections are streamed item by item"""
+    stream = JsonStream(f)
+    first = stream.peek()
+    if first == "{" and items_only:
+        raise ImportFormatError("JSON file must contain an array of projects")
+    if first == "[":
+        for row, item in enumerate(stream.array(), 1):
+            yield Record(None, row, item)
+    elif first == "{":
+        stream.expect("{")
+        while stream.peek() != "}":
+            key = stream.value()
+            if not isinstance(key, str):
+                raise ImportFormatError("Invalid JSON: object keys must be strings")
+            stream.expect(":")
+            if key in SECTION_CATEGORIES and stream.peek() == "[":
+                for row, item in enumerate(stream.array(), 1):
+                    yield Record(key, row, item)
+            else:
+                yield Record(key, None, stream.value())
+            if stream.peek() != ",":
+                break
+            stream.pos += 1
+        stream.expect("}")
+    else:
+        raise ImportFormatError("JSON file must contain an array of items or a portfolio object")
+    if stream.peek():
+        raise ImportFormatError("Invalid JSON: unexpected data after the document")
+
+
+def portfolio_records(portfolio: dict) -> Iterator[Record]:
+    """Records from an already parsed portfolio object (baseline CV
+    extraction); empty sections are skipped"""
+    for key, value in portfolio.items():
+        if key in SECTION_CATEGORIES and isinstance(value, list):
+            for row, item in enumerate(value, 1):
+                yield Record(key, row, item)
+        elif value is not None:
+            yield Record(key, None, value)
+
+
+def read_jsonl_records(f: BinaryIO) -> Iterator[Record]:
+    """One item per line; unparseable lines become per-row errors"""
+    text = io.TextIOWrapper(f, encoding="utf-8-sig", errors="replace")
+    try:
+        for line_number, line in enumerate(text, 1):
+            if not line.strip():
+                continue
+            try:
+                yield Record(None, line_number, json.loads(line))
+            except json.JSONDecodeError as e:
+                yield Record(None, line_number, None, f"Invalid JSON: {e.msg}")
+    finally:
+        text.detach()  # Leave the upload's file open for its owner
+
+
+class ImportReport:
+    """Counts and per-row errors of one bulk import"""
+
+    def __init__(self, dry_run: bool = False):
+        self.dry_run = dry_run
+        self.counts = {"personal_info": 0, **{section: 0 for section in SECTION_CATEGORIES}, "skills": 0}
+        self.rows = 0
+        self.imported = 0
+        self.duplicates = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+
+    def error(self, section: Optional[str], row: Optional[int], message: str,
+              item_id: Optional[str] = None, field: Optional[str] = None, new_row: bool = True):
+        """Record an error; further errors of the same row pass new_row=False"""
+        self.failed += new_row
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"section": section, "row": row, "id": item_id, "field": field, "message": message})
+
+    def to_dict(self) -> dict:
+        return {
+            "imported": self.imported,
+            "counts": self.counts,
+            "rows": self.rows,
+            "duplicates": self.duplicates,
+            "failed": self.failed,
+            # Batch validation reports rows late; list them in file order
+            "errors": sorted(self.errors, key=lambda error: (error["section"] or "", error["row"] or 0)),
+            "errors_truncated": len(self.errors) >= MAX_REPORTED_ERRORS,
+            "dry_run": self.dry_run,
+        }
+
+
+def _item_id(item: dict, section: Optional[str]) -> Optional[str]:
+    """ID to store and deduplicate an item under, assigned as the original
+    import endpoints did; None when the item's own ID is not a string, which
+    validation then reports"""
+    if "id" in item:
+        return item["id"] if isinstance(item["id"], str) else None
+    # Portfolio sections hash the title, so re-imports dedup; project lists
+    # get a random ID, so every row without one is a new project
+    if section is not None and isinstance(item.get("title"), str):
+        return generate_stable_id(item["title"])
+    return str(uuid.uuid4())[:8]
+
+
+def _reported_id(item: dict) -> Optional[str]:
+    """An item's ID as text for the error report, whatever JSON type it had"""
+    return None if item.get("id") is None else str(item["id"])
+
+
+def _validate_batch(batch: List[tuple], report: ImportReport) -> List[dict]:
+    """Validate (section, row, item) tuples in one pydantic call; failed
+    rows go to the report, valid items come back as dicts"""
+    items = [item for _, _, item in batch]
+    try:
+        return PROJECTS.dump_python(PROJECTS.validate_python(items))
+    except ValidationError as e:
+        failed = {}
+        for error in e.errors():
+            index, *field = error["loc"]
+            failed.setdefault(index, []).append((".".join(str(part) for part in field) or None, error["msg"]))
+    valid = []
+    for index, (section, row, item) in enumerate(batch):
+        if index in failed:
+            for position, (field, message) in enumerate(failed[index]):
+                report.error(section, row, message, item_id=_reported_id(item), field=field, new_row=position == 0)
+        else:
+            valid.append(item)
+    return PROJECTS.dump_python(PROJECTS.validate_python(valid))
+
+
+def bulk_import(data_manager, f: BinaryIO, file_format: str = "json", items_only: bool = False,
+                dry_run: bool = False, batch_size: int = 500) -> dict:
+    """Stream, validate and store items from a JSON or JSONL file.
+
+    The file is parsed incrementally. Items are deduplicated by ID within
+    the file and against stored projects, and validated in batches. Items
+    without an ID get one hashed from the title in portfolio sections, or a
+    random one in a plain list (so those are never duplicates). All valid rows are
+    committed in a single write (one atomic file write per JSON file, or
+    one SQLite transaction); invalid rows are skipped and reported.
+    items_only rejects portfolio objects (the /api/projects/import
+    format); dry_run validates without writing.
+    """
+    records = read_jsonl_records(f) if file_format == "jsonl" else read_json_records(f, items_only)
+    return import_records(data_manager, records, dry_run, batch_size)
+
+
+def import_portfolio(data_manager, portfolio: dict, dry_run: bool = False) -> dict:
+    """Validate and store a parsed portfolio object, as bulk_import does
+    for a file"""
+    return import_records(data_manager, portfolio_records(portfolio), dry_run)
+
+
+def import_records(data_manager, records: Iterator[Record], dry_run: bool = False, batch_size: int = 500) -> dict:
+    """Deduplicate, validate and commit records; returns the report"""
+    report = ImportReport(dry_run)
+    seen_ids = set()
+    valid_items: List[dict] = []
+    batch: List[tuple] = []
+    personal_info = None
+    skills = None
+
+    for record in records:
+        if record.error:
+            report.rows += 1
+            report.error(record.section, record.row, record.error)
+            continue
+        if record.section == "personal_info":
+            try:
+                personal_info = PersonalInfo(**record.value) if record.value else None
+            except (TypeError, ValidationError) as e:
+                report.error("personal_info", None, str(e))
+            continue
+        if record.section == "skills":
+            try:
+                skills = SKILLS.validate_python(record.value) if record.value else None
+            except ValidationError as e:
+                report.error("skills", None, str(e))
+            continue
+        if record.section is not None and record.section not in SECTION_CATEGORIES:
+            continue  # Other portfolio keys are ignored, as before
+
+        report.rows += 1
+        item = record.value
+        if not isinstance(item, dict):
+            report.error(record.section, record.row, "Item must be a JSON object")
+            continue
+        item = dict(item)
+        if record.section:
+            item.setdefault("category", SECTION_CATEGORIES[record.section])
+        item_id = _item_id(item, record.section)
+        if item_id is not None:
+            item["id"] = item_id
+            if item_id in seen_ids:
+                report.duplicates += 1
+                continue
+            seen_ids.add(item_id)
+        batch.append((record.section, record.row, item))
+        if len(batch) >= batch_size:
+            valid_items.extend(_validate_batch(batch, report))
+            batch = []
+    if batch:
+        valid_items.extend(_validate_batch(batch, report))
+
+    if dry_run:
+        existing = data_manager._project_ids()
+        inserted = [item for item in valid_items if item["id"] not in existing]
+    else:
+        inserted = data_manager.commit_import(valid_items, personal_info, skills)
+    report.imported = len(inserted)
+    report.duplicates += len(valid_items) - len(inserted)
+    for item in inserted:
+        report.counts[CATEGORY_SECTIONS[item["category"]]] += 1
+    report.counts["personal_info"] = 1 if personal_info else 0
+    report.counts["skills"] = len(skills or [])
+    return report.to_dict()
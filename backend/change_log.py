@@ -0,0 +1,156 @@
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from persistence import atomic_write, get_file_lock
+
+
+# Compact once the log has this many entries and more than twice as many as live records
+COMPACT_MIN_ENTRIES = 1000
+
+
+def change_retention_seconds() -> float:
+    """How long deletion markers are kept for incremental exports (CHANGE_LOG_RETENTION_DAYS)"""
+    return float(os.getenv("CHANGE_LOG_RETENTION_DAYS", "30")) * 86400
+
+
+def tombstone_cutoff() -> str:
+    """changed_at before which deletion markers may be dropped"""
+    return (datetime.now() - timedelta(seconds=change_retention_seconds())).isoformat()
+
+
+class ChangeLog:
+    """Append-only log of changed and deleted record keys, one JSON entry
+    per line, for incremental exports of the JSON store.
+
+    A write appends a single line stamped with the next version instead of
+    rewriting a document, so its cost does not grow with the data. Entries
+    superseded by a later change to the same key, and deletion markers
+    older than the retention period, are dropped when the log is compacted;
+    the first line then records the newest version dropped (the floor), so
+    an incremental export from before it can fall back to a full one.
+
+    Other processes' appends are picked up by reading the file from where
+    this instance stopped. The log has its own lock, always taken after
+    any data file lock.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._state_lock = threading.Lock()
+        self._reset(None)
+
+    def _reset(self, inode: Optional[int]):
+        self._inode = inode
+        self._offset = 0
+        self._entries = 0
+        self._version = 0
+        self._floor = (0, "")
+        # key -> (version, changed_at, deleted)
+        self._records: Dict[str, Tuple[int, str, bool]] = {}
+
+    def _apply(self, entry: dict):
+        if "floor" in entry:
+            # Written by compaction
+            self._floor = (entry["floor"], entry["floor_at"])
+            self._version = max(self._version, entry["version"])
+            return
+        version, changed_at = entry["version"], entry["changed_at"]
+        for key in entry.get("keys", ()):
+            self._records[key] = (version, changed_at, False)
+        for key in entry.get("deleted", ()):
+            self._records[key] = (version, changed_at, True)
+        self._version = max(self._version, version)
+        self._entries += 1
+
+    def _refresh(self):
+        """Read lines appended since the last call (by any process); holds _state_lock"""
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            self._reset(None)
+            return
+        if stat.st_ino != self._inode or stat.st_size < self._offset:
+            self._reset(stat.st_ino)  # Replaced by compaction
+        if stat.st_size == self._offset:
+            return
+        with open(self.path, 'rb') as f:
+            f.seek(self._offset)
+            data = f.read()
+        complete = data.rfind(b"\n") + 1  # A line still being appended is read next time
+        for line in data[:complete].splitlines():
+            if line.strip():
+                self._apply(json.loads(line))
+        self._offset += complete
+
+    @property
+    def version(self) -> int:
+        with self._state_lock:
+            self._refresh()
+            return self._version
+
+    @property
+    def floor(self) -> Tuple[int, str]:
+        """(version, changed_at) of the newest change compaction dropped"""
+        with self._state_lock:
+            self._refresh()
+            return self._floor
+
+    def changes(self, since_version: Optional[int] = None, since: Optional[str] = None) -> List[tuple]:
+        """(key, version, changed_at, deleted) of records changed after
+        since_version and at or after since, oldest first"""
+        with self._state_lock:
+            self._refresh()
+            changes = [
+                (key, version, changed_at, deleted)
+                for key, (version, changed_at, deleted) in self._records.items()
+                if (since_version is None or version > since_version) and (since is None or changed_at >= since)
+            ]
+        return sorted(changes, key=lambda change: change[1])
+
+    def append(self, keys: Iterable[str], deleted: Iterable[str] = ()) -> int:
+        """Stamp keys as changed and deleted as removed with the next version"""
+        keys, deleted = list(keys), list(deleted)
+        with get_file_lock(self.path):
+            with self._state_lock:
+                self._refresh()
+                version = self._version + 1
+            entry = {"version": version, "changed_at": datetime.now().isoformat(), "keys": keys, "deleted": deleted}
+            with open(self.path, 'ab') as f:
+                f.write(json.dumps(entry, ensure_ascii=False).encode('utf-8') + b"\n")
+                f.flush()
+                os.fsync(f.fileno())
+            with self._state_lock:
+                self._refresh()
+                if self._entries > max(COMPACT_MIN_ENTRIES, 2 * len(self._records)):
+                    self._compact()
+        return version
+
+    def compact(self):
+        """Rewrite the log with one entry per live record"""
+        with get_file_lock(self.path), self._state_lock:
+            self._refresh()
+            self._compact()
+
+    def _compact(self):
+        """Holds the file lock and _state_lock"""
+        cutoff = tombstone_cutoff()
+        floor_version, floor_at = self._floor
+        kept = []
+        for key, (version, changed_at, deleted) in self._records.items():
+            if deleted and changed_at < cutoff:
+                floor_version = max(floor_version, version)
+                floor_at = max(floor_at, changed_at)
+            else:
+                kept.append((version, changed_at, key, deleted))
+        lines = [{"version": self._version, "floor": floor_version, "floor_at": floor_at}]
+        lines.extend(
+            {"version": version, "changed_at": changed_at, "keys": [] if deleted else [key],
+             "deleted": [key] if deleted else []}
+            for version, changed_at, key, deleted in sorted(kept)
+        )
+        atomic_write(self.path, "".join(json.dumps(line, ensure_ascii=False) + "\n" for line in lines))
+        self._refresh()
@@ -0,0 +1,166 @@
+import os
+import re
+from typing import Dict, List, Tuple
+
+from latex_parser import SECTION_PATTERN, latex_to_text, read_group
+from prompt_encoding import strip_latex_comments
+
+
+GENERATION_MODES = ["full", "edits"]
+
+EDIT_MARKER = re.compile(r'^[ \t]*%%%[ \t]*(section|item)[ \t]*:[ \t]*(.*?)[ \t]*$', re.MULTILINE)
+ENVIRONMENT = re.compile(r'\\(begin|end)\s*\{([^}]*)\}')
+FORBIDDEN_IN_EDIT = re.compile(r'\\(?:section|documentclass|usepackage)(?![A-Za-z])|\\(?:begin|end)\s*\{document\}')
+
+
+class EditError(ValueError):
+    """Raised when an edit would break the document"""
+
+
+def get_generation_mode() -> str:
+    """Generation mode from GENERATION_MODE: "full" (default) or "edits" """
+    mode = os.getenv("GENERATION_MODE", "full").lower()
+    if mode not in GENERATION_MODES:
+        raise ValueError(f"Unknown GENERATION_MODE '{mode}', expected 'full' or 'edits'")
+    return mode
+
+
+class CVSection:
+    """One \\section of a CV: the heading is kept, the body can be replaced"""
+
+    def __init__(self, section_id: str, title: str, heading_end: int, end: int, body: str):
+        self.id = section_id
+        self.title = title
+        self.heading_end = heading_end  # Index just after the \section{...} heading
+        self.end = end
+        self.body = body
+
+
+def _slug(title: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '-', title.lower()).strip('-') or "section"
+
+
+def split_cv_sections(latex_cv: str) -> List[CVSection]:
+    """Addressable sections of a CV, with ids made from their titles"""
+    end_document = latex_cv.rfind("\\end{document}")
+    document_end = end_document if end_document >= 0 else len(latex_cv)
+    matches = [m for m in SECTION_PATTERN.finditer(latex_cv) if m.start() < document_end]
+    sections = []
+    seen: Dict[str, int] = {}
+    for match, following in zip(matches, matches[1:] + [None]):
+        title, heading_end = read_group(latex_cv, match.end() - 1)
+        end = following.start() if following else document_end
+        title = latex_to_text(title or "")
+        section_id = _slug(title)
+        seen[section_id] = seen.get(section_id, 0) + 1
+        if seen[section_id] > 1:
+            section_id = f"{section_id}-{seen[section_id]}"
+        sections.append(CVSection(section_id, title, heading_end, end, latex_cv[heading_end:end]))
+    return sections
+
+
+def encode_sections(sections: List[CVSection], compact: bool = True) -> str:
+    """Sections for the prompt, each introduced by its id marker"""
+    blocks = []
+    for section in sections:
+        body = strip_latex_comments(section.body) if compact else section.body.strip()
+        blocks.append(f"%%% section: {section.id}\n% {section.title}\n{body}")
+    return "\n\n".join(blocks)
+
+
+def parse_edits(response_text: str) -> List[Tuple[str, List[Tuple[str, str]]]]:
+    """Parse "%%% section: id" / "%%% item: source" output into
+    [(section id, [(source id or "", LaTeX)])]. Text before the first
+    section marker is ignored; a section without item markers is one item."""
+    edits = []
+    markers = list(EDIT_MARKER.finditer(response_text))
+    for marker, following in zip(markers, markers[1:] + [None]):
+        kind, value = marker.group(1), marker.group(2)
+        text = response_text[marker.end():following.start() if following else len(response_text)]
+        text = text.strip("\n").rstrip()
+        if kind == "section":
+            edits.append((value, []))
+            if text.strip():
+                edits[-1][1].append(("", text))
+        elif edits:
+            edits[-1][1].append((value, text))
+    return edits
+
+
+def check_latex_fragment(latex: str):
+    """Raise EditError unless braces and environments balance and the
+    fragment stays inside its section"""
+    forbidden = FORBIDDEN_IN_EDIT.search(latex)
+    if forbidden:
+        raise EditError(f"edit contains {forbidden.group(0)}")
+    depth = 0
+    i = 0
+    while i < len(latex):
+        char = latex[i]
+        if char == "\\":
+            i += 2
+            continue
+        if char == "%":
+            newline = latex.find("\n", i)
+            i = len(latex) if newline < 0 else newline
+            continue
+        if char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth < 0:
+                raise EditError("unbalanced braces")
+        i += 1
+    if depth:
+        raise EditError("unbalanced braces")
+
+    stack = []
+    for match in ENVIRONMENT.finditer(strip_latex_comments(latex)):
+        kind, name = match.groups()
+        if kind == "begin":
+            stack.append(name)
+        elif not stack or stack.pop() != name:
+            raise EditError(f"unmatched \\end{{{name}}}")
+    if stack:
+        raise EditError(f"unclosed \\begin{{{stack[-1]}}}")
+
+
+def apply_edits(baseline_cv: str, edits: List[Tuple[str, List[Tuple[str, str]]]],
+                project_ids: List[str]) -> Tuple[str, List[str], List[dict]]:
+    """Patch section bodies of the baseline with validated edits.
+
+    Returns (tailored LaTeX, IDs of the database items the applied edits
+    are based on, rejected edits as {"section", "reason"}). A rejected edit
+    leaves its section as it was in the baseline; the rest still apply.
+    """
+    sections = {section.id: section for section in split_cv_sections(baseline_cv)}
+    known_ids = set(project_ids)
+    replacements: Dict[str, Tuple[str, List[str]]] = {}
+    rejected = []
+    for section_id, items in edits:
+        if section_id not in sections:
+            rejected.append({"section": section_id, "reason": "unknown section"})
+            continue
+        try:
+            for _, latex in items:
+                check_latex_fragment(latex)
+        except EditError as e:
+            rejected.append({"section": section_id, "reason": str(e)})
+            continue
+        sources = [source for source, _ in items if source in known_ids]
+        body = "\n" + "\n\n".join(latex for _, latex in items if latex.strip()) + "\n\n"
+        replacements[section_id] = (body, sources)  # A later edit of the same section wins
+
+    parts = []
+    position = 0
+    selected = []
+    for section in sections.values():
+        if section.id not in replacements:
+            continue
+        body, sources = replacements[section.id]
+        parts.append(baseline_cv[position:section.heading_end])
+        parts.append(body)
+        position = section.end
+        selected.extend(source for source in sources if source not in selected)
+    parts.append(baseline_cv[position:])
+    return "".join(parts), selected, rejected
@@ -1,11 +1,16 @@
+import base64
 import json
 import os
 from pathlib import Path
-from typing import List, Optional, Dict
+from typing import Iterator, List, Optional, Dict
 from datetime import datetime
-import uuid
 import hashlib
+import threading
+from contextlib import ExitStack, contextmanager
 from models import Project, ProjectCreate, ProjectUpdate, CVHistoryItem, PersonalInfo, SkillCategory, UserData
+from change_log import ChangeLog
+from persistence import UNCHANGED, atomic_write, atomic_write_json, get_file_lock, get_group_commit
+from relevance import ProjectIndex
 
 
 def generate_stable_id(title):
@@ -14,6 +19,74 @@ def generate_stable_id(title):
     return hashlib.md5(normalized.encode()).hexdigest()[:8]
 
 
+PROJECT_FIELDS = ["id", "title", "description", "technologies", "date_range", "category", "bullets"]
+PROJECT_SORTS = ["created", "title", "category"]
+HISTORY_FIELDS = ["job_id", "company", "position", "generated_at", "file_path", "model"]
+
+
+def change_key(kind: str, record_id: Optional[str] = None) -> str:
+    """Change log key of a record: "personal_info", "skills", "project:<id>" or "history:<job_id>" """
+    return f"{kind}:{record_id}" if record_id else kind
+
+
+def encode_cursor(sort: str, descending: bool, key: list) -> str:
+    """Encode the sort key of the last returned item, and the sort it came
+    from, as an opaque cursor"""
+    payload = {"sort": sort, "order": "desc" if descending else "asc", "key": key}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(cursor: str, sort: str, descending: bool, key_length: int) -> list:
+    """Sort key from a cursor produced by encode_cursor for the same sort and
+    order; raises ValueError for anything else"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(payload, dict) or not isinstance(payload.get("key"), list):
+        raise ValueError("Invalid cursor")
+    order = "desc" if descending else "asc"
+    if payload.get("sort") != sort or payload.get("order") != order:
+        raise ValueError(f"Cursor is for sort={payload.get('sort')} order={payload.get('order')}, "
+                         f"not sort={sort} order={order}; start again without a cursor")
+    if len(payload["key"]) != key_length:
+        raise ValueError("Invalid cursor")
+    return payload["key"]
+
+
+def check_fields(fields: Optional[List[str]], allowed: List[str], key_field: str) -> Optional[List[str]]:
+    """Validate a field projection; the key field is always included"""
+    if not fields:
+        return None
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(allowed)}")
+    return [key_field] + [f for f in fields if f != key_field]
+
+
+def paginate(keyed_items: List[tuple], sort: str, key_length: int, descending: bool, limit: Optional[int],
+             cursor: Optional[str], fields: Optional[List[str]]) -> dict:
+    """Sort (key, item) pairs and return the page after the cursor; keys are
+    lists of key_length values"""
+    keyed_items.sort(key=lambda pair: pair[0], reverse=descending)
+    if cursor:
+        after = decode_cursor(cursor, sort, descending, key_length)
+        try:
+            keyed_items = [pair for pair in keyed_items if (pair[0] < after if descending else pair[0] > after)]
+        except TypeError:
+            raise ValueError("Invalid cursor")  # Key values of the wrong type
+    
+    page = keyed_items[:limit] if limit else keyed_items
+    has_more = bool(limit) and len(keyed_items) > limit
+    items = [item for _, item in page]
+    if fields:
+        items = [{f: item.get(f) for f in fields} for item in items]
+    return {
+        "items": items,
+        "next_cursor": encode_cursor(sort, descending, page[-1][0]) if has_more else None
+    }
+
+
 class DataManager:
     """Manages local file storage for projects, baseline CV, and generated CVs"""
     
@@ -25,68 +98,219 @@ class DataManager:
         self.baseline_cv_file = self.data_dir / "baseline_cv.tex"
         self.generated_dir = self.data_dir / "generated"
         self.metadata_file = self.data_dir / "metadata.json"
+        self.changes_file = self.data_dir / "changes.jsonl"
         
         # Ensure directories exist
         self.data_dir.mkdir(parents=True, exist_ok=True)
         self.generated_dir.mkdir(parents=True, exist_ok=True)
         
+        # Relevance index over projects and the projects version it reflects
+        self._project_index = ProjectIndex()
+        self._project_index_version = None
+        self._project_index_lock = threading.Lock()
+        
+        self._init_storage()
+    
+    def _init_storage(self):
+        """Set up the JSON file store"""
+        # Parsed file contents keyed by path: (signature, data, derived views)
+        self._cache: Dict[Path, tuple] = {}
+        self._cache_lock = threading.Lock()
+        
+        # Per-thread state of an open batch() block
+        self._batch_state = threading.local()
+        
+        # Changed record keys, for incremental exports
+        self._change_log = ChangeLog(self.changes_file)
+        
         # Initialize files if they don't exist
-        if not self.projects_file.exists():
-            self._save_json(self.projects_file, [])
-        if not self.personal_info_file.exists():
-            self._save_json(self.personal_info_file, {
-                "name": "",
-                "title": "",
-                "email": "",
-                "phone": "",
-                "location": "",
-                "bio": "",
-                "website": "",
-                "github": "",
-                "linkedin": ""
-            })
-        if not self.skills_file.exists():
-            self._save_json(self.skills_file, [])
-        if not self.metadata_file.exists():
-            self._save_json(self.metadata_file, {
-                "baseline_cv_uploaded_at": None,
-                "cv_history": []
-            })
+        for file_path in self._json_files():
+            if not file_path.exists():
+                with self._locked(file_path):
+                    if not file_path.exists():
+                        self._save_json(file_path, self._default_json(file_path))
+    
+    def _json_files(self) -> List[Path]:
+        """JSON files managed by this store, in lock acquisition order"""
+        return [self.metadata_file, self.personal_info_file, self.projects_file, self.skills_file]
+    
+    @staticmethod
+    def _default_json(file_path: Path) -> any:
+        """Initial content for a missing JSON file"""
+        default_data = {
+            "projects.json": [],
+            "skills.json": [],
+            "personal_info.json": {"name": "", "title": "", "email": "", "phone": "", "location": "", "bio": "", "website": "", "github": "", "linkedin": ""},
+            "metadata.json": {"baseline_cv_uploaded_at": None, "cv_history": []}
+        }
+        return default_data.get(file_path.name, {})
+    
+    @staticmethod
+    def _file_signature(file_path: Path) -> Optional[tuple]:
+        """Identify a file version by inode, mtime and size"""
+        try:
+            stat = file_path.stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
     
     def _load_json(self, file_path: Path) -> any:
-        """Load JSON from file, create with defaults if missing"""
-        if not file_path.exists():
-            default_data = {
-                "projects.json": [],
-                "skills.json": [],
-                "personal_info.json": {"name": "", "title": "", "email": "", "phone": "", "location": "", "bio": "", "website": "", "github": "", "linkedin": ""},
-                "metadata.json": {"baseline_cv_uploaded_at": None, "cv_history": []}
-            }
-            self._save_json(file_path, default_data.get(file_path.name, {}))
+        """Load JSON from file, create with defaults if missing.
+        
+        Parsed data is cached in memory and reused until the file's mtime or
+        size changes, so the returned object must be treated as read-only.
+        """
+        pending = getattr(self._batch_state, "pending", None)
+        if pending and file_path in pending:
+            return pending[file_path]
+        groups = getattr(self._batch_state, "groups", None)
+        if groups and file_path in groups and groups[file_path].data is not UNCHANGED:
+            return groups[file_path].data
+        
+        signature = self._file_signature(file_path)
+        entry = self._cache.get(file_path)
+        if entry is not None and signature is not None and entry[0] == signature:
+            return entry[1]
+        
+        if signature is None:
+            with self._locked(file_path):
+                if not file_path.exists():
+                    self._save_json(file_path, self._default_json(file_path))
+            return self._load_json(file_path)
         
         with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+            data = json.load(f)
+        with self._cache_lock:
+            self._cache[file_path] = (signature, data, {})
+        return data
+    
+    def _load_view(self, file_path: Path, name: str, build):
+        """Get a derived view (models, indexes) of a cached JSON file"""
+        data = self._load_json(file_path)
+        entry = self._cache.get(file_path)
+        if entry is None or entry[1] is not data:
+            # File was reloaded concurrently; build from what we read
+            return build(data)
+        views = entry[2]
+        if name not in views:
+            views[name] = build(data)
+        return views[name]
     
     def _save_json(self, file_path: Path, data: any):
-        """Save JSON to file"""
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        """Save JSON to file and write it through to the in-memory cache.
+        
+        Inside a batch() block the write is deferred until the block exits;
+        inside _locked() it is staged for the block's group commit.
+        """
+        pending = getattr(self._batch_state, "pending", None)
+        if pending is not None:
+            pending[file_path] = data
+            return
+        groups = getattr(self._batch_state, "groups", None)
+        if groups and file_path in groups:
+            groups[file_path].data = data
+            return
+        self._write_json(file_path, data)
+    
+    def _write_json(self, file_path: Path, data: any) -> tuple:
+        """Atomically replace a JSON file and refresh its cache entry;
+        returns the new file signature"""
+        atomic_write_json(file_path, data)
+        signature = self._file_signature(file_path)
+        with self._cache_lock:
+            self._cache[file_path] = (signature, data, {})
+        return signature
+    
+    @contextmanager
+    def _locked(self, file_path: Path):
+        """Hold the in-process and cross-process lock for a read-modify-write.
+        
+        Writes to the same file from concurrent threads are coalesced (see
+        persistence.GroupCommit): each block reads the data the previous one
+        staged, and one disk write covers the whole burst. The block returns
+        once that write is done, and its changes are logged after it. Yields
+        the CommitGroup. Inside a batch() block all locks are already held.
+        """
+        if self._in_batch():
+            yield None
+            return
+        groups = self._batch_state.__dict__.setdefault("groups", {})
+        if file_path in groups:
+            yield groups[file_path]  # Nested block for the same file
+            return
+        own_changes = getattr(self._batch_state, "changes", None) is None
+        if own_changes:
+            self._batch_state.changes = {}
+        try:
+            with get_group_commit(file_path).join(lambda data: self._write_json(file_path, data)) as group:
+                groups[file_path] = group
+                try:
+                    yield group
+                finally:
+                    del groups[file_path]
+            changes = self._batch_state.changes
+        finally:
+            if own_changes:
+                self._batch_state.changes = None
+        if own_changes:
+            self._record_changes([key for key, deleted in changes.items() if not deleted],
+                                 [key for key, deleted in changes.items() if deleted])
+    
+    @contextmanager
+    def batch(self):
+        """Group several writes into one disk write per file.
+        
+        All JSON files stay locked for the duration of the block, reads in
+        the same thread see the pending data, and nothing is written if the
+        block raises. Changes are logged once, after the files are written.
+        
+        Separate calls outside a batch are coalesced only when they run
+        concurrently (see _locked()); a single thread's calls write once
+        apiece, as there is no write-behind.
+        """
+        if self._in_batch():
+            yield  # Nested batch joins the outer one
+            return
+        
+        with ExitStack() as locks:
+            for file_path in self._json_files():
+                locks.enter_context(get_file_lock(file_path))
+            self._batch_state.pending = {}
+            self._batch_state.changes = {}
+            try:
+                yield
+                pending = self._batch_state.pending
+                changes = self._batch_state.changes
+            finally:
+                self._batch_state.pending = None
+                self._batch_state.changes = None
+            for file_path, data in pending.items():
+                self._write_json(file_path, data)
+            self._record_changes([key for key, deleted in changes.items() if not deleted],
+                                 [key for key, deleted in changes.items() if deleted])
+    
+    def _in_batch(self) -> bool:
+        """Whether the current thread is inside a batch() block"""
+        return getattr(self._batch_state, "pending", None) is not None
+    
+    def clear_cache(self):
+        """Drop all cached file contents"""
+        with self._cache_lock:
+            self._cache.clear()
     
     # ===== Baseline CV Operations =====
     
     def save_baseline_cv(self, content: str) -> dict:
         """Save baseline LaTeX CV"""
-        with open(self.baseline_cv_file, 'w', encoding='utf-8') as f:
-            f.write(content)
+        atomic_write(self.baseline_cv_file, content)
         
         # Update metadata
-        metadata = self._load_json(self.metadata_file)
-        metadata["baseline_cv_uploaded_at"] = datetime.now().isoformat()
-        self._save_json(self.metadata_file, metadata)
+        uploaded_at = datetime.now().isoformat()
+        self._set_metadata_value("baseline_cv_uploaded_at", uploaded_at)
         
         return {
             "message": "Baseline CV saved successfully",
-            "uploaded_at": metadata["baseline_cv_uploaded_at"]
+            "uploaded_at": uploaded_at
         }
     
     def get_baseline_cv(self) -> Optional[dict]:
@@ -97,129 +321,324 @@ class DataManager:
         with open(self.baseline_cv_file, 'r', encoding='utf-8') as f:
             content = f.read()
         
-        metadata = self._load_json(self.metadata_file)
-        
         return {
             "content": content,
-            "uploaded_at": metadata.get("baseline_cv_uploaded_at")
+            "uploaded_at": self._get_metadata_value("baseline_cv_uploaded_at")
         }
     
+    def _get_metadata_value(self, key: str) -> any:
+        """Read a single metadata field"""
+        return self._load_json(self.metadata_file).get(key)
+    
+    def _set_metadata_value(self, key: str, value: any):
+        """Update a single metadata field"""
+        with self._locked(self.metadata_file):
+            metadata = dict(self._load_json(self.metadata_file))
+            metadata[key] = value
+            self._save_json(self.metadata_file, metadata)
+    
     # ===== Projects Operations =====
     
+    def _projects_version(self) -> any:
+        """Token that changes with every write to the projects file"""
+        return self._file_signature(self.projects_file)
+    
+    @contextmanager
+    def _projects_write(self):
+        """Lock projects for a write and patch the relevance index afterwards.
+        
+        Yields a dict collecting the "upserted" projects and "removed" ids,
+        which are also stamped in the change log.
+        """
+        with self._locked(self.projects_file) as group:
+            before = self._projects_version()
+            changes = {"upserted": [], "removed": []}
+            yield changes
+            self._record_changes([change_key("project", project.id) for project in changes["upserted"]],
+                                 [change_key("project", project_id) for project_id in changes["removed"]])
+            after = self._projects_version()
+        if group is not None:
+            # The file was written when the group committed; with other
+            # writers in the group this write alone does not explain it
+            after = group.result if group.members == 1 else None
+        
+        with self._project_index_lock:
+            # Patch only an index that matched the data right before this write;
+            # anything else (open batch, concurrent write) rebuilds on next use
+            if self._in_batch() or self._project_index_version != before or after in (None, before):
+                self._project_index_version = None
+                return
+            for project in changes["upserted"]:
+                self._project_index.upsert(project)
+            for project_id in changes["removed"]:
+                self._project_index.remove(project_id)
+            self._project_index_version = after
+    
+    def _projects_for_write(self) -> List[dict]:
+        """Copy of the stored project list in which every project has a "seq".
+        
+        seq is the project's insertion number and the keyset pagination
+        tiebreaker, so it must not move when other projects are added or
+        removed. Files written before it existed are numbered in list order
+        by their first write.
+        """
+        projects = list(self._load_json(self.projects_file))
+        for i, project in enumerate(projects):
+            if "seq" not in project:
+                projects[i] = {**project, "seq": i + 1}
+        return projects
+    
+    @staticmethod
+    def _next_seq(projects: List[dict]) -> int:
+        return max((project["seq"] for project in projects), default=0) + 1
+    
+    def _projects_view(self) -> tuple:
+        """Cached Project models and an id -> Project index"""
+        def build(data):
+            models = [Project(**item) for item in data]
+            return models, {model.id: model for model in models}
+        return self._load_view(self.projects_file, "projects", build)
+    
     def get_all_projects(self) -> List[Project]:
         """Get all projects"""
-        data = self._load_json(self.projects_file)
-        return [Project(**item) for item in data]
+        return list(self._projects_view()[0])
     
     def get_project(self, project_id: str) -> Optional[Project]:
         """Get a specific project by ID"""
-        projects = self._load_json(self.projects_file)
-        for proj in projects:
-            if proj["id"] == project_id:
-                return Project(**proj)
-        return None
+        return self._projects_view()[1].get(project_id)
     
     def create_project(self, project_data: ProjectCreate) -> Project:
         """Create a new project"""
-        projects = self._load_json(self.projects_file)
-        
-        # Generate stable ID based on title
-        new_id = generate_stable_id(project_data.title)
-        
-        # Check if project with same ID already exists
-        for proj in projects:
-            if proj["id"] == new_id:
-                # Update existing project instead of creating duplicate
-                proj.update(project_data.dict())
-                self._save_json(self.projects_file, projects)
-                return Project(**proj)
-        
-        # Create new project
-        new_project = Project(id=new_id, **project_data.dict())
-        
-        projects.append(new_project.dict())
-        self._save_json(self.projects_file, projects)
-        
-        return new_project
+        with self._projects_write() as changes:
+            projects = self._projects_for_write()
+            
+            # Generate stable ID based on title
+            new_id = generate_stable_id(project_data.title)
+            
+            # Check if project with same ID already exists
+            for i, proj in enumerate(projects):
+                if proj["id"] == new_id:
+                    # Update existing project instead of creating duplicate
+                    projects[i] = {**proj, **project_data.dict()}
+                    self._save_json(self.projects_file, projects)
+                    changes["upserted"].append(Project(**projects[i]))
+                    return changes["upserted"][0]
+            
+            # Create new project
+            new_project = Project(id=new_id, **project_data.dict())
+            
+            projects.append({**new_project.dict(), "seq": self._next_seq(projects)})
+            self._save_json(self.projects_file, projects)
+            changes["upserted"].append(new_project)
+            
+            return new_project
     
     def update_project(self, project_id: str, project_data: ProjectUpdate) -> Optional[Project]:
         """Update an existing project"""
-        projects = self._load_json(self.projects_file)
-        
-        for i, proj in enumerate(projects):
-            if proj["id"] == project_id:
-                # Update only provided fields
-                update_dict = project_data.dict(exclude_unset=True)
-                projects[i].update(update_dict)
-                self._save_json(self.projects_file, projects)
-                return Project(**projects[i])
-        
-        return None
+        with self._projects_write() as changes:
+            projects = self._projects_for_write()
+            
+            for i, proj in enumerate(projects):
+                if proj["id"] == project_id:
+                    # Update only provided fields
+                    update_dict = project_data.dict(exclude_unset=True)
+                    projects[i] = {**proj, **update_dict}
+                    self._save_json(self.projects_file, projects)
+                    changes["upserted"].append(Project(**projects[i]))
+                    return changes["upserted"][0]
+            
+            return None
     
     def delete_project(self, project_id: str) -> bool:
         """Delete a project"""
-        projects = self._load_json(self.projects_file)
-        original_length = len(projects)
+        with self._projects_write() as changes:
+            projects = self._projects_for_write()
+            original_length = len(projects)
+            
+            projects = [p for p in projects if p["id"] != project_id]
+            
+            if len(projects) < original_length:
+                self._save_json(self.projects_file, projects)
+                changes["removed"].append(project_id)
+                return True
+            return False
+    
+    def query_projects(self, category: Optional[str] = None, technology: Optional[str] = None,
+                       search: Optional[str] = None, sort: str = "created", order: str = "asc",
+                       limit: Optional[int] = None, cursor: Optional[str] = None,
+                       fields: Optional[List[str]] = None) -> dict:
+        """Filter, sort and page through projects.
         
-        projects = [p for p in projects if p["id"] != project_id]
+        Returns {"items": [...], "next_cursor": ...} with items as plain dicts
+        restricted to fields. Raises ValueError on a bad sort, field or cursor.
+        """
+        if sort not in PROJECT_SORTS:
+            raise ValueError(f"Unknown sort '{sort}'. Allowed: {', '.join(PROJECT_SORTS)}")
+        fields = check_fields(fields, PROJECT_FIELDS, "id") or PROJECT_FIELDS  # Never the internal seq
+        technology = technology.lower() if technology else None
+        search = search.lower() if search else None
         
-        if len(projects) < original_length:
-            self._save_json(self.projects_file, projects)
-            return True
-        return False
-    
-    def import_projects(self, projects_data: List[dict]) -> dict:
-        """Import multiple projects from JSON"""
-        projects = self._load_json(self.projects_file)
-        imported = 0
-        
-        for proj_dict in projects_data:
-            # Generate ID if not present
-            if "id" not in proj_dict:
-                proj_dict["id"] = str(uuid.uuid4())[:8]
-            
-            # Check if ID already exists
-            if not any(p["id"] == proj_dict["id"] for p in projects):
-                try:
-                    project = Project(**proj_dict)
-                    projects.append(project.dict())
-                    imported += 1
-                except Exception as e:
-                    print(f"Failed to import project: {e}")
+        keyed = []
+        for position, item in enumerate(self._load_json(self.projects_file)):
+            # Stable across writes, unlike position (see _projects_for_write)
+            seq = item.get("seq", position + 1)
+            if category and item["category"] != category:
+                continue
+            if technology and technology not in (t.lower() for t in item.get("technologies", [])):
+                continue
+            if search and search not in f"{item['title']} {item['description']}".lower():
+                continue
+            if sort == "created":
+                key = [seq]
+            elif sort == "title":
+                key = [item["title"].lower(), seq]
+            else:
+                key = [item["category"], seq]
+            keyed.append((key, item))
         
-        self._save_json(self.projects_file, projects)
-        return {"message": f"Imported {imported} projects", "count": imported}
+        return paginate(keyed, sort, 1 if sort == "created" else 2, order == "desc", limit, cursor, fields)
+    
+    def rank_projects(self, query: str, top_k: int) -> List[Project]:
+        """The top_k projects most relevant to query, best first.
+        
+        Scores with BM25 over title, description, technologies and bullets.
+        Returns all projects in stored order when top_k is 0 or covers them all.
+        """
+        projects, index = self._projects_view()
+        if top_k <= 0 or top_k >= len(projects):
+            return list(projects)
+        
+        with self._project_index_lock:
+            version = self._projects_version()
+            if self._project_index_version is None or self._project_index_version != version:
+                projects, index = self._projects_view()
+                self._project_index.rebuild(projects)
+                self._project_index_version = version
+        
+        ranked = self._project_index.search(query, top_k)
+        return [index[project_id] for project_id, _ in ranked if project_id in index]
+    
+    def _project_ids(self) -> set:
+        """IDs of all stored projects"""
+        return {p["id"] for p in self._load_json(self.projects_file)}
+    
+    def _insert_projects(self, items: List[dict]):
+        """Append already validated project dicts"""
+        if not items:
+            return
+        with self._projects_write() as changes:
+            projects = self._projects_for_write()
+            seq = self._next_seq(projects)
+            projects.extend({**item, "seq": seq + i} for i, item in enumerate(items))
+            self._save_json(self.projects_file, projects)
+            changes["upserted"].extend(Project(**item) for item in items)
+    
+    def commit_import(self, items: List[dict], personal_info: Optional[PersonalInfo] = None,
+                      skills: Optional[List[SkillCategory]] = None) -> List[dict]:
+        """Store validated import rows in one write, skipping IDs that already
+        exist; returns the inserted items"""
+        with self.batch():
+            existing_ids = self._project_ids()
+            new_items = [item for item in items if item["id"] not in existing_ids]
+            if personal_info:
+                self.save_personal_info(personal_info)
+            if skills:
+                self.save_skills(skills)
+            self._insert_projects(new_items)
+        return new_items
     
     # ===== Generated CV Operations =====
     
-    def save_generated_cv(self, latex_content: str, job_id: str, company: Optional[str] = None, 
-                          position: Optional[str] = None) -> CVHistoryItem:
-        """Save a generated CV and update history"""
+    def write_generated_cv(self, latex_content: str, job_id: str, company: Optional[str] = None,
+                           position: Optional[str] = None, generated_at: Optional[str] = None,
+                           model: Optional[str] = None) -> CVHistoryItem:
+        """Write a generated CV file and build its history entry, without
+        adding it to history (see add_to_history)"""
         filename = f"{job_id}.tex"
         file_path = self.generated_dir / filename
         
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(latex_content)
+        atomic_write(file_path, latex_content)
         
-        # Update history
-        metadata = self._load_json(self.metadata_file)
-        history_item = CVHistoryItem(
+        return CVHistoryItem(
             job_id=job_id,
             company=company,
             position=position,
-            generated_at=datetime.now().isoformat(),
-            file_path=str(file_path)
+            generated_at=generated_at or datetime.now().isoformat(),
+            file_path=str(file_path),
+            model=model
         )
+    
+    def save_generated_cv(self, latex_content: str, job_id: str, company: Optional[str] = None, 
+                          position: Optional[str] = None, model: Optional[str] = None) -> CVHistoryItem:
+        """Save a generated CV and update history"""
+        history_item = self.write_generated_cv(latex_content, job_id, company, position, model=model)
         
-        metadata["cv_history"].insert(0, history_item.dict())  # Add to beginning
-        self._save_json(self.metadata_file, metadata)
+        # Update history
+        self._add_history_item(history_item.dict())
         
         return history_item
     
+    def save_generated_cvs(self, items: List[dict]) -> List[CVHistoryItem]:
+        """Save several generated CVs with a single history update.
+        
+        Each item has latex_content and job_id, and optionally company,
+        position, generated_at and model. History entries are added in list order.
+        """
+        history_items = [self.write_generated_cv(**item) for item in items]
+        self.add_to_history(history_items)
+        return history_items
+    
+    def add_to_history(self, history_items: List[CVHistoryItem]):
+        """Add entries from write_generated_cv to history in one write, in list order"""
+        with self.batch():
+            for history_item in history_items:
+                self._add_history_item(history_item.dict())
+    
+    def _add_history_item(self, item: dict):
+        """Record a generated CV in history, newest first"""
+        with self._locked(self.metadata_file):
+            metadata = dict(self._load_json(self.metadata_file))
+            metadata["cv_history"] = [item] + metadata.get("cv_history", [])  # Add to beginning
+            self._save_json(self.metadata_file, metadata)
+            self._record_changes([change_key("history", item["job_id"])])
+    
     def get_cv_history(self) -> List[CVHistoryItem]:
         """Get CV generation history"""
-        metadata = self._load_json(self.metadata_file)
-        return [CVHistoryItem(**item) for item in metadata.get("cv_history", [])]
+        history = self._load_view(
+            self.metadata_file, "cv_history",
+            lambda metadata: [CVHistoryItem(**item) for item in metadata.get("cv_history", [])]
+        )
+        return list(history)
+    
+    def query_cv_history(self, company: Optional[str] = None, since: Optional[str] = None,
+                         until: Optional[str] = None, order: str = "desc", limit: Optional[int] = None,
+                         cursor: Optional[str] = None, fields: Optional[List[str]] = None) -> dict:
+        """Filter and page through CV history by company and generated_at range.
+        
+        since/until are ISO timestamps (or dates) compared as strings; until
+        is exclusive.
+        """
+        fields = check_fields(fields, HISTORY_FIELDS, "job_id")
+        company = company.lower() if company else None
+        
+        history = self._load_json(self.metadata_file).get("cv_history", [])
+        keyed = []
+        for position, item in enumerate(history):
+            if company and company not in (item.get("company") or "").lower():
+                continue
+            if since and item["generated_at"] < since:
+                continue
+            if until and item["generated_at"] >= until:
+                continue
+            # History is newest first, so later positions are older entries
+            keyed.append(([item["generated_at"], len(history) - position], item))
+        
+        return paginate(keyed, "generated_at", 2, order == "desc", limit, cursor, fields)
+    
+    def get_generated_cv_path(self, job_id: str) -> Optional[Path]:
+        """Path of a generated CV file, for serving it without reading it"""
+        file_path = self.generated_dir / f"{job_id}.tex"
+        return file_path if file_path.is_file() else None
     
     def get_generated_cv(self, job_id: str) -> Optional[str]:
         """Get a specific generated CV by job ID"""
@@ -233,78 +652,146 @@ class DataManager:
     
     def get_personal_info(self) -> PersonalInfo:
         """Get personal information"""
-        data = self._load_json(self.personal_info_file)
-        return PersonalInfo(**data)
+        return self._load_view(self.personal_info_file, "personal_info", lambda data: PersonalInfo(**data))
     
     def save_personal_info(self, personal_info: PersonalInfo) -> dict:
         """Save personal information"""
-        self._save_json(self.personal_info_file, personal_info.dict())
+        with self._locked(self.personal_info_file):
+            self._save_json(self.personal_info_file, personal_info.dict())
+            self._record_changes([change_key("personal_info")])
         return {"message": "Personal information saved successfully"}
     
     # ===== Skills Operations =====
     
     def get_skills(self) -> List[SkillCategory]:
         """Get all skills"""
-        data = self._load_json(self.skills_file)
-        return [SkillCategory(**item) for item in data]
+        skills = self._load_view(self.skills_file, "skills", lambda data: [SkillCategory(**item) for item in data])
+        return list(skills)
     
     def save_skills(self, skills: List[SkillCategory]) -> dict:
         """Save skills"""
-        self._save_json(self.skills_file, [skill.dict() for skill in skills])
+        with self._locked(self.skills_file):
+            self._save_json(self.skills_file, [skill.dict() for skill in skills])
+            self._record_changes([change_key("skills")])
         return {"message": "Skills saved successfully"}
     
-    # ===== Comprehensive Portfolio Import =====
+    # ===== Change Log & Export =====
     
-    def import_full_portfolio(self, portfolio_data: Dict) -> dict:
-        """Import complete portfolio data with deduplication"""
-        imported_counts = {"personal_info": 0, "education": 0, "experience": 0, "projects": 0, "skills": 0, "certifications": 0}
+    def _record_changes(self, keys: List[str], deleted: List[str] = ()):
+        """Stamp changed (or deleted) records with the next change version.
         
-        try:
-            # Import personal info
-            if "personal_info" in portfolio_data and portfolio_data["personal_info"]:
-                personal_info = PersonalInfo(**portfolio_data["personal_info"])
-                self.save_personal_info(personal_info)
-                imported_counts["personal_info"] = 1
-            
-            # Import skills
-            if "skills" in portfolio_data and portfolio_data["skills"]:
-                skills = [SkillCategory(**skill) for skill in portfolio_data["skills"]]
-                self.save_skills(skills)
-                imported_counts["skills"] = len(skills)
-            
-            # Get existing IDs for deduplication
-            existing_projects = self._load_json(self.projects_file)
-            existing_ids = {p["id"] for p in existing_projects}
-            
-            # Category mapping
-            category_map = {"education": "education", "experience": "experience", "projects": "project", "certifications": "certification"}
-            
-            all_items = []
-            for category in ["education", "experience", "projects", "certifications"]:
-                if category in portfolio_data and portfolio_data[category]:
-                    for item in portfolio_data[category]:
-                        # Generate stable ID if not present
-                        if "id" not in item:
-                            item["id"] = generate_stable_id(item["title"]) if "title" in item else str(uuid.uuid4())[:8]
-                        
-                        # Skip duplicates
-                        if item["id"] in existing_ids:
-                            continue
-                        
-                        # Set category
-                        item.setdefault("category", category_map[category])
-                        
-                        try:
-                            project = Project(**item)
-                            all_items.append(project.dict())
-                            imported_counts[category] += 1
-                        except Exception as e:
-                            print(f"Failed to import {category} item: {e}")
-            
-            existing_projects.extend(all_items)
-            self._save_json(self.projects_file, existing_projects)
-            
-            return {"message": "Portfolio imported successfully", "counts": imported_counts, "total_items": sum(imported_counts.values())}
-            
-        except Exception as e:
-            raise Exception(f"Failed to import portfolio: {str(e)}")
+        Called right after the data is written, so incremental exports can
+        pick out what changed since a version or time. Inside a batch() or
+        _locked() block the keys are logged once the data is written.
+        """
+        if not keys and not deleted:
+            return
+        pending = getattr(self._batch_state, "changes", None)
+        if pending is not None:
+            pending.update((key, False) for key in keys)
+            pending.update((key, True) for key in deleted)
+            return
+        self._change_log.append(keys, deleted)
+    
+    def change_version(self) -> int:
+        """Version of the latest change, to pass as since_version next time"""
+        return self._change_log.version
+    
+    def _change_floor(self) -> tuple:
+        """(version, changed_at) of the newest deletion marker dropped from
+        the change log; incremental exports from before it are incomplete"""
+        return self._change_log.floor
+    
+    def _iter_changes(self, since_version: Optional[int], since: Optional[str]) -> Iterator[tuple]:
+        """(key, version, changed_at, deleted) of changed records, oldest first"""
+        yield from self._change_log.changes(since_version, since)
+    
+    def _iter_projects(self) -> Iterator[dict]:
+        # Writes replace the cached list rather than mutating it, so this is a snapshot
+        for project in self._load_json(self.projects_file):
+            yield {field: value for field, value in project.items() if field != "seq"}
+    
+    def _iter_history(self) -> Iterator[dict]:
+        """History records, oldest first"""
+        yield from reversed(self._load_json(self.metadata_file).get("cv_history", []))
+    
+    def _get_history_record(self, job_id: str) -> Optional[dict]:
+        index = self._load_view(
+            self.metadata_file, "cv_history_index",
+            lambda metadata: {item["job_id"]: item for item in metadata.get("cv_history", [])}
+        )
+        return index.get(job_id)
+    
+    def iter_export(self, since: Optional[str] = None, since_version: Optional[int] = None) -> Iterator[dict]:
+        """Portfolio and history as a stream of records for NDJSON export.
+        
+        A full export yields personal info, skills, every project and every
+        history entry. With since (ISO date/time) or since_version it yields
+        only records changed after that point, plus "deleted" markers. The
+        first record carries the current version for the next incremental
+        export, the last one the record count.
+        
+        Deletion markers are kept for CHANGE_LOG_RETENTION_DAYS; asked for
+        changes from before that, it sends a full export instead, with
+        "incremental": false and a "reason" in the header.
+        """
+        incremental = since is not None or since_version is not None
+        reason = None
+        if incremental:
+            floor_version, floor_at = self._change_floor()
+            if (since_version is not None and since_version < floor_version) or (since is not None and since <= floor_at):
+                incremental = False
+                reason = f"deletions up to version {floor_version} are no longer logged"
+        version = self.change_version()
+        header = {"type": "export", "version": version, "incremental": incremental, "since": since,
+                  "since_version": since_version, "exported_at": datetime.now().isoformat()}
+        if reason:
+            header["reason"] = reason
+        yield header
+        count = 0
+        if not incremental:
+            yield {"type": "personal_info", "data": self.get_personal_info().dict()}
+            yield {"type": "skills", "data": [skill.dict() for skill in self.get_skills()]}
+            count += 2
+            for project in self._iter_projects():
+                yield {"type": "project", "data": project}
+                count += 1
+            for item in self._iter_history():
+                yield {"type": "history", "data": item}
+                count += 1
+        else:
+            for key, _, _, deleted in self._iter_changes(since_version, since):
+                kind, _, record_id = key.partition(":")
+                if deleted:
+                    record = {"type": "deleted", "kind": kind, "id": record_id}
+                elif kind == "personal_info":
+                    record = {"type": kind, "data": self.get_personal_info().dict()}
+                elif kind == "skills":
+                    record = {"type": kind, "data": [skill.dict() for skill in self.get_skills()]}
+                elif kind == "project":
+                    project = self.get_project(record_id)
+                    record = {"type": kind, "data": project.dict()} if project else None
+                else:
+                    item = self._get_history_record(record_id)
+                    record = {"type": kind, "data": item} if item else None
+                if record:
+                    yield record
+                    count += 1
+        yield {"type": "end", "version": version, "records": count}
+    
+
+
+def create_data_manager(data_dir: str = "../data") -> DataManager:
+    """Create the DataManager for the configured storage backend.
+    
+    STORAGE_BACKEND selects "json" (default, plain files in data_dir) or
+    "sqlite" (a WAL-mode database in data_dir, migrated from the JSON files
+    on first use).
+    """
+    backend = os.getenv("STORAGE_BACKEND", "json").lower()
+    if backend == "sqlite":
+        from sqlite_store import SQLiteDataManager
+        return SQLiteDataManager(data_dir)
+    if backend != "json":
+        raise ValueError(f"Unknown STORAGE_BACKEND '{backend}', expected 'json' or 'sqlite'")
+    return DataManager(data_dir)
@@ -0,0 +1,171 @@
+import json
+import os
+import re
+import zlib
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+
+
+CHUNK_SIZE = 64 * 1024
+GZIP_MIN_BYTES = 1024  # Smaller bodies gain nothing from compression
+# Generated files never change under the same job ID, but clients should still revalidate
+CACHE_CONTROL = "private, no-cache"
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(ValueError):
+    """Raised for a byte range outside the file"""
+
+
+def validators(stat: os.stat_result, variant: str = "") -> Tuple[str, str]:
+    """(strong ETag, Last-Modified) for a file; variant tells apart other
+    representations of the same file, such as its JSON preview"""
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}{variant}"'
+    return etag, formatdate(stat.st_mtime, usegmt=True)
+
+
+def _weak(etag: str) -> str:
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def is_not_modified(request: Request, etag: str, stat: os.stat_result) -> bool:
+    """Conditional GET: If-None-Match (weak comparison) wins over If-Modified-Since"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = {_weak(tag.strip()) for tag in if_none_match.split(",")}
+        return "*" in tags or _weak(etag) in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(stat.st_mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def accepts_gzip(request: Request) -> bool:
+    for coding in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            quality = re.search(r'q=([\d.]+)', params)
+            return not quality or float(quality.group(1)) > 0
+    return False
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Inclusive (start, end) of a single "bytes=" range; None when the
+    header is not one (the whole file is sent instead)"""
+    match = RANGE.match(header.strip())
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if not first:  # bytes=-500: the last 500 bytes
+        start, end = max(0, size - int(last)), size - 1
+    else:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable(header)
+    return start, end
+
+
+def _read_range(path: Path, start: int, length: int) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def gzip_chunks(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def ndjson_chunks(records: Iterator[dict]) -> Iterator[bytes]:
+    """Encode records as NDJSON, batching lines into chunks of about CHUNK_SIZE"""
+    lines, size = [], 0
+    for record in records:
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        lines.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            yield b"".join(lines)
+            lines, size = [], 0
+    if lines:
+        yield b"".join(lines)
+
+
+def file_response(request: Request, path: Path, media_type: str, filename: Optional[str] = None,
+                  compress: bool = True, extra_headers: Optional[dict] = None) -> Response:
+    """Serve a file straight from disk with validators, 304s, a single
+    byte Range and gzip (unless compress is False, e.g. for PDFs).
+
+    Ranges apply to the identity encoding only; a compressed response
+    carries a weak ETag, since its bytes differ from the file's.
+    """
+    stat = os.stat(path)
+    etag, last_modified = validators(stat)
+    headers = {
+        **(extra_headers or {}),
+        "ETag": etag,
+        "Last-Modified": last_modified,
+        "Cache-Control": CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+        "Vary": "Accept-Encoding",
+    }
+    if is_not_modified(request, etag, stat):
+        return Response(status_code=304, headers=headers)
+    if filename:
+        headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range in (etag, last_modified)):
+        try:
+            byte_range = parse_range(range_header, stat.st_size)
+        except RangeNotSatisfiable:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{stat.st_size}"})
+        if byte_range:
+            start, end = byte_range
+            headers.update({"Content-Range": f"bytes {start}-{end}/{stat.st_size}",
+                            "Content-Length": str(end - start + 1)})
+            return StreamingResponse(_read_range(path, start, end - start + 1), status_code=206,
+                                     media_type=media_type, headers=headers)
+
+    if compress and stat.st_size >= GZIP_MIN_BYTES and accepts_gzip(request):
+        headers.update({"ETag": f"W/{etag}", "Content-Encoding": "gzip"})
+        return StreamingResponse(gzip_chunks(_read_range(path, 0, stat.st_size)),
+                                 media_type=media_type, headers=headers)
+
+    return FileResponse(path, media_type=media_type, headers=headers, stat_result=stat)
+
+
+def json_file_response(request: Request, path: Path, payload) -> Response:
+    """JSON built from a file (e.g. a preview of it) under the file's own
+    validators, so unchanged files revalidate with a 304. payload is
+    called with the file's text only when a body is sent."""
+    stat = os.stat(path)
+    etag, last_modified = validators(stat, "-json")
+    headers = {"ETag": etag, "Last-Modified": last_modified, "Cache-Control": CACHE_CONTROL,
+               "Vary": "Accept-Encoding"}
+    if is_not_modified(request, etag, stat):
+        return Response(status_code=304, headers=headers)
+
+    response = JSONResponse(content=payload(Path(path).read_text(encoding="utf-8")), headers=headers)
+    if len(response.body) >= GZIP_MIN_BYTES and accepts_gzip(request):
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        body = compressor.compress(response.body) + compressor.flush()
+        headers.update({"ETag": f"W/{etag}", "Content-Encoding": "gzip"})
+        response = Response(content=body, media_type="application/json", headers=headers)
+    return response
@@ -0,0 +1,166 @@
+import asyncio
+import functools
+import inspect
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from google import genai
+from google.genai import errors
+
+try:
+    from google.genai._api_client import ApiClient, HttpRequest, HttpResponse, RequestJsonEncoder
+except ImportError:  # Private SDK module: other google-genai releases may not have it
+    ApiClient = HttpRequest = HttpResponse = RequestJsonEncoder = None
+
+logger = logging.getLogger(__name__)
+
+
+class PooledApiClient(ApiClient or object):
+    """genai ApiClient that reuses one keep-alive HTTP session.
+
+    The stock client opens a new requests.Session (and TLS connection) for
+    every call and runs async calls on the event loop's default executor.
+    This one shares a pooled session with timeouts and a dedicated executor.
+
+    It overrides private ApiClient methods, so it is only used when
+    pooling_supported() finds them as written against google-genai 0.2.2.
+    """
+
+    def __init__(self, session: requests.Session, executor: ThreadPoolExecutor, timeout: tuple, **kwargs):
+        super().__init__(**kwargs)
+        self._session = session
+        self._executor = executor
+        self._timeout = timeout
+
+    def _request_unauthorized(self, http_request: HttpRequest, stream: bool = False) -> HttpResponse:
+        data = None
+        if http_request.data:
+            if not isinstance(http_request.data, bytes):
+                data = json.dumps(http_request.data, cls=RequestJsonEncoder)
+            else:
+                data = http_request.data
+
+        response = self._session.request(
+            method=http_request.method,
+            url=http_request.url,
+            headers=http_request.headers,
+            data=data,
+            stream=stream,
+            timeout=self._timeout,
+        )
+        errors.APIError.raise_for_response(response)
+        return HttpResponse(response.headers, response if stream else [response.text])
+
+    async def _async_request(self, http_request: HttpRequest, stream: bool = False):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(self._request, http_request, stream=stream)
+        )
+
+
+class PooledClient(genai.Client):
+    """genai.Client whose requests go through a PooledApiClient"""
+
+    def __init__(self, session: requests.Session, executor: ThreadPoolExecutor, timeout: tuple, **kwargs):
+        self._pool_args = {"session": session, "executor": executor, "timeout": timeout}
+        super().__init__(**kwargs)
+
+    def _get_api_client(self, debug_config=None, **kwargs):
+        return PooledApiClient(**self._pool_args, **kwargs)
+
+
+def _parameters(function) -> list:
+    try:
+        return list(inspect.signature(function).parameters)
+    except (TypeError, ValueError):
+        return []
+
+
+def pooling_supported() -> bool:
+    """Whether the installed SDK has the private hooks PooledClient overrides,
+    with the signatures it expects"""
+    if ApiClient is None:
+        return False
+    for name in ("_request", "_request_unauthorized", "_async_request"):
+        if _parameters(getattr(ApiClient, name, None))[:3] != ["self", "http_request", "stream"]:
+            return False
+    if _parameters(HttpResponse.__init__) != ["self", "headers", "response_stream"]:
+        return False
+    get_api_client = _parameters(getattr(genai.Client, "_get_api_client", None))
+    return {"api_key", "http_options", "debug_config"} <= set(get_api_client)
+
+
+def _read_config() -> tuple:
+    """Client settings from the environment; a change triggers a new client"""
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        raise ValueError("GEMINI_API_KEY not found in environment variables")
+    return (
+        api_key,
+        os.getenv("GEMINI_BASE_URL") or None,
+        int(os.getenv("GEMINI_POOL_SIZE", "16")),
+        float(os.getenv("GEMINI_CONNECT_TIMEOUT_SECONDS", "10")),
+        float(os.getenv("GEMINI_TIMEOUT_SECONDS", "120")),
+    )
+
+
+_client: Optional[genai.Client] = None
+_client_config: Optional[tuple] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> genai.Client:
+    """Get the process-wide Gemini client, creating it on first use.
+
+    The client is rebuilt when GEMINI_API_KEY, GEMINI_BASE_URL or the pool
+    and timeout settings change. When the SDK's private hooks differ from
+    what PooledClient expects, this is a stock genai.Client instead (no
+    shared session, pool size or timeouts).
+    """
+    global _client, _client_config
+    config = _read_config()
+    if _client is not None and _client_config == config:
+        return _client
+
+    with _client_lock:
+        if _client is not None and _client_config == config:
+            return _client
+
+        api_key, base_url, pool_size, connect_timeout, read_timeout = config
+        http_options = {"base_url": base_url} if base_url else None
+        if not pooling_supported():
+            logger.warning("google-genai %s lacks the hooks PooledClient overrides; using the stock client",
+                           getattr(genai, "__version__", "?"))
+            _client, _client_config = genai.Client(api_key=api_key, http_options=http_options), config
+            return _client
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="gemini")
+
+        client = PooledClient(
+            session=session,
+            executor=executor,
+            timeout=(connect_timeout, read_timeout),
+            api_key=api_key,
+            http_options=http_options,
+        )
+        # A replaced client is not closed: calls already running on it finish,
+        # and its connections and threads go away with the last reference
+        _client, _client_config = client, config
+        return client
+
+
+def reset_client():
+    """Drop the shared client; the next get_client() builds a fresh one"""
+    global _client, _client_config
+    with _client_lock:
+        _client, _client_config = None, None
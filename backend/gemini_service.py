@@ -1,17 +1,47 @@
+import asyncio
+import logging
 import os
-from google import genai
+import re
+import threading
+import weakref
 import json
 import hashlib
 
+from cv_edits import apply_edits, encode_sections, get_generation_mode, parse_edits, split_cv_sections
+from gemini_client import get_client
+from latex_parser import parse_latex_cv
+import metrics
+from model_routing import get_model_route, routed_call, routed_call_sync
+from resilience import get_resilient_caller
+from prompt_encoding import (
+    get_prompt_encoding, encode_projects, compact_baseline_cv, compact_text, restore_preamble, estimate_tokens,
+    split_preamble, wrap_body, BEGIN_DOCUMENT
+)
+from response_cache import content_hash
+from title_matcher import TitleMatcher, get_title_matcher
+
 
 PROMPT_FILE = os.path.join(os.path.dirname(__file__), "prompts", "cv_generation_prompt.txt")
 with open(PROMPT_FILE, 'r', encoding='utf-8') as f:
     PROMPT_TEMPLATE = f.read()
 
+EDIT_PROMPT_FILE = os.path.join(os.path.dirname(__file__), "prompts", "cv_edit_prompt.txt")
+with open(EDIT_PROMPT_FILE, 'r', encoding='utf-8') as f:
+    EDIT_PROMPT_TEMPLATE = f.read()
+
 EXTRACTION_PROMPT_FILE = os.path.join(os.path.dirname(__file__), "prompts", "cv_extraction_prompt.txt")
 with open(EXTRACTION_PROMPT_FILE, 'r', encoding='utf-8') as f:
     EXTRACTION_PROMPT_TEMPLATE = f.read()
 
+logger = logging.getLogger(__name__)
+
+# One semaphore per event loop caps concurrent async model calls
+_model_semaphores = weakref.WeakKeyDictionary()
+
+TRAILING_FENCE_PATTERN = re.compile(r'[\s`]*\Z')
+SECTION_PATTERN = re.compile(r'^[ \t]*\\section\*?\{', re.MULTILINE)
+EXTRACTED_LIST_KEYS = ["skills", "projects", "experience", "education", "certifications"]
+
 
 def generate_stable_id(title):
     """Generate consistent ID from title for deduplication"""
@@ -19,110 +49,179 @@ def generate_stable_id(title):
     return hashlib.md5(normalized.encode()).hexdigest()[:8]
 
 
-def generate_cv(baseline_cv, projects, job_description, company="", position="", max_items=5, custom_instructions=""):
-    """
-    Generate a tailored CV using Gemini AI.
-    
-    Args:
-        baseline_cv: Your LaTeX CV template
-        projects: List of your projects/experiences
-        job_description: The job description text
-        company: Company name (optional)
-        position: Position title (optional)
-        max_items: How many projects to include (default 5)
-        custom_instructions: Additional specific instructions (optional)
-    
-    Returns:
-        A dictionary with the tailored CV and selected project IDs
-    """
-    
-    # Get API key from environment
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
-        raise ValueError("GEMINI_API_KEY not found in environment variables")
-    
-    # Get model name from environment (with default fallback)
-    model_name = os.getenv("GEMINI_MODEL", "gemini-3-flash-preview")
-    
-    # Connect to Gemini
-    client = genai.Client(api_key=api_key)
-    
-    # Convert projects to JSON format
-    projects_json = json.dumps(
-        [p.dict() for p in projects], 
-        indent=2, 
-        ensure_ascii=False
+def get_timeout():
+    """Per-call timeout for model requests in seconds (GEMINI_TIMEOUT_SECONDS)"""
+    return float(os.getenv("GEMINI_TIMEOUT_SECONDS", "120"))
+
+
+def _model_semaphore():
+    """Semaphore limiting in-flight model calls (GEMINI_MAX_CONCURRENCY)"""
+    loop = asyncio.get_running_loop()
+    semaphore = _model_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(int(os.getenv("GEMINI_MAX_CONCURRENCY", "8")))
+        _model_semaphores[loop] = semaphore
+    return semaphore
+
+
+async def _generate_content_async(client, model_name, prompt):
+    """Call the model without blocking the event loop, bounded and timed out,
+    with rate limiting, retries and the circuit breaker applied"""
+    async def attempt():
+        async with _model_semaphore():
+            return await asyncio.wait_for(
+                client.aio.models.generate_content(model=model_name, contents=prompt),
+                timeout=get_timeout()
+            )
+
+    return await get_resilient_caller(model_name).call(attempt)
+
+
+def _generate_content(client, model_name, prompt):
+    """Blocking model call with rate limiting, retries and the circuit breaker"""
+    return get_resilient_caller(model_name).call_sync(
+        lambda: client.models.generate_content(model=model_name, contents=prompt)
     )
-    
+
+
+def _strip_code_fences(text, language):
+    """Remove a surrounding markdown code block from a model response"""
+    text = text.strip()
+    if text.startswith(f"```{language}"):
+        text = text[3 + len(language):]
+    elif text.startswith("```"):
+        text = text[3:]
+    if text.endswith("```"):
+        text = text[:-3]
+    return text.strip()
+
+
+def build_generation_prompt(baseline_cv, projects, job_description, company="", position="", max_items=5,
+                            custom_instructions="", encoding="json"):
+    """Build the full CV generation prompt.
+
+    With encoding="compact", projects become short text records and the
+    baseline CV loses its comments, indentation and preamble (see
+    prompt_encoding); _finish_generation puts the preamble back.
+    """
+    if encoding == "compact":
+        baseline_cv = compact_baseline_cv(baseline_cv)
+        job_description = compact_text(job_description)
+
     # Build the full prompt
     company_text = f" at {company}" if company else ""
     position_text = f" for the {position} position" if position else ""
-    
+
     prompt = PROMPT_TEMPLATE.format(
         max_items=max_items,
         baseline_cv=baseline_cv,
-        projects_json=projects_json,
+        projects_block=encode_projects(projects, encoding),
         company_info=company_text,
         position_info=position_text,
         job_description_text=job_description
     )
-    
+
     # Append custom instructions if provided
     if custom_instructions and custom_instructions.strip():
         prompt += f"\n\nADDITIONAL SPECIFIC INSTRUCTIONS FROM USER:\n{custom_instructions.strip()}\n\nPlease follow these additional instructions carefully while still maintaining ATS-friendliness and the guidelines above."
-    
-    # Call Gemini API
-    response = client.models.generate_content(
-        model=model_name,
-        contents=prompt
+
+    return prompt
+
+
+def build_edit_prompt(baseline_cv, projects, job_description, company="", position="", max_items=5,
+                      custom_instructions="", encoding="json"):
+    """Build the prompt for GENERATION_MODE=edits: the baseline's sections
+    with their ids, and the projects with theirs"""
+    if encoding == "compact":
+        job_description = compact_text(job_description)
+    company_text = f" at {company}" if company else ""
+    position_text = f" for the {position} position" if position else ""
+
+    prompt = EDIT_PROMPT_TEMPLATE.format(
+        max_items=max_items,
+        sections=encode_sections(split_cv_sections(baseline_cv), compact=encoding == "compact"),
+        projects_block=encode_projects(projects, encoding, with_ids=True),
+        company_info=company_text,
+        position_info=position_text,
+        job_description_text=job_description
     )
-    
-    # Clean up the response (remove markdown code blocks)
-    latex_cv = response.text.strip()
-    if latex_cv.startswith("```latex"):
-        latex_cv = latex_cv[8:]
-    elif latex_cv.startswith("```"):
-        latex_cv = latex_cv[3:]
-    if latex_cv.endswith("```"):
-        latex_cv = latex_cv[:-3]
-    latex_cv = latex_cv.strip()
-    
-    # Figure out which projects were used
-    selected_project_ids = []
-    for project in projects:
-        if project.title.lower() in latex_cv.lower():
-            selected_project_ids.append(project.id)
-    
+
+    if custom_instructions and custom_instructions.strip():
+        prompt += f"\n\nADDITIONAL SPECIFIC INSTRUCTIONS FROM USER:\n{custom_instructions.strip()}\n\nPlease follow these additional instructions carefully while still maintaining ATS-friendliness and the guidelines above."
+
+    return prompt
+
+
+def _build_prompt(mode, *args):
+    return (build_edit_prompt if mode == "edits" else build_generation_prompt)(*args)
+
+
+def token_usage(usage, prompt, output_text, encoding):
+    """Token report for one model call.
+
+    Uses the counts from the API's usage metadata, falling back to a local
+    estimate (about 4 characters per token) when there are none.
+    """
+    prompt_tokens = getattr(usage, "prompt_token_count", None)
+    output_tokens = getattr(usage, "candidates_token_count", None)
+    return {
+        "encoding": encoding,
+        "prompt_chars": len(prompt),
+        "prompt_tokens": prompt_tokens or estimate_tokens(prompt),
+        "output_tokens": output_tokens or estimate_tokens(output_text),
+        "estimated": not prompt_tokens,
+    }
+
+
+def _finish_generation(response_text, projects, baseline_cv="", encoding="json"):
+    """Clean the generated LaTeX and figure out which projects were used,
+    by where their titles appear in it"""
+    latex_cv = _strip_code_fences(response_text, "latex")
+    if encoding == "compact":
+        latex_cv = restore_preamble(latex_cv, baseline_cv)
+
+    matches = get_title_matcher([(project.id, project.title) for project in projects]).find(latex_cv)
     return {
         "tailored_cv": latex_cv,
-        "selected_item_ids": selected_project_ids
+        "selected_item_ids": TitleMatcher.selected_ids(matches),
+        "item_matches": [match.to_dict() for match in matches]
     }
 
 
-def extract_cv_data(latex_cv):
-    """Extract structured data from LaTeX CV using AI"""
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
-        raise ValueError("GEMINI_API_KEY not found in environment variables")
-    
-    model_name = os.getenv("GEMINI_MODEL", "gemini-2.0-flash-exp")
-    client = genai.Client(api_key=api_key)
-    
-    prompt = EXTRACTION_PROMPT_TEMPLATE.format(latex_cv=latex_cv)
-    response = client.models.generate_content(model=model_name, contents=prompt)
-    
-    # Clean markdown code blocks
-    response_text = response.text.strip()
-    if response_text.startswith("```json"):
-        response_text = response_text[7:]
-    elif response_text.startswith("```"):
-        response_text = response_text[3:]
-    if response_text.endswith("```"):
-        response_text = response_text[:-3]
-    
-    extracted_data = json.loads(response_text.strip())
-    
-    # Add stable IDs and category fields
+def _finish_edits(response_text, projects, baseline_cv):
+    """Apply the model's section edits to the baseline.
+
+    selected_item_ids are exactly the database items the applied edits
+    name as their source. Edits that fail validation are dropped (their
+    sections keep the baseline text) and reported in rejected_edits.
+    """
+    edits = parse_edits(_strip_code_fences(response_text or "", "latex"))
+    latex_cv, selected, rejected = apply_edits(baseline_cv, edits, [p.id for p in projects])
+    for edit in rejected:
+        logger.info("Rejected edit to section %r: %s", edit["section"], edit["reason"])
+    chosen = set(selected)
+    matcher = get_title_matcher([(project.id, project.title) for project in projects if project.id in chosen])
+    return {
+        "tailored_cv": latex_cv,
+        "selected_item_ids": selected,
+        "item_matches": [match.to_dict() for match in matcher.find(latex_cv)],
+        "rejected_edits": rejected
+    }
+
+
+def _finish(mode, response_text, projects, baseline_cv, encoding):
+    if mode == "edits":
+        return _finish_edits(response_text, projects, baseline_cv)
+    return _finish_generation(response_text, projects, baseline_cv, encoding)
+
+
+def _finish_extraction(response_text):
+    """Parse extracted JSON and add stable IDs and category fields"""
+    return _add_item_ids(json.loads(_strip_code_fences(response_text, "json")))
+
+
+def _add_item_ids(extracted_data):
+    """Add stable IDs and category fields to extracted items"""
     category_map = {"projects": "project", "experience": "experience", "education": "education", "certifications": "certification"}
     for category, cat_value in category_map.items():
         if category in extracted_data:
@@ -130,5 +229,494 @@ def extract_cv_data(latex_cv):
                 if "title" in item:
                     item["id"] = generate_stable_id(item["title"])
                 item["category"] = cat_value
-    
+
     return extracted_data
+
+
+def generate_cv(baseline_cv, projects, job_description, company="", position="", max_items=5, custom_instructions=""):
+    """
+    Generate a tailored CV using Gemini AI.
+
+    Args:
+        baseline_cv: Your LaTeX CV template
+        projects: List of your projects/experiences
+        job_description: The job description text
+        company: Company name (optional)
+        position: Position title (optional)
+        max_items: How many projects to include (default 5)
+        custom_instructions: Additional specific instructions (optional)
+
+    Returns:
+        A dictionary with the tailored CV, selected project IDs (with where
+        their titles appear) and the model used
+    """
+    client = get_client()
+    encoding = get_prompt_encoding()
+    mode = get_generation_mode()
+
+    with metrics.stage("generate", "prompt_build"):
+        prompt = _build_prompt(mode, baseline_cv, projects, job_description, company, position, max_items,
+                               custom_instructions, encoding)
+    with metrics.model_call("generate"):
+        response, model_name = routed_call_sync(
+            get_model_route("generation"), lambda model: _generate_content(client, model, prompt)
+        )
+
+    with metrics.stage("generate", "post_process"):
+        finished = _finish(mode, response.text, projects, baseline_cv, encoding)
+    usage = token_usage(response.usage_metadata, prompt, response.text or "", encoding)
+    metrics.record_model_io("generate", prompt, response.text, usage)
+    return {**finished, "token_usage": usage, "model": model_name}
+
+
+def generation_cache_key(model_name, baseline_cv, projects, job_description, company, position, max_items,
+                         custom_instructions, encoding="json", mode="full"):
+    """Hash of everything that determines a generated CV"""
+    template = EDIT_PROMPT_TEMPLATE if mode == "edits" else PROMPT_TEMPLATE
+    return content_hash(
+        template, model_name, baseline_cv, [p.dict() for p in projects],
+        job_description, company, position, max_items, custom_instructions, encoding, mode
+    )
+
+
+async def generate_cv_async(baseline_cv, projects, job_description, company="", position="", max_items=5,
+                            custom_instructions="", cache=None, bypass_cache=False):
+    """Async version of generate_cv for use from async request handlers.
+
+    With a ResponseCache, identical requests are answered from the cache and
+    the result carries "cached": True. bypass_cache forces a fresh model call
+    whose result then replaces the cached one.
+
+    The result includes a "token_usage" report for the model call (for a
+    cached result, the call that produced it) and the "model" that answered,
+    which is the generation route's fallback when the primary failed or was
+    slower than its latency budget. With GENERATION_MODE=edits the model
+    only returns edits to the baseline's sections, which are applied
+    locally; the result then also lists any "rejected_edits".
+
+    Raises asyncio.TimeoutError if the model does not answer within
+    GEMINI_TIMEOUT_SECONDS.
+    """
+    route = get_model_route("generation")
+    encoding = get_prompt_encoding()
+    mode = get_generation_mode()
+
+    cache_key = None
+    if cache is not None and cache.enabled:
+        with metrics.stage("generate", "cache_lookup"):
+            cache_key = generation_cache_key(route.primary, baseline_cv, projects, job_description, company,
+                                             position, max_items, custom_instructions, encoding, mode)
+            cached = None if bypass_cache else await asyncio.to_thread(cache.get, cache_key)
+        if cached is not None:
+            return {**cached, "cached": True}
+
+    client = get_client()
+    with metrics.stage("generate", "prompt_build"):
+        prompt = _build_prompt(mode, baseline_cv, projects, job_description, company, position, max_items,
+                               custom_instructions, encoding)
+    with metrics.model_call("generate"):
+        response, model_name = await routed_call(
+            route, lambda model: _generate_content_async(client, model, prompt)
+        )
+
+    with metrics.stage("generate", "post_process"):
+        finished = _finish(mode, response.text, projects, baseline_cv, encoding)
+    usage = token_usage(response.usage_metadata, prompt, response.text or "", encoding)
+    metrics.record_model_io("generate", prompt, response.text, usage)
+    result = {**finished, "token_usage": usage, "model": model_name}
+    if cache_key is not None:
+        with metrics.stage("generate", "cache_store"):
+            await asyncio.to_thread(cache.put, cache_key, result)
+    return {**result, "cached": False}
+
+
+class LatexStreamCleaner:
+    """Incremental version of the cleanup done by _finish_generation.
+
+    feed() takes raw response chunks and returns the text that is safe to
+    show so far: the opening code fence is dropped, a possible closing fence
+    is held back, and in compact encoding the original preamble replaces
+    whatever precedes \\begin{document}. Everything returned by feed() and
+    finish() joins up to the final tailored_cv.
+    """
+
+    OPENING_FENCE = "```latex"
+
+    def __init__(self, baseline_cv="", encoding="json"):
+        self._state = "head"  # head: opening fence undecided, lead: skipping whitespace, body
+        self._pending = ""
+        self._tail = ""  # trailing whitespace and backticks that may be the closing fence
+        self._preamble = split_preamble(baseline_cv)[0] if encoding == "compact" else ""
+        self._held = ""  # compact encoding: output held until \begin{document} appears
+        self._body_started = not self._preamble
+
+    def feed(self, chunk):
+        return self._restore_preamble(self._strip_fences(chunk))
+
+    def finish(self):
+        text = self._restore_preamble(self._finish_fences())
+        if not self._body_started:
+            # No \begin{document} at all: the output is the body, as in restore_preamble
+            text, self._held = wrap_body(self._preamble, self._held), ""
+        return text
+
+    def _strip_fences(self, chunk):
+        if self._state == "head":
+            self._pending += chunk
+            text = self._pending.lstrip()
+            if len(text) < len(self.OPENING_FENCE) and self.OPENING_FENCE.startswith(text):
+                return ""  # Could still turn into the opening fence
+            if text.startswith(self.OPENING_FENCE):
+                text = text[len(self.OPENING_FENCE):]
+            elif text.startswith("```"):
+                text = text[3:]
+            self._pending = ""
+            self._state = "lead"
+            chunk = text
+        if self._state == "lead":
+            chunk = chunk.lstrip()
+            if not chunk:
+                return ""
+            self._state = "body"
+
+        text = self._tail + chunk
+        tail_start = TRAILING_FENCE_PATTERN.search(text).start()
+        self._tail = text[tail_start:]
+        return text[:tail_start]
+
+    def _finish_fences(self):
+        if self._state == "head":
+            return _strip_code_fences(self._pending, "latex")
+        tail = self._tail.rstrip()
+        if tail.endswith("```"):
+            tail = tail[:-3]
+        return tail.rstrip()
+
+    def _restore_preamble(self, text):
+        if self._body_started:
+            return text
+        self._held += text
+        position = self._held.find(BEGIN_DOCUMENT)
+        if position < 0:
+            return ""
+        self._body_started = True
+        text, self._held = self._preamble + self._held[position:], ""
+        return text
+
+
+async def _stream_content_async(client, model_name, prompt):
+    """Iterate over streamed response chunks without blocking the event loop.
+
+    The blocking stream is read on its own thread. Leaving the loop early
+    (for example when the HTTP client disconnects) stops reading at the
+    next chunk. Raises asyncio.TimeoutError when no chunk arrives within
+    GEMINI_TIMEOUT_SECONDS.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    stopped = threading.Event()
+
+    def put(item):
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+        except RuntimeError:
+            stopped.set()  # Event loop already closed
+
+    def produce():
+        stream = client.models.generate_content_stream(model=model_name, contents=prompt)
+        try:
+            for chunk in stream:
+                if stopped.is_set():
+                    break
+                put(("chunk", chunk))
+        except Exception as e:
+            put(("error", e))
+        else:
+            put(("end", None))
+        finally:
+            stream.close()
+
+    threading.Thread(target=produce, name="gemini-stream", daemon=True).start()
+    try:
+        while True:
+            kind, value = await asyncio.wait_for(queue.get(), timeout=get_timeout())
+            if kind == "end":
+                return
+            if kind == "error":
+                raise value
+            yield value
+    finally:
+        stopped.set()
+
+
+async def _open_stream(client, route, prompt):
+    """Start a streamed model call and wait for its first chunk.
+
+    Failures before the first chunk go through the retry and circuit
+    breaker policy and the route's fallback, and the time to the first
+    chunk is what the route's latency budget applies to; once output has
+    been sent on, an error is final. Returns (async iterator over all
+    chunks, the first one included, model used).
+    """
+    def open_model(model_name):
+        async def attempt():
+            stream = _stream_content_async(client, model_name, prompt)
+            try:
+                first = await stream.__anext__()
+            except StopAsyncIteration:
+                first = None
+            except BaseException:
+                await stream.aclose()
+                raise
+            return first, stream
+
+        return get_resilient_caller(model_name).call(attempt)
+
+    async def close(opened):
+        await opened[1].aclose()
+
+    (first, stream), model_name = await routed_call(route, open_model, discard=close)
+
+    async def chunks():
+        if first is None:
+            return
+        try:
+            yield first
+            async for chunk in stream:
+                yield chunk
+        finally:
+            await stream.aclose()
+
+    return chunks(), model_name
+
+
+async def generate_cv_stream(baseline_cv, projects, job_description, company="", position="", max_items=5,
+                             custom_instructions="", cache=None, bypass_cache=False):
+    """Streaming version of generate_cv_async.
+
+    Async generator of (event, value) pairs: ("chunk", text) for each piece
+    of cleaned LaTeX as it arrives, then a single ("result", result) with
+    the same dict generate_cv_async returns. A cache hit yields the whole
+    document as one chunk. Closing the generator early cancels the call.
+
+    With GENERATION_MODE=edits the output is not LaTeX until the edits are
+    applied, so the finished document arrives as one chunk.
+    """
+    mode = get_generation_mode()
+    if mode == "edits":
+        result = await generate_cv_async(baseline_cv, projects, job_description, company, position, max_items,
+                                         custom_instructions, cache, bypass_cache)
+        yield "chunk", result["tailored_cv"]
+        yield "result", result
+        return
+
+    route = get_model_route("generation")
+    encoding = get_prompt_encoding()
+
+    cache_key = None
+    if cache is not None and cache.enabled:
+        with metrics.stage("generate", "cache_lookup"):
+            cache_key = generation_cache_key(route.primary, baseline_cv, projects, job_description, company,
+                                             position, max_items, custom_instructions, encoding, mode)
+            cached = None if bypass_cache else await asyncio.to_thread(cache.get, cache_key)
+        if cached is not None:
+            yield "chunk", cached["tailored_cv"]
+            yield "result", {**cached, "cached": True}
+            return
+
+    with metrics.stage("generate", "prompt_build"):
+        prompt = build_generation_prompt(baseline_cv, projects, job_description, company, position, max_items,
+                                         custom_instructions, encoding)
+    cleaner = LatexStreamCleaner(baseline_cv, encoding)
+    raw_chunks, usage = [], None
+    # The model_call stage here includes time the client takes to read the chunks
+    with metrics.model_call("generate"):
+        async with _model_semaphore():
+            stream, model_name = await _open_stream(get_client(), route, prompt)
+            async for response in stream:
+                text = response.text or ""
+                raw_chunks.append(text)
+                usage = response.usage_metadata or usage
+                cleaned = cleaner.feed(text)
+                if cleaned:
+                    yield "chunk", cleaned
+    remainder = cleaner.finish()
+    if remainder:
+        yield "chunk", remainder
+
+    response_text = "".join(raw_chunks)
+    with metrics.stage("generate", "post_process"):
+        finished = _finish_generation(response_text, projects, baseline_cv, encoding)
+    usage = token_usage(usage, prompt, response_text, encoding)
+    metrics.record_model_io("generate", prompt, response_text, usage)
+    result = {**finished, "token_usage": usage, "model": model_name}
+    if cache_key is not None:
+        with metrics.stage("generate", "cache_store"):
+            await asyncio.to_thread(cache.put, cache_key, result)
+    yield "result", {**result, "cached": False}
+
+
+def get_local_parser_min_confidence():
+    """Confidence the local LaTeX parser needs to skip the model (LOCAL_PARSER_MIN_CONFIDENCE)"""
+    return float(os.getenv("LOCAL_PARSER_MIN_CONFIDENCE", "0.75"))
+
+
+def parse_cv_locally(latex_cv):
+    """Extraction result from the local LaTeX parser, or None when the CV
+    does not follow conventions it recognises well enough"""
+    data, confidence = parse_latex_cv(latex_cv)
+    if confidence < get_local_parser_min_confidence():
+        return None
+    return {**_add_item_ids(data), "extraction": {"method": "local", "confidence": confidence}}
+
+
+def extract_cv_data(latex_cv):
+    """Extract structured data from LaTeX CV, locally when the parser is
+    confident and with AI otherwise"""
+    with metrics.stage("extract", "local_parse"):
+        local = parse_cv_locally(latex_cv)
+    if local is not None:
+        return local
+
+    client = get_client()
+
+    prompt = EXTRACTION_PROMPT_TEMPLATE.format(latex_cv=latex_cv)
+    with metrics.model_call("extract"):
+        response, _ = routed_call_sync(
+            get_model_route("extraction"), lambda model: _generate_content(client, model, prompt)
+        )
+    metrics.record_model_io("extract", prompt, response.text,
+                            token_usage(response.usage_metadata, prompt, response.text or "", "json"))
+
+    with metrics.stage("extract", "post_process"):
+        return _finish_extraction(response.text)
+
+
+def split_latex_sections(latex_cv):
+    """Split a LaTeX CV into the header (preamble and contact block) and one
+    chunk per \\section, keeping the original text of each"""
+    starts = [m.start() for m in SECTION_PATTERN.finditer(latex_cv)]
+    bounds = [0] + starts + [len(latex_cv)]
+    return [latex_cv[a:b] for a, b in zip(bounds, bounds[1:]) if latex_cv[a:b].strip()]
+
+
+def _plain_text(latex):
+    """Lowercased text of LaTeX with escapes, braces and spacing removed,
+    for finding extracted values in the source"""
+    text = re.sub(r'\\([&%$#_{}])', r'\1', latex)
+    return " ".join(re.sub(r'[{}]', '', text).lower().split())
+
+
+def _split_extraction(extracted, sections):
+    """Per-section results for a whole-CV extraction, to seed the section
+    cache: personal info goes to the first section and each item to the
+    first section whose text contains its title (or skill category). None
+    when some item is not found in any section"""
+    texts = [_plain_text(section) for section in sections]
+    parts = [{"personal_info": {}, **{key: [] for key in EXTRACTED_LIST_KEYS}} for _ in sections]
+    parts[0]["personal_info"] = extracted.get("personal_info") or {}
+    for key in EXTRACTED_LIST_KEYS:
+        for item in extracted.get(key) or []:
+            needle = _plain_text(str(item.get("title") or item.get("category") or ""))
+            index = next((i for i, text in enumerate(texts) if needle and needle in text), None)
+            if index is None:
+                return None
+            parts[index][key].append(item)
+    return parts
+
+
+def _merge_extractions(parts):
+    """Combine per-section extraction results in document order"""
+    merged = {"personal_info": {}, **{key: [] for key in EXTRACTED_LIST_KEYS}}
+    seen_ids = set()
+    for part in parts:
+        for field, value in (part.get("personal_info") or {}).items():
+            if value and not merged["personal_info"].get(field):
+                merged["personal_info"][field] = value
+        for key in EXTRACTED_LIST_KEYS:
+            for item in part.get(key) or []:
+                # The same entry may be picked up from two sections
+                if "id" in item:
+                    if item["id"] in seen_ids:
+                        continue
+                    seen_ids.add(item["id"])
+                merged[key].append(item)
+    return merged
+
+
+async def _extract_text_async(client, route, latex):
+    prompt = EXTRACTION_PROMPT_TEMPLATE.format(latex_cv=latex)
+    with metrics.model_call("extract"):
+        response, _ = await routed_call(route, lambda model: _generate_content_async(client, model, prompt))
+    metrics.record_model_io("extract", prompt, response.text,
+                            token_usage(response.usage_metadata, prompt, response.text or "", "json"))
+    with metrics.stage("extract", "post_process"):
+        return _finish_extraction(response.text)
+
+
+async def extract_cv_data_async(latex_cv, cache=None):
+    """Async version of extract_cv_data.
+
+    Well-formed CVs are parsed locally in milliseconds; the result then
+    carries "extraction": {"method": "local", "confidence": ...}. Only
+    when the parser is not confident enough is the model called.
+
+    With a ResponseCache, a byte-identical CV is answered without calling
+    the model. A CV none of whose sections was seen before is extracted in
+    one call, whose result also seeds the per-section entries; otherwise
+    only the sections whose text changed since a previous upload are sent
+    to the model (in parallel) and merged with the cached ones.
+    """
+    with metrics.stage("extract", "local_parse"):
+        local = await asyncio.to_thread(parse_cv_locally, latex_cv)
+    if local is not None:
+        return local
+
+    route = get_model_route("extraction")
+    if cache is None or not cache.enabled:
+        return await _extract_text_async(get_client(), route, latex_cv)
+
+    # Keyed by the primary model: a fallback answer stands in for it
+    with metrics.stage("extract", "cache_lookup"):
+        document_key = content_hash(EXTRACTION_PROMPT_TEMPLATE, route.primary, latex_cv)
+        cached = await asyncio.to_thread(cache.get, document_key)
+        if cached is None:
+            sections = split_latex_sections(latex_cv)
+            section_keys = [content_hash(EXTRACTION_PROMPT_TEMPLATE, route.primary, "section", text)
+                            for text in sections]
+            results = await asyncio.to_thread(lambda: [cache.get(key) for key in section_keys])
+    if cached is not None:
+        return cached
+
+    missing = [i for i, result in enumerate(results) if result is None]
+    if sections and len(missing) == len(sections):
+        # Cold upload: one call for the whole CV costs less than one per section
+        extracted = await _extract_text_async(get_client(), route, latex_cv)
+        with metrics.stage("extract", "split"):
+            parts = _split_extraction(extracted, sections)
+
+        def store_whole():
+            for key, part in zip(section_keys, parts or []):
+                cache.put(key, part)
+            cache.put(document_key, extracted)
+
+        await asyncio.to_thread(store_whole)
+        return extracted
+
+    if missing:
+        client = get_client()
+        extracted = await asyncio.gather(*(_extract_text_async(client, route, sections[i]) for i in missing))
+        for i, result in zip(missing, extracted):
+            results[i] = result
+
+    with metrics.stage("extract", "merge"):
+        merged = _merge_extractions(results)
+
+    def store():
+        for i in missing:
+            cache.put(section_keys[i], results[i])
+        cache.put(document_key, merged)
+
+    # Cache files are written with fsync, so off the event loop
+    await asyncio.to_thread(store)
+    return merged
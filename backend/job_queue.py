@@ -0,0 +1,220 @@
+import asyncio
+import json
+import os
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from persistence import atomic_write_json, get_file_lock
+
+
+class QueueFullError(Exception):
+    """Raised when the queue already holds its maximum number of jobs"""
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+class JobStore:
+    """Job records persisted as one JSON file per job.
+
+    Writes are atomic, and state changes happen under one lock shared with
+    other worker processes, so a job is claimed by exactly one worker.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = get_file_lock(self.directory / "queue")
+
+    def _path(self, job_id: str) -> Path:
+        return self.directory / f"{job_id}.json"
+
+    def get(self, job_id: str) -> Optional[dict]:
+        try:
+            with open(self._path(job_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def all(self) -> List[dict]:
+        """All jobs, oldest first"""
+        jobs = [self.get(path.stem) for path in self.directory.glob("*.json")]
+        return sorted((job for job in jobs if job), key=lambda job: job["created_at"])
+
+    def create(self, request: dict, user_id: Optional[str] = None) -> dict:
+        job = {
+            "job_id": str(uuid.uuid4())[:8],
+            "status": "queued",
+            "user_id": user_id,
+            "request": request,
+            "created_at": datetime.now().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "error": None,
+            "result": None,
+            "worker_pid": None,
+        }
+        atomic_write_json(self._path(job["job_id"]), job)
+        return job
+
+    def claim(self, job_id: str) -> Optional[dict]:
+        """Mark a queued job as running in this process; None if it is not queued"""
+        with self._lock:
+            job = self.get(job_id)
+            if job is None or job["status"] != "queued":
+                return None
+            job.update(status="running", started_at=datetime.now().isoformat(), worker_pid=os.getpid())
+            atomic_write_json(self._path(job_id), job)
+            return job
+
+    def release(self, job_id: str):
+        """Put a job this process was running back in the queued state"""
+        with self._lock:
+            job = self.get(job_id)
+            if job is not None and job["status"] == "running":
+                job.update(status="queued", started_at=None, worker_pid=None)
+                atomic_write_json(self._path(job_id), job)
+
+    def finish(self, job_id: str, result: Optional[dict] = None, error: Optional[str] = None) -> Optional[dict]:
+        with self._lock:
+            job = self.get(job_id)
+            if job is None:
+                return None
+            job.update(
+                status="failed" if error else "completed",
+                finished_at=datetime.now().isoformat(),
+                result=result,
+                error=error,
+            )
+            atomic_write_json(self._path(job_id), job)
+            return job
+
+    def recover(self) -> List[str]:
+        """Requeue jobs left running by a process that is gone; returns the
+        IDs of all queued jobs, oldest first"""
+        with self._lock:
+            queued = []
+            for job in self.all():
+                if job["status"] == "running" and not _pid_alive(job.get("worker_pid")):
+                    job.update(status="queued", started_at=None, worker_pid=None)
+                    atomic_write_json(self._path(job["job_id"]), job)
+                if job["status"] == "queued":
+                    queued.append(job["job_id"])
+            return queued
+
+    def prune(self, max_age_seconds: float):
+        """Delete finished jobs older than max_age_seconds"""
+        cutoff = time.time() - max_age_seconds
+        for path in self.directory.glob("*.json"):
+            job = self.get(path.stem)
+            if job and job["status"] in ("completed", "failed") and path.stat().st_mtime < cutoff:
+                path.unlink(missing_ok=True)
+
+
+class JobQueue:
+    """Bounded in-process queue that runs persisted jobs on a fixed number of
+    asyncio workers.
+
+    handler receives the job's request dict, job ID and user ID and returns
+    a result dict; an exception marks the job failed with its message. No
+    user may have more than max_per_user jobs waiting. Queued jobs
+    found on disk at start() (including ones interrupted by a restart) are
+    run again. Each worker process only runs the jobs submitted to it or
+    recovered when it started.
+    """
+
+    def __init__(self, store: JobStore, handler: Callable[[dict, str, Optional[str]], Awaitable[dict]],
+                 workers: int = 2, max_depth: int = 100, max_per_user: int = 0):
+        self.store = store
+        self.handler = handler
+        self.workers = workers
+        self.max_depth = max_depth
+        self.max_per_user = max_per_user
+        self._waiting: Dict[Optional[str], int] = {}  # Waiting jobs per user
+        self._job_users: Dict[str, Optional[str]] = {}  # Submitted job -> user, until it leaves the queue
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._reserved = 0  # Submissions being written to disk
+
+    @property
+    def depth(self) -> int:
+        """Jobs waiting for a worker"""
+        return (self._queue.qsize() if self._queue is not None else 0) + self._reserved
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        for job_id in await asyncio.to_thread(self.store.recover):
+            self._queue.put_nowait(job_id)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """Cancel the workers; interrupted jobs are picked up again on restart"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, request: dict, user_id: Optional[str] = None) -> dict:
+        """Persist a new job and queue it. Raises QueueFullError when
+        max_depth jobs, or max_per_user of this user's, are already waiting."""
+        if self._queue is None:
+            raise RuntimeError("Job queue is not running")
+        if self.depth >= self.max_depth:
+            raise QueueFullError(f"Job queue is full ({self.max_depth} jobs waiting)")
+        if self.max_per_user and self._waiting.get(user_id, 0) >= self.max_per_user:
+            raise QueueFullError(f"Too many queued jobs for this user ({self.max_per_user} waiting)")
+        self._reserved += 1
+        self._waiting[user_id] = self._waiting.get(user_id, 0) + 1
+        try:
+            job = await asyncio.to_thread(self.store.create, request, user_id)
+        except BaseException:
+            self._done_waiting(user_id)
+            raise
+        finally:
+            self._reserved -= 1
+        self._job_users[job["job_id"]] = user_id
+        self._queue.put_nowait(job["job_id"])
+        return job
+
+    def _done_waiting(self, user_id: Optional[str]):
+        count = self._waiting.get(user_id, 0) - 1
+        if count > 0:
+            self._waiting[user_id] = count
+        else:
+            self._waiting.pop(user_id, None)
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            if job_id in self._job_users:
+                self._done_waiting(self._job_users.pop(job_id))
+            try:
+                job = await asyncio.to_thread(self.store.claim, job_id)
+                if job is None:
+                    continue  # Taken by another worker process
+                try:
+                    result = await self.handler(job["request"], job_id, job.get("user_id"))
+                except asyncio.CancelledError:
+                    self.store.release(job_id)
+                    raise
+                except Exception as e:
+                    error = getattr(e, "detail", None) or str(e) or type(e).__name__
+                    await asyncio.to_thread(self.store.finish, job_id, error=error)
+                else:
+                    await asyncio.to_thread(self.store.finish, job_id, result=result)
+            finally:
+                self._queue.task_done()
@@ -0,0 +1,397 @@
+import re
+from typing import List, Optional, Tuple
+
+from prompt_encoding import split_preamble, strip_latex_comments
+
+
+# Section heading keywords, checked in order ("Project Experience" is projects)
+SECTION_KINDS = [
+    ("projects", ("project",)),
+    ("experience", ("experience", "employment", "work history", "career")),
+    ("education", ("education", "academic", "qualification")),
+    ("skills", ("skill", "technolog", "competenc")),
+    ("certifications", ("certif", "licen")),
+    ("summary", ("summary", "profile", "about", "objective")),
+]
+ENTRY_KINDS = ["experience", "projects", "education", "certifications"]
+
+SECTION_PATTERN = re.compile(r'\\(?:section|cvsection)\*?\s*\{')
+CONTROL_WORD = re.compile(r'\\([A-Za-z@]+)\*?[ \t]*|\\(.)', re.DOTALL)
+# Template macros whose arguments are (title/org/date/location) fields
+HEADING_MACROS = {"resumeSubheading": 4, "resumeSubSubheading": 2, "resumeProjectHeading": 2, "cventry": 6}
+ENTRY_TOKEN = re.compile(
+    r'\\(?P<macro>resumeSubheading|resumeSubSubheading|resumeProjectHeading|cventry)(?![A-Za-z])'
+    r'|(?m:^[ \t]*(?P<heading>\\textbf\{))'
+    r'|\\(?P<item>item|resumeItem)(?![A-Za-z])'
+)
+ITEM_END = re.compile(r'\\item(?![A-Za-z])|\\resumeItem(?![A-Za-z])|\\end\{|\\resumeItemListEnd|\\resumeSubHeadingListEnd')
+HEADING_END = re.compile(r'\\begin\{|\\item(?![A-Za-z])|\\resume|\n[ \t]*\n')
+SKILL_END = re.compile(r'\\\\|\\item(?![A-Za-z])|\\textbf\{|\\end\{|\n')
+
+# Commands dropped together with their arguments
+DROPPED_COMMANDS = {
+    "vspace": 1, "hspace": 1, "setlength": 2, "label": 1, "addtolength": 2, "phantom": 1,
+    "includegraphics": 1, "fontsize": 2, "color": 1, "raisebox": 1,
+}
+SPACING_COMMANDS = {"hfill", "quad", "qquad", "enspace", "hfil", "cdot", "bullet", "textbullet", "textbar"}
+
+MONTH = r'(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*\.?'
+DATE_WORD = re.compile(rf'{MONTH}|\b(?:19|20)\d{{2}}\b|\b(?:Present|Current|Now|Today|Ongoing)\b', re.IGNORECASE)
+DATE_FILLER = re.compile(r'[\s\-–—/,.()]|\bto\b|\bsince\b|\d{1,2}', re.IGNORECASE)
+# "City, ST" / "City, Country": a few capitalised words on each side of one comma
+LOCATION = re.compile(r"^(?:Remote|Hybrid|On-?site|[A-Z][\w.'’-]*(?: [A-Z][\w.'’-]*){0,3},\s*[A-Z][\w.'’-]*(?: [A-Z][\w.'’-]*){0,2})$")
+DEGREE = re.compile(r'\b(?:Bachelor|Master|B\.?S\.?c?|M\.?S\.?c?|B\.?A|M\.?A|B\.?Eng|M\.?Eng|Ph\.?D|MBA|Doctor|Diploma|Degree|Associate|Certificate)\b')
+TRAILING_DATE = re.compile(r'\s*[(\[]\s*([^()\[\]]*\d{4}[^()\[\]]*)\s*[)\]]\s*$')
+
+EMAIL = re.compile(r'[\w.+-]+@[\w-]+(?:\.[\w-]+)+')
+PHONE = re.compile(r'\+?\d[\d\s().-]{7,}\d')
+URL = re.compile(r'(?:https?://)?(?:www\.)?[\w-]+(?:\.[\w-]+)+(?:/[\w./%#?=&~-]*)?')
+
+
+def read_group(latex: str, start: int, open_char: str = "{", close_char: str = "}") -> Tuple[Optional[str], int]:
+    """Read a balanced group starting at latex[start] (after optional
+    whitespace); returns (content, index after it) or (None, start)"""
+    i = start
+    while i < len(latex) and latex[i] in " \t\n":
+        i += 1
+    if i >= len(latex) or latex[i] != open_char:
+        return None, start
+    depth = 0
+    j = i
+    while j < len(latex):
+        char = latex[j]
+        if char == "\\":
+            j += 2
+            continue
+        if char == open_char:
+            depth += 1
+        elif char == close_char:
+            depth -= 1
+            if depth == 0:
+                return latex[i + 1:j], j + 1
+        j += 1
+    return latex[i + 1:], len(latex)
+
+
+def read_groups(latex: str, start: int, count: int) -> Tuple[List[str], int]:
+    """Read up to count {...} arguments, skipping [optional] ones"""
+    groups = []
+    position = start
+    while len(groups) < count:
+        _, after_optional = read_group(latex, position, "[", "]")
+        group, end = read_group(latex, after_optional)
+        if group is None:
+            break
+        groups.append(group)
+        position = end
+    return groups, position
+
+
+def latex_to_text(latex: str) -> str:
+    """Plain text of a LaTeX fragment: formatting commands dropped, their
+    arguments kept, \\href reduced to its text and escapes resolved"""
+    out = []
+    i = 0
+    while i < len(latex):
+        char = latex[i]
+        if char == "\\":
+            match = CONTROL_WORD.match(latex, i)
+            name, symbol = match.group(1), match.group(2)
+            i = match.end()
+            if name:
+                if name in ("begin", "end"):
+                    _, i = read_group(latex, i)
+                    _, i = read_group(latex, i, "[", "]")  # \begin{itemize}[leftmargin=*]
+                    out.append("\n")
+                elif name in DROPPED_COMMANDS:
+                    _, i = read_groups(latex, i, DROPPED_COMMANDS[name])
+                elif name == "href":
+                    groups, i = read_groups(latex, i, 2)
+                    out.append(latex_to_text(groups[-1]) if groups else "")
+                elif name in SPACING_COMMANDS:
+                    out.append(" | " if name in ("textbar", "cdot", "bullet", "textbullet") else " ")
+                elif name in ("newline", "linebreak", "par"):
+                    out.append("\n")
+                elif name == "item":
+                    out.append(" ")
+                elif name == "LaTeX":
+                    out.append("LaTeX")
+                elif name == "TeX":
+                    out.append("TeX")
+                elif match.group(0).endswith((" ", "\t")):
+                    out.append("" if i < len(latex) and latex[i] in "{\\" else " ")
+            elif symbol == "\\":
+                out.append("\n")
+                _, i = read_group(latex, i, "[", "]")
+            elif symbol in "&%$#_{}":
+                out.append(symbol)
+            elif symbol in ", ;:":
+                out.append(" ")
+        elif char in "{}$":
+            i += 1
+        elif char == "~":
+            out.append(" ")
+            i += 1
+        else:
+            out.append(char)
+            i += 1
+    text = "".join(out).replace("---", "—").replace("--", "–").replace("``", '"').replace("''", '"')
+    lines = (" ".join(line.split()) for line in text.split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+def _one_line(text: str) -> str:
+    return " ".join(text.split())
+
+
+def is_date(text: str) -> bool:
+    """Whether a field is a date or date range (\"Jan 2022 – Present\")"""
+    return bool(DATE_WORD.search(text)) and not DATE_FILLER.sub("", DATE_WORD.sub("", text))
+
+
+def classify_section(title: str) -> Optional[str]:
+    lowered = title.lower()
+    for kind, keywords in SECTION_KINDS:
+        if any(keyword in lowered for keyword in keywords):
+            return kind
+    return None
+
+
+def split_sections(body: str) -> Tuple[str, List[Tuple[str, str]]]:
+    """Split a document body into (header, [(section title, content)])"""
+    matches = list(SECTION_PATTERN.finditer(body))
+    if not matches:
+        return body, []
+    sections = []
+    for match, following in zip(matches, matches[1:] + [None]):
+        title, content_start = read_group(body, match.end() - 1)
+        end = following.start() if following else len(body)
+        sections.append((latex_to_text(title or ""), body[content_start:end]))
+    return body[:matches[0].start()], sections
+
+
+def parse_personal_info(header: str) -> dict:
+    """Name, headline and contact details from the block above the first section"""
+    info = {"name": "", "title": "", "email": "", "phone": "", "location": "", "github": "", "linkedin": "", "website": ""}
+    raw_urls = re.findall(r'\\href\s*\{([^}]*)\}', header)
+    text = latex_to_text(header)
+    text_urls = URL.findall(EMAIL.sub(" ", text))
+
+    email = EMAIL.search(header)
+    if email:
+        info["email"] = email.group(0)
+    phone = PHONE.search(text)
+    if phone:
+        info["phone"] = phone.group(0).strip()
+
+    for url in raw_urls + text_urls:
+        if url.startswith("mailto:") or "@" in url:
+            continue
+        url = url.rstrip("/")
+        if "github.com" in url:
+            info["github"] = info["github"] or url
+        elif "linkedin.com" in url:
+            info["linkedin"] = info["linkedin"] or url
+        elif "." in url and not info["website"] and not DATE_WORD.fullmatch(url):
+            info["website"] = url
+
+    plain_lines = []
+    for line in text.split("\n"):
+        parts = [part.strip() for part in re.split(r'\s[|•·]\s|\s{2,}', line) if part.strip()]
+        for part in parts:
+            if LOCATION.match(part) and not info["location"] and not is_date(part):
+                info["location"] = part
+        if not EMAIL.search(line) and not PHONE.search(line) and not URL.search(line.replace(". ", " ")):
+            plain_lines.append(line)
+    if plain_lines:
+        info["name"] = plain_lines[0]
+    if len(plain_lines) > 1 and plain_lines[1] != info["location"] and len(plain_lines[1]) <= 80:
+        info["title"] = plain_lines[1]
+    return info
+
+
+def parse_skills(content: str) -> List[dict]:
+    """Skill categories from "\\textbf{Category:} a, b, c" lines"""
+    skills = []
+    for match in re.finditer(r'\\textbf\s*\{', content):
+        category, end = read_group(content, match.end() - 1)
+        rest = content[end:]
+        stop = SKILL_END.search(rest)
+        # Jake's template puts the list in its own group: \textbf{Languages}{: Java, Python}
+        value = rest[:stop.start()] if stop and not rest.lstrip().startswith("{") else read_group(rest, 0)[0] or ""
+        name = latex_to_text(category or "").strip().rstrip(":").strip()
+        items = [_one_line(item).strip(" .") for item in re.split(r'[,;]', latex_to_text(value).lstrip(": "))]
+        items = [item for item in items if item]
+        if name and items:
+            skills.append({"category": name, "items": items})
+    if not skills:
+        items = [_one_line(item).strip(" .") for item in re.split(r'[,;\n]', latex_to_text(content))]
+        items = [item for item in items if item]
+        if items:
+            skills.append({"category": "Skills", "items": items})
+    return skills
+
+
+def _heading_fields(kind: str, fields: List[str]) -> dict:
+    """Map heading fields (in template order) to entry keys"""
+    entry = {"title": "", "date_range": "", "technologies": [], "bullets": [], "description": ""}
+    fields = [field for field in (_one_line(f) for f in fields) if field]
+    dates = [field for field in fields if is_date(field)]
+    if dates:
+        entry["date_range"] = dates[0]
+    rest = [field for field in fields if field not in dates]
+    locations = [field for field in rest if LOCATION.match(field)]
+    rest = [field for field in rest if field not in locations]
+
+    if rest and "|" in rest[0]:
+        # "\textbf{Name} $|$ \emph{Python, Flask}" project headings
+        title, _, technologies = rest[0].partition("|")
+        rest[0] = title.strip()
+        entry["technologies"] = [t.strip() for t in re.split(r'[,;]', technologies) if t.strip()]
+
+    if kind == "education":
+        degrees = [field for field in rest if DEGREE.search(field)]
+        title = degrees[0] if degrees else (rest[0] if rest else "")
+        others = [field for field in rest if field != title]
+        entry["title"] = title
+        entry["institution"] = others[0] if others else ""
+        details = others[1:]
+    else:
+        entry["title"] = rest[0] if rest else ""
+        others = rest[1:]
+        if kind == "experience":
+            entry["company"] = others[0] if others else ""
+        details = others
+
+    if kind == "certifications" and not entry["date_range"]:
+        trailing = TRAILING_DATE.search(entry["title"])
+        if trailing:
+            entry["date_range"] = trailing.group(1).strip()
+            entry["title"] = entry["title"][:trailing.start()].strip()
+    entry["description"] = ", ".join(details + locations)
+    return entry
+
+
+def _text_fields(fragment: str) -> List[str]:
+    """Fields of a free-form heading, split at line breaks and \\hfill"""
+    fragment = re.sub(r'\\hfill|\\\\|\\newline|\s&\s', "\n", fragment)
+    return [field for field in latex_to_text(fragment).split("\n") if field.strip()]
+
+
+def parse_entries(kind: str, content: str) -> List[dict]:
+    """Entries of an experience, projects, education or certifications
+    section: template heading macros or bold heading lines, each followed by
+    its \\item / \\resumeItem bullets. Items without a heading become
+    entries of their own."""
+    entries = []
+    current = None
+    position = 0
+    while True:
+        match = ENTRY_TOKEN.search(content, position)
+        if match is None:
+            break
+        if match.group("macro"):
+            macro = match.group("macro")
+            groups, position = read_groups(content, match.end(), HEADING_MACROS[macro])
+            if macro == "resumeProjectHeading":
+                fields = [field for group in groups for field in _text_fields(group)]
+            else:
+                fields = [latex_to_text(group) for group in groups]
+            if macro == "cventry" and len(groups) == 6:
+                description = latex_to_text(groups[5])
+                fields = fields[:4] + ([fields[4]] if fields[4] else [])
+            else:
+                description = ""
+            current = _heading_fields(kind, fields)
+            if macro == "resumeSubSubheading" and entries:
+                # Another role at the previous entry's organisation
+                current.setdefault("company", entries[-1].get("company", ""))
+                current["description"] = entries[-1]["description"]
+            if description:
+                current["description"] = ", ".join(filter(None, [current["description"], description]))
+            entries.append(current)
+        elif match.group("heading"):
+            stop = HEADING_END.search(content, match.end())
+            end = stop.start() if stop else len(content)
+            current = _heading_fields(kind, _text_fields(content[match.start():end]))
+            entries.append(current)
+            position = end
+        else:
+            if match.group("item") == "resumeItem":
+                groups, position = read_groups(content, match.end(), 1)
+                text = latex_to_text(groups[0]) if groups else ""
+            else:
+                stop = ITEM_END.search(content, match.end())
+                end = stop.start() if stop else len(content)
+                text = latex_to_text(content[match.end():end])
+                position = end
+            text = _one_line(text)
+            if not text:
+                continue
+            if current is None:
+                entries.append(_heading_fields(kind, [text]))
+            else:
+                current["bullets"].append(text)
+    return [entry for entry in entries if entry["title"]]
+
+
+def _match_technologies(entry: dict, vocabulary: List[str]):
+    """Technologies an entry mentions, out of the CV's own skills list"""
+    if entry["technologies"]:
+        return
+    text = " ".join([entry["title"], entry["description"]] + entry["bullets"])
+    entry["technologies"] = [
+        skill for skill in vocabulary
+        if re.search(rf'(?<![\w.+#-]){re.escape(skill)}(?![\w+#-]|\.\w)', text)
+    ]
+
+
+def parse_latex_cv(latex_cv: str) -> Tuple[dict, float]:
+    """Parse a CV into the extraction schema without calling the model.
+
+    Returns (data, confidence). confidence (0 to 1) reflects how much of
+    the document followed recognised conventions: known section headings,
+    sections that yielded entries, entries with dates or bullets, and a
+    name and contact details in the header.
+    """
+    _, body = split_preamble(strip_latex_comments(latex_cv))
+    header, sections = split_sections(body)
+    data = {"personal_info": parse_personal_info(header), "skills": [],
+            "projects": [], "experience": [], "education": [], "certifications": []}
+    if not sections:
+        return data, 0.0
+
+    recognized = 0
+    entry_sections = 0
+    entry_sections_parsed = 0
+    for title, content in sections:
+        kind = classify_section(title)
+        if kind is None:
+            continue
+        recognized += 1
+        if kind == "summary":
+            data["personal_info"]["bio"] = _one_line(latex_to_text(content))
+        elif kind == "skills":
+            data["skills"].extend(parse_skills(content))
+        else:
+            entry_sections += 1
+            entries = parse_entries(kind, content)
+            entry_sections_parsed += bool(entries)
+            data[kind].extend(entries)
+
+    vocabulary = sorted({item for skill in data["skills"] for item in skill["items"]}, key=len, reverse=True)
+    entries = [entry for kind in ENTRY_KINDS for entry in data[kind]]
+    for kind in ("experience", "projects"):
+        for entry in data[kind]:
+            _match_technologies(entry, vocabulary)
+
+    complete = [entry for entry in entries if entry["date_range"] or entry["bullets"] or entry["description"]]
+    personal_info = data["personal_info"]
+    confidence = (
+        0.3 * recognized / len(sections)
+        + 0.3 * (entry_sections_parsed / entry_sections if entry_sections else 0)
+        + 0.2 * (len(complete) / len(entries) if entries else 0)
+        + 0.1 * bool(personal_info["name"])
+        + 0.1 * bool(personal_info["email"] or personal_info["phone"])
+    )
+    return data, round(confidence, 3)
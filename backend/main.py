@@ -1,29 +1,61 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, status
+from fastapi import Depends, FastAPI, HTTPException, UploadFile, File, Query, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from typing import List
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import List, Literal, Optional
+from contextlib import asynccontextmanager
 from datetime import datetime
+import asyncio
+import json
 import uuid
 import os
 from dotenv import load_dotenv
 
+import metrics
+
 from models import (
     Project, ProjectCreate, ProjectUpdate, 
-    JobDescription, CVGenerateRequest, CVGenerateResponse,
-    CVHistoryItem, BaselineCVResponse, MessageResponse,
+    JobDescription, CVGenerateRequest, CVGenerateResponse, CVBatchGenerateRequest, ImportReport,
+    CVHistoryItem, BaselineCVResponse, MessageResponse, GenerationJob,
     PersonalInfo, SkillCategory, UserData
 )
+from bulk_import import ImportFormatError, bulk_import, import_portfolio
 from data_manager import DataManager
-from gemini_service import generate_cv, extract_cv_data
+from file_responses import file_response, gzip_chunks, json_file_response, ndjson_chunks
+from response_cache import ResponseCache
+from job_queue import JobQueue, JobStore, QueueFullError
+from gemini_service import generate_cv_async, generate_cv_stream, extract_cv_data_async
+from pdf_compiler import CompileError, EngineUnavailableError, create_latex_compiler
+from model_routing import routing_stats
+from resilience import CircuitOpenError, resilience_stats, is_retryable
+from tenancy import (
+    DEFAULT_USER, QuotaExceededError, TenantAuthError, create_tenant_limiter, create_tenant_pool
+)
 
 # Load environment variables
 load_dotenv()
+metrics.configure()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the background generation workers and the LaTeX compile pool while the app is up"""
+    await run_in_threadpool(job_store.prune, float(os.getenv("JOB_RETENTION_HOURS", "168")) * 3600)
+    await job_queue.start()
+    # Prime the TeX caches with the baseline CV's preamble without delaying startup
+    baseline = await run_in_threadpool(tenants.default.get_baseline_cv) if tenants.default else None
+    warmup = asyncio.create_task(latex_compiler.start(baseline["content"] if baseline else None))
+    yield
+    warmup.cancel()
+    await job_queue.stop()
+    await latex_compiler.stop()
+
 
 # Initialize FastAPI app
 app = FastAPI(
     title="CVCraft API",
     description="AI-powered LaTeX CV tailoring using Google Gemini",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -33,10 +65,81 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-PDF-Cache", "ETag", "Content-Range"],
 )
 
-# Initialize data manager
-data_manager = DataManager()
+# Per-route request metrics for /metrics (METRICS_ENABLED)
+if metrics.REGISTRY.enabled:
+    app.add_middleware(metrics.MetricsMiddleware)
+
+# Per-user data stores (TENANT_AUTH; STORAGE_BACKEND selects json or sqlite) and generation limits
+tenants = create_tenant_pool()
+tenant_limiter = create_tenant_limiter()
+
+# Cache of generated CVs keyed by a hash of everything that feeds the prompt
+generation_cache = ResponseCache(
+    tenants.data_dir / "cache" / "generation",
+    max_entries=int(os.getenv("GENERATION_CACHE_MAX_ENTRIES", "500")),
+    max_bytes=int(float(os.getenv("GENERATION_CACHE_MAX_MB", "50")) * 1024 * 1024),
+    ttl_seconds=float(os.getenv("GENERATION_CACHE_TTL_HOURS", "168")) * 3600 or None
+)
+
+# Cache of baseline CV extractions, per document and per section
+extraction_cache = ResponseCache(
+    tenants.data_dir / "cache" / "extraction",
+    max_entries=int(os.getenv("EXTRACTION_CACHE_MAX_ENTRIES", "1000")),
+    max_bytes=int(float(os.getenv("EXTRACTION_CACHE_MAX_MB", "20")) * 1024 * 1024),
+    ttl_seconds=float(os.getenv("EXTRACTION_CACHE_TTL_HOURS", "720")) * 3600 or None
+)
+
+# Bounded pool of LaTeX compiles for PDF downloads (LATEX_ENGINE selects tectonic or pdflatex)
+latex_compiler = create_latex_compiler(tenants.data_dir)
+
+
+def current_user(request: Request) -> str:
+    """User ID from the X-User-ID header or bearer token (TENANT_AUTH)"""
+    try:
+        return tenants.resolve(request.headers)
+    except TenantAuthError as e:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=str(e),
+            headers={"WWW-Authenticate": "Bearer"} if tenants.mode == "token" else None
+        )
+
+
+def tenant_data_manager(user_id: str = Depends(current_user)) -> DataManager:
+    """The requesting user's data store"""
+    return tenants.get(user_id)
+
+
+def check_quota(user_id: str, count: int = 1):
+    """429 once a user has used up TENANT_GENERATIONS_PER_HOUR"""
+    try:
+        tenant_limiter.consume(user_id, count)
+    except QuotaExceededError as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(round(e.retry_after))}
+        )
+
+
+
+def page_response(page: dict) -> JSONResponse:
+    """Return a query page as a JSON list, with the next cursor in a header"""
+    headers = {"X-Next-Cursor": page["next_cursor"]} if page["next_cursor"] else None
+    return JSONResponse(content=page["items"], headers=headers)
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Split a comma-separated field projection"""
+    return [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+
+
+def sse_event(event: str, data: dict) -> str:
+    """Format one Server-Sent Event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
 
 
 # ===== Root Endpoint =====
@@ -58,14 +161,52 @@ def health_check():
     api_key = os.getenv("GEMINI_API_KEY")
     return {
         "status": "healthy",
-        "gemini_configured": bool(api_key)
+        "gemini_configured": bool(api_key),
+        "generation_cache": generation_cache.stats(),
+        "extraction_cache": extraction_cache.stats(),
+        "job_queue_depth": job_queue.depth,
+        "gemini_calls": resilience_stats(),
+        "model_routing": routing_stats(),
+        "pdf_compiler": latex_compiler.stats(),
+        "tenants": {**tenants.stats(), "limits": tenant_limiter.stats()}
     }
 
 
+def service_metrics() -> list:
+    """Scrape-time values owned by the queue, PDF compiler and tenant pool"""
+    pdf = latex_compiler.stats()
+    return [
+        ("cvcraft_job_queue_depth", "gauge", "Background generation jobs waiting for a worker",
+         {(): job_queue.depth}, ()),
+        ("cvcraft_pdf_compiles_total", "counter", "LaTeX compilations by outcome",
+         {("ok",): pdf["compiles"], ("failed",): pdf["failures"], ("timeout",): pdf["timeouts"]}, ("result",)),
+        ("cvcraft_pdf_cache_hits_total", "counter", "PDF downloads served from the compiled cache",
+         {(): pdf["cache_hits"]}, ()),
+        ("cvcraft_tenant_stores_open", "gauge", "User data stores held open", {(): tenants.stats()["open_stores"]}, ()),
+    ]
+
+
+metrics.REGISTRY.add_collector(metrics.cache_collector({"generation": generation_cache, "extraction": extraction_cache}))
+metrics.REGISTRY.add_collector(service_metrics)
+
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """Prometheus metrics: per-route request histograms, generation and
+    extraction stage timers, model tokens/bytes, cache hit ratios and
+    in-flight gauges"""
+    if not metrics.REGISTRY.enabled:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Metrics are disabled (METRICS_ENABLED)")
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+
 # ===== Baseline CV Endpoints =====
 
 @app.post("/api/cv/baseline", response_model=MessageResponse, status_code=status.HTTP_201_CREATED)
-async def upload_baseline_cv(file: UploadFile = File(...)):
+async def upload_baseline_cv(
+    file: UploadFile = File(...),
+    data_manager: DataManager = Depends(tenant_data_manager)
+):
     """Upload baseline LaTeX CV template and extract data"""
     
     # Validate file type
@@ -80,18 +221,20 @@ async def upload_baseline_cv(file: UploadFile = File(...)):
     latex_content = content.decode('utf-8')
     
     # Save baseline CV
-    result = data_manager.save_baseline_cv(latex_content)
+    result = await run_in_threadpool(data_manager.save_baseline_cv, latex_content)
     
     # Extract and save structured data from CV
     try:
-        extracted = extract_cv_data(latex_content)
+        extracted = await extract_cv_data_async(latex_content, cache=extraction_cache)
         
-        # Import the extracted data using existing import logic
-        data_manager.import_full_portfolio(extracted)
+        # Import the extracted data the way portfolio uploads are imported
+        report = await run_in_threadpool(import_portfolio, data_manager, extracted)
         
+        method = (extracted.get("extraction") or {}).get("method", "model")
         return MessageResponse(
             message=f"{result['message']} and extracted data saved",
-            detail=f"Uploaded at {result['uploaded_at']}"
+            detail=f"Uploaded at {result['uploaded_at']} (extracted {'locally' if method == 'local' else 'by the model'}"
+                   f"{import_summary(report)})"
         )
     except Exception as e:
         # If extraction fails, still return success for CV upload
@@ -103,7 +246,7 @@ async def upload_baseline_cv(file: UploadFile = File(...)):
 
 
 @app.get("/api/cv/baseline", response_model=BaselineCVResponse)
-def get_baseline_cv():
+def get_baseline_cv(data_manager: DataManager = Depends(tenant_data_manager)):
     """Get the current baseline LaTeX CV"""
     
     result = data_manager.get_baseline_cv()
@@ -120,13 +263,31 @@ def get_baseline_cv():
 # ===== Projects Endpoints =====
 
 @app.get("/api/projects", response_model=List[Project])
-def get_projects():
-    """Get all projects and experiences"""
-    return data_manager.get_all_projects()
+def get_projects(
+    category: Optional[str] = None,
+    technology: Optional[str] = None,
+    q: Optional[str] = Query(default=None, description="Case-insensitive text search in title and description"),
+    sort: Literal["created", "title", "category"] = "created",
+    order: Literal["asc", "desc"] = "asc",
+    limit: Optional[int] = Query(default=None, ge=1, le=500),
+    cursor: Optional[str] = Query(default=None, description="X-Next-Cursor value from the previous page"),
+    fields: Optional[str] = Query(default=None, description="Comma-separated fields to return, e.g. id,title,category"),
+    data_manager: DataManager = Depends(tenant_data_manager)
+):
+    """Get projects and experiences, optionally filtered, sorted and paginated"""
+    try:
+        page = data_manager.query_projects(
+            category=category, technology=technology, search=q, sort=sort, order=order,
+            limit=limit, cursor=cursor, fields=parse_fields(fields)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    return page_response(page)
 
 
 @app.get("/api/projects/{project_id}", response_model=Project)
-def get_project(project_id: str):
+def get_project(project_id: str, data_manager: DataManager = Depends(tenant_data_manager)):
     """Get a specific project by ID"""
     project = data_manager.get_project(project_id)
     
@@ -140,13 +301,17 @@ def get_project(project_id: str):
 
 
 @app.post("/api/projects", response_model=Project, status_code=status.HTTP_201_CREATED)
-def create_project(project: ProjectCreate):
+def create_project(project: ProjectCreate, data_manager: DataManager = Depends(tenant_data_manager)):
     """Create a new project or experience"""
     return data_manager.create_project(project)
 
 
 @app.put("/api/projects/{project_id}", response_model=Project)
-def update_project(project_id: str, project_data: ProjectUpdate):
+def update_project(
+    project_id: str,
+    project_data: ProjectUpdate,
+    data_manager: DataManager = Depends(tenant_data_manager)
+):
     """Update an existing project"""
     updated_project = data_manager.update_project(project_id, project_data)
     
@@ -160,7 +325,7 @@ def update_project(project_id: str, project_data: ProjectUpdate):
 
 
 @app.delete("/api/projects/{project_id}", response_model=MessageResponse)
-def delete_project(project_id: str):
+def delete_project(project_id: str, data_manager: DataManager = Depends(tenant_data_manager)):
     """Delete a project"""
     success = data_manager.delete_project(project_id)
     
@@ -173,97 +338,139 @@ def delete_project(project_id: str):
     return MessageResponse(message=f"Project {project_id} deleted successfully")
 
 
-@app.post("/api/projects/import", response_model=MessageResponse)
-async def import_projects(file: UploadFile = File(...)):
-    """Import projects from a JSON file"""
-    
-    
-    if not file.filename.endswith('.json'):
+def import_file_format(filename: str, allowed: tuple) -> str:
+    """"json" or "jsonl" from an upload's extension, 400 for anything else"""
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension not in allowed:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Only .json files are allowed"
+            detail=f"Only {', '.join(allowed)} files are allowed"
         )
-    
+    return "jsonl" if extension in (".jsonl", ".ndjson") else "json"
+
+
+async def run_bulk_import(data_manager: DataManager, file: UploadFile, allowed: tuple, items_only: bool = False,
+                          dry_run: bool = False) -> dict:
+    """Stream an uploaded file through the bulk importer off the event loop"""
+    file_format = import_file_format(file.filename, allowed)
     try:
-        
-        content = await file.read()
-        import json
-        projects_data = json.loads(content.decode('utf-8'))
-        
-        if not isinstance(projects_data, list):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="JSON file must contain an array of projects"
-            )
-        
-        # Import projects
-        result = data_manager.import_projects(projects_data)
-        
-        return MessageResponse(
-            message=result["message"],
-            detail=f"Successfully imported {result['count']} projects"
-        )
-        
-    except json.JSONDecodeError:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid JSON file"
-        )
+        return await run_in_threadpool(bulk_import, data_manager, file.file, file_format,
+                                       items_only=items_only, dry_run=dry_run)
+    except ImportFormatError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+def import_summary(report: dict) -> str:
+    """Human-readable tail for the import endpoints' MessageResponse"""
+    parts = []
+    if report["duplicates"]:
+        parts.append(f"{report['duplicates']} duplicates skipped")
+    if report["failed"]:
+        first = report["errors"][0]
+        parts.append(f"{report['failed']} invalid rows skipped (first: row {first['row']}: {first['message']})")
+    return f"; {', '.join(parts)}" if parts else ""
+
+
+@app.post("/api/projects/import", response_model=MessageResponse)
+async def import_projects(
+    file: UploadFile = File(...),
+    data_manager: DataManager = Depends(tenant_data_manager)
+):
+    """Import projects from a JSON array (or JSONL) file"""
+    
+    report = await run_bulk_import(data_manager, file, (".json", ".jsonl", ".ndjson"), items_only=True)
+    
+    return MessageResponse(
+        message=f"Imported {report['imported']} projects",
+        detail=f"Successfully imported {report['imported']} projects{import_summary(report)}"
+    )
 
 
 @app.post("/api/portfolio/import", response_model=MessageResponse)
-async def import_full_portfolio(file: UploadFile = File(...)):
+async def import_full_portfolio(
+    file: UploadFile = File(...),
+    data_manager: DataManager = Depends(tenant_data_manager)
+):
     """Import complete portfolio (personal info, experience, projects, skills, etc.)"""
     
-    # Validate file type
-    if not file.filename.endswith('.json'):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Only .json files are allowed"
-        )
+    report = await run_bulk_import(data_manager, file, (".json",))
     
-    try:
-        # Read and parse JSON
-        content = await file.read()
-        import json
-        portfolio_data = json.loads(content.decode('utf-8'))
-        
-        if not isinstance(portfolio_data, dict):
+    total = report["imported"] + report["counts"]["personal_info"] + report["counts"]["skills"]
+    return MessageResponse(
+        message="Portfolio imported successfully",
+        detail=f"Imported {total} total items: {report['counts']}{import_summary(report)}"
+    )
+
+
+@app.post("/api/portfolio/import/bulk", response_model=ImportReport)
+async def bulk_import_portfolio(
+    file: UploadFile = File(...),
+    dry_run: bool = Query(default=False, description="Validate and report without saving anything"),
+    data_manager: DataManager = Depends(tenant_data_manager)
+):
+    """Bulk import from a large JSON (item array or portfolio object) or
+    JSONL file, with a per-row error report.
+    
+    The file is parsed incrementally and validated in batches; items are
+    deduplicated by ID (hashed from the title in portfolio sections when
+    missing) and all valid rows are saved in one atomic write. Invalid rows are skipped and
+    listed in errors.
+    """
+    return ImportReport(**await run_bulk_import(data_manager, file, (".json", ".jsonl", ".ndjson"), dry_run=dry_run))
+
+
+@app.get("/api/portfolio/export")
+def export_portfolio(
+    since: Optional[str] = Query(default=None, description="Only records changed at or after this ISO date/time"),
+    since_version: Optional[int] = Query(default=None, ge=0, description="Only records changed after this version"),
+    gzip: bool = Query(default=False, description="Compress the stream (.ndjson.gz)"),
+    data_manager: DataManager = Depends(tenant_data_manager)
+):
+    """Stream personal info, skills, projects and CV history as NDJSON.
+    
+    One JSON record per line: an "export" header carrying the current
+    version, the data records, and an "end" trailer with the record
+    count. Records are read and encoded as the client consumes them, so
+    memory stays flat however large the portfolio is.
+    
+    With since or since_version only records changed after that point are
+    sent, plus "deleted" markers for removed projects. Changes are logged
+    from this version on, so start from a full export and pass the
+    header's version back as since_version next time. Deletions are kept
+    for CHANGE_LOG_RETENTION_DAYS; an older since or since_version gets a
+    full export, marked "incremental": false in the header.
+    """
+    if since:
+        try:
+            datetime.fromisoformat(since)
+        except ValueError:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="JSON file must contain a portfolio object"
+                detail="since must be an ISO date or date/time"
             )
-        
-        # Import portfolio
-        result = data_manager.import_full_portfolio(portfolio_data)
-        
-        return MessageResponse(
-            message=result["message"],
-            detail=f"Imported {result['total_items']} total items: {result['counts']}"
-        )
-        
-    except json.JSONDecodeError:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid JSON file"
-        )
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
-        )
+    
+    chunks = ndjson_chunks(data_manager.iter_export(since=since, since_version=since_version))
+    filename = "portfolio-export.ndjson"
+    if gzip:
+        chunks = gzip_chunks(chunks)
+        filename += ".gz"
+    return StreamingResponse(
+        chunks,
+        media_type="application/gzip" if gzip else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "Cache-Control": "no-store"}
+    )
 
 
 # ===== Personal Info Endpoints =====
 
 @app.get("/api/personal-info", response_model=PersonalInfo)
-def get_personal_info():
+def get_personal_info(data_manager: DataManager = Depends(tenant_data_manager)):
     """Get personal information"""
     return data_manager.get_personal_info()
 
 
 @app.post("/api/personal-info", response_model=MessageResponse)
-def save_personal_info(personal_info: PersonalInfo):
+def save_personal_info(personal_info: PersonalInfo, data_manager: DataManager = Depends(tenant_data_manager)):
     """Save personal information"""
     result = data_manager.save_personal_info(personal_info)
     return MessageResponse(message=result["message"])
@@ -272,13 +479,13 @@ def save_personal_info(personal_info: PersonalInfo):
 # ===== Skills Endpoints =====
 
 @app.get("/api/skills", response_model=List[SkillCategory])
-def get_skills():
+def get_skills(data_manager: DataManager = Depends(tenant_data_manager)):
     """Get all skills"""
     return data_manager.get_skills()
 
 
 @app.post("/api/skills", response_model=MessageResponse)
-def save_skills(skills: List[SkillCategory]):
+def save_skills(skills: List[SkillCategory], data_manager: DataManager = Depends(tenant_data_manager)):
     """Save skills"""
     result = data_manager.save_skills(skills)
     return MessageResponse(message=result["message"])
@@ -286,10 +493,10 @@ def save_skills(skills: List[SkillCategory]):
 
 # ===== CV Generation Endpoints =====
 
-@app.post("/api/cv/generate", response_model=CVGenerateResponse)
-def generate_cv_endpoint(request: CVGenerateRequest):
-    """Generate a tailored CV for a specific job description"""
-    
+async def load_generation_inputs(data_manager: DataManager, job_descriptions: List[JobDescription],
+                                 max_items: int) -> tuple:
+    """Check the API key, then load the baseline CV once and rank the
+    candidate projects for each job description"""
     # Check if API key is configured
     if not os.getenv("GEMINI_API_KEY"):
         raise HTTPException(
@@ -298,94 +505,432 @@ def generate_cv_endpoint(request: CVGenerateRequest):
         )
     
     # Get baseline CV
-    baseline_result = data_manager.get_baseline_cv()
+    with metrics.stage("generate", "load_baseline"):
+        baseline_result = await run_in_threadpool(data_manager.get_baseline_cv)
     if not baseline_result:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="No baseline CV found. Please upload a baseline CV first."
         )
     
-    # Get all projects
-    projects = data_manager.get_all_projects()
-    if not projects:
+    # Pre-rank projects locally so only the best candidates go into the prompt
+    top_k = max_items * int(os.getenv("PROMPT_CANDIDATES_PER_ITEM", "4"))
+    with metrics.stage("generate", "rank_projects"):
+        candidates = await run_in_threadpool(
+            lambda: [data_manager.rank_projects(f"{job.position or ''} {job.text}", top_k) for job in job_descriptions]
+        )
+    if not candidates or not candidates[0]:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="No projects found. Please add some projects first."
         )
     
+    return baseline_result["content"], candidates
+
+
+async def run_generation(request: CVGenerateRequest, baseline_cv: str, projects: List[Project],
+                         user_id: str) -> dict:
+    """Generate a tailored CV using Gemini (or the generation cache) in one of the user's slots.
+    
+    A generation that never reaches the model (open circuit, or cancelled
+    while waiting for a slot) is refunded to the user's quota.
+    """
+    started = False
     try:
-        # Generate tailored CV using Gemini
-        result = generate_cv(
-            baseline_cv=baseline_result["content"],
-            projects=projects,
-            job_description=request.job_description.text,
-            company=request.job_description.company or "",
-            position=request.job_description.position or "",
-            max_items=request.max_items,
-            custom_instructions=request.custom_instructions or ""
-        )
-        
-        # Generate job ID
-        job_id = str(uuid.uuid4())[:8]
-        
-        # Save generated CV
-        data_manager.save_generated_cv(
+        async with tenant_limiter.slot(user_id):
+            started = True
+            with metrics.generation_in_flight():
+                return await generate_cv_async(
+                    baseline_cv=baseline_cv,
+                    projects=projects,
+                    job_description=request.job_description.text,
+                    company=request.job_description.company or "",
+                    position=request.job_description.position or "",
+                    max_items=request.max_items,
+                    custom_instructions=request.custom_instructions or "",
+                    cache=generation_cache,
+                    bypass_cache=request.bypass_cache
+                )
+    except CircuitOpenError:
+        tenant_limiter.refund(user_id)
+        raise
+    except asyncio.CancelledError:
+        if not started:
+            tenant_limiter.refund(user_id)
+        raise
+
+
+def generation_response(result: dict, job_id: str, generated_at: str) -> CVGenerateResponse:
+    """Response for a finished generation result"""
+    return CVGenerateResponse(
+        latex_content=result["tailored_cv"],
+        job_id=job_id,
+        generated_at=generated_at,
+        selected_items=result["selected_item_ids"],
+        cached=result["cached"],
+        token_usage=result.get("token_usage"),
+        model=result.get("model"),
+        item_matches=result.get("item_matches", []),
+        rejected_edits=result.get("rejected_edits", [])
+    )
+
+
+async def generate_and_save(data_manager: DataManager, user_id: str, request: CVGenerateRequest,
+                            baseline_cv: str, projects: List[Project], job_id: str) -> CVGenerateResponse:
+    """Generate a tailored CV and record it in the user's history under job_id"""
+    result = await run_generation(request, baseline_cv, projects, user_id)
+    
+    # Save generated CV
+    with metrics.stage("generate", "save"):
+        history_item = await run_in_threadpool(
+            data_manager.save_generated_cv,
             latex_content=result["tailored_cv"],
             job_id=job_id,
             company=request.job_description.company,
-            position=request.job_description.position
+            position=request.job_description.position,
+            model=result.get("model")
         )
-        
-        return CVGenerateResponse(
-            latex_content=result["tailored_cv"],
-            job_id=job_id,
-            generated_at=datetime.now().isoformat(),
-            selected_items=result["selected_item_ids"]
+    
+    return generation_response(result, job_id, history_item.generated_at)
+
+
+async def run_generation_job(request_data: dict, job_id: str, user_id: Optional[str]) -> dict:
+    """Job queue handler: run a queued generation with fresh inputs from its user's store"""
+    request = CVGenerateRequest(**request_data)
+    user_id = user_id or DEFAULT_USER
+    data_manager = await run_in_threadpool(tenants.get, user_id)
+    try:
+        baseline_cv, (projects,) = await load_generation_inputs(data_manager, [request.job_description],
+                                                                request.max_items)
+    except HTTPException:
+        tenant_limiter.refund(user_id)  # Charged at submit, but the model is never called
+        raise
+    try:
+        response = await generate_and_save(data_manager, user_id, request, baseline_cv, projects, job_id)
+    except asyncio.TimeoutError:
+        raise RuntimeError("Failed to generate CV: the Gemini API did not respond in time")
+    # The LaTeX lives in data/generated; the job record keeps the rest
+    return response.dict(exclude={"latex_content"})
+
+
+# Background generation jobs, persisted under data/jobs
+job_store = JobStore(tenants.data_dir / "jobs")
+job_queue = JobQueue(
+    job_store,
+    handler=run_generation_job,
+    workers=int(os.getenv("JOB_WORKERS", "2")),
+    max_depth=int(os.getenv("JOB_QUEUE_MAX", "100")),
+    max_per_user=int(os.getenv("TENANT_MAX_QUEUED_JOBS", "10"))
+)
+
+
+def job_status(data_manager: DataManager, job: dict) -> GenerationJob:
+    """Public view of a job record, with the generated LaTeX once completed"""
+    result = job["result"]
+    if job["status"] == "completed" and result is not None:
+        result = {**result, "latex_content": data_manager.get_generated_cv(job["job_id"]) or ""}
+    return GenerationJob(**{**job, "result": result})
+
+
+@app.post("/api/cv/generate", response_model=CVGenerateResponse)
+async def generate_cv_endpoint(
+    request: CVGenerateRequest,
+    user_id: str = Depends(current_user),
+    data_manager: DataManager = Depends(tenant_data_manager)
+):
+    """Generate a tailored CV for a specific job description.
+    
+    With "background": true the generation is queued instead and the
+    response is 202 with a job to poll at /api/cv/jobs/{job_id}.
+    """
+    baseline_cv, (projects,) = await load_generation_inputs(data_manager, [request.job_description], request.max_items)
+    check_quota(user_id)
+    
+    if request.background:
+        try:
+            job = await job_queue.submit(request.dict(exclude={"background"}), user_id)
+        except QueueFullError as e:
+            tenant_limiter.refund(user_id)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=str(e),
+                headers={"Retry-After": os.getenv("JOB_RETRY_AFTER_SECONDS", "30")}
+            )
+        except RuntimeError as e:
+            tenant_limiter.refund(user_id)
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content=job_status(data_manager, job).dict(),
+            headers={"Location": f"/api/cv/jobs/{job['job_id']}"}
         )
+    
+    try:
+        return await generate_and_save(data_manager, user_id, request, baseline_cv, projects, str(uuid.uuid4())[:8])
         
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Failed to generate CV: the Gemini API did not respond in time"
+        )
+    except CircuitOpenError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Failed to generate CV: {str(e)}",
+            headers={"Retry-After": str(max(1, round(e.retry_after)))}
+        )
     except Exception as e:
+        if is_retryable(e):
+            # Rate limited or unavailable upstream even after retrying
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"Failed to generate CV: {str(e)}",
+                headers={"Retry-After": os.getenv("GEMINI_RETRY_MAX_SECONDS", "20")}
+            )
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to generate CV: {str(e)}"
         )
 
 
+@app.get("/api/cv/jobs/{job_id}", response_model=GenerationJob)
+def get_generation_job(
+    job_id: str,
+    user_id: str = Depends(current_user),
+    data_manager: DataManager = Depends(tenant_data_manager)
+):
+    """Get the status of one of the user's queued generations, and its result once completed"""
+    job = job_store.get(job_id)
+    # Jobs queued before multi-tenancy have no user and belong to the default one
+    if job is None or (job.get("user_id") or DEFAULT_USER) != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Generation job {job_id} not found"
+        )
+    return job_status(data_manager, job)
+
+
+@app.post("/api/cv/generate/stream")
+async def generate_cv_stream_endpoint(
+    request: CVGenerateRequest,
+    user_id: str = Depends(current_user),
+    data_manager: DataManager = Depends(tenant_data_manager)
+):
+    """Generate a tailored CV, streaming the LaTeX as Server-Sent Events.
+    
+    Events: "start" ({job_id}), "chunk" ({text}) as the document is written,
+    then "done" (the CVGenerateResponse) once it is saved, or "error"
+    ({detail}). Disconnecting cancels the generation and nothing is saved.
+    """
+    baseline_cv, (projects,) = await load_generation_inputs(data_manager, [request.job_description], request.max_items)
+    check_quota(user_id)
+    job_id = str(uuid.uuid4())[:8]
+    
+    async def events():
+        yield sse_event("start", {"job_id": job_id})
+        try:
+            result = None
+            async with tenant_limiter.slot(user_id):
+                with metrics.generation_in_flight():
+                    async for kind, value in generate_cv_stream(
+                        baseline_cv=baseline_cv,
+                        projects=projects,
+                        job_description=request.job_description.text,
+                        company=request.job_description.company or "",
+                        position=request.job_description.position or "",
+                        max_items=request.max_items,
+                        custom_instructions=request.custom_instructions or "",
+                        cache=generation_cache,
+                        bypass_cache=request.bypass_cache
+                    ):
+                        if kind == "chunk":
+                            yield sse_event("chunk", {"text": value})
+                        else:
+                            result = value
+            
+            with metrics.stage("generate", "save"):
+                history_item = await run_in_threadpool(
+                    data_manager.save_generated_cv,
+                    latex_content=result["tailored_cv"],
+                    job_id=job_id,
+                    company=request.job_description.company,
+                    position=request.job_description.position,
+                    model=result.get("model")
+                )
+            response = generation_response(result, job_id, history_item.generated_at)
+            yield sse_event("done", response.dict())
+        
+        except asyncio.TimeoutError:
+            yield sse_event("error", {"detail": "Failed to generate CV: the Gemini API did not respond in time"})
+        except CircuitOpenError as e:
+            tenant_limiter.refund(user_id)
+            yield sse_event("error", {"detail": f"Failed to generate CV: {str(e)}"})
+        except Exception as e:
+            yield sse_event("error", {"detail": f"Failed to generate CV: {str(e)}"})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.post("/api/cv/generate/batch")
+async def generate_cv_batch_endpoint(
+    request: CVBatchGenerateRequest,
+    user_id: str = Depends(current_user),
+    data_manager: DataManager = Depends(tenant_data_manager)
+):
+    """Generate one tailored CV per job description, streamed as Server-Sent Events.
+    
+    The baseline CV and projects are loaded once and up to
+    BATCH_MAX_CONCURRENCY generations run at a time. Events: "start"
+    ({count, job_ids}), then "result" (the CVGenerateResponse plus its
+    index) or "error" ({index, detail}) per item in completion order, and
+    "done" ({completed, failed}). Each CV is saved before its "result" is
+    sent, so it can be downloaded right away; the finished CVs are added to
+    history in one write at the end, including when the client disconnects
+    early.
+    """
+    jobs = request.job_descriptions
+    baseline_cv, candidates = await load_generation_inputs(data_manager, jobs, request.max_items)
+    check_quota(user_id, len(jobs))
+    job_ids = [str(uuid.uuid4())[:8] for _ in jobs]
+    semaphore = asyncio.Semaphore(int(os.getenv("BATCH_MAX_CONCURRENCY", "4")))
+    unstarted = set(range(len(jobs)))  # Refunded if the batch ends before they run
+    
+    async def generate_item(index: int):
+        item_request = CVGenerateRequest(
+            job_description=jobs[index],
+            max_items=request.max_items,
+            custom_instructions=request.custom_instructions,
+            bypass_cache=request.bypass_cache
+        )
+        async with semaphore:
+            unstarted.discard(index)
+            try:
+                return index, await run_generation(item_request, baseline_cv, candidates[index], user_id), None
+            except asyncio.TimeoutError:
+                return index, None, "Failed to generate CV: the Gemini API did not respond in time"
+            except Exception as e:
+                return index, None, f"Failed to generate CV: {str(e)}"
+    
+    async def events():
+        yield sse_event("start", {"count": len(jobs), "job_ids": job_ids})
+        tasks = [asyncio.ensure_future(generate_item(index)) for index in range(len(jobs))]
+        finished = []
+        failed = 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                index, result, error = await next_done
+                if error:
+                    failed += 1
+                    yield sse_event("error", {"index": index, "detail": error})
+                    continue
+                with metrics.stage("generate", "save"):
+                    # shield: a CV that was generated is saved even if the client went away
+                    history_item = await asyncio.shield(run_in_threadpool(
+                        data_manager.write_generated_cv,
+                        latex_content=result["tailored_cv"],
+                        job_id=job_ids[index],
+                        company=jobs[index].company,
+                        position=jobs[index].position,
+                        model=result.get("model")
+                    ))
+                finished.append(history_item)
+                response = generation_response(result, job_ids[index], history_item.generated_at)
+                yield sse_event("result", {"index": index, **response.dict()})
+        finally:
+            for task in tasks:
+                task.cancel()
+            tenant_limiter.refund(user_id, len(unstarted))
+            if finished:
+                with metrics.stage("generate", "save"):
+                    await asyncio.shield(run_in_threadpool(data_manager.add_to_history, finished))
+        yield sse_event("done", {"completed": len(finished), "failed": failed})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.get("/api/cv/history", response_model=List[CVHistoryItem])
-def get_cv_history():
-    """Get history of generated CVs"""
-    return data_manager.get_cv_history()
+def get_cv_history(
+    company: Optional[str] = None,
+    since: Optional[str] = Query(default=None, description="Only CVs generated at or after this ISO date/time"),
+    until: Optional[str] = Query(default=None, description="Only CVs generated before this ISO date/time"),
+    order: Literal["asc", "desc"] = "desc",
+    limit: Optional[int] = Query(default=None, ge=1, le=500),
+    cursor: Optional[str] = Query(default=None, description="X-Next-Cursor value from the previous page"),
+    fields: Optional[str] = Query(default=None, description="Comma-separated fields to return"),
+    data_manager: DataManager = Depends(tenant_data_manager)
+):
+    """Get history of generated CVs, newest first unless order=asc"""
+    try:
+        page = data_manager.query_cv_history(
+            company=company, since=since, until=until, order=order,
+            limit=limit, cursor=cursor, fields=parse_fields(fields)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    return page_response(page)
 
 
 @app.get("/api/cv/generated/{job_id}")
-def download_generated_cv(job_id: str):
-    """Download a specific generated CV"""
+def download_generated_cv(
+    job_id: str,
+    request: Request,
+    data_manager: DataManager = Depends(tenant_data_manager)
+):
+    """Download a specific generated CV, streamed from data/generated
+    with ETag/Last-Modified revalidation, Range and gzip"""
     
-    content = data_manager.get_generated_cv(job_id)
+    file_path = data_manager.get_generated_cv_path(job_id)
     
-    if not content:
+    if not file_path:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Generated CV with job ID {job_id} not found"
         )
     
-    # Return as file download
-    import tempfile
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.tex', delete=False, encoding='utf-8') as tmp:
-        tmp.write(content)
-        tmp_path = tmp.name
-    
-    return FileResponse(
-        path=tmp_path,
-        filename=f"cv_{job_id}.tex",
-        media_type="application/x-tex"
-    )
+    return file_response(request, file_path, "application/x-tex", filename=f"cv_{job_id}.tex")
 
 
 @app.get("/api/cv/generated/{job_id}/content")
-def get_generated_cv_content(job_id: str):
-    """Get the content of a specific generated CV for preview"""
+def get_generated_cv_content(
+    job_id: str,
+    request: Request,
+    data_manager: DataManager = Depends(tenant_data_manager)
+):
+    """Get the content of a specific generated CV for preview (304 when unchanged)"""
     
-    content = data_manager.get_generated_cv(job_id)
+    file_path = data_manager.get_generated_cv_path(job_id)
+    
+    if not file_path:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Generated CV with job ID {job_id} not found"
+        )
+    
+    return json_file_response(request, file_path, lambda content: {"content": content, "job_id": job_id})
+
+
+@app.get("/api/cv/generated/{job_id}/pdf")
+async def download_generated_cv_pdf(
+    job_id: str,
+    request: Request,
+    data_manager: DataManager = Depends(tenant_data_manager)
+):
+    """Download a generated CV compiled to PDF.
+    
+    The PDF is cached next to the .tex by content hash, so repeated
+    downloads skip compilation (X-PDF-Cache: hit). LaTeX errors come back
+    as 422 with the engine's messages and the tail of its log.
+    """
+    content = await run_in_threadpool(data_manager.get_generated_cv, job_id)
     
     if not content:
         raise HTTPException(
@@ -393,7 +938,18 @@ def get_generated_cv_content(job_id: str):
             detail=f"Generated CV with job ID {job_id} not found"
         )
     
-    return {"content": content, "job_id": job_id}
+    try:
+        pdf_path, cached = await latex_compiler.get_pdf(data_manager.generated_dir, job_id, content)
+    except EngineUnavailableError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    except CompileError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={"message": str(e), "errors": e.errors, "log": e.log}
+        )
+    
+    return file_response(request, pdf_path, "application/pdf", filename=f"cv_{job_id}.pdf", compress=False,
+                         extra_headers={"X-PDF-Cache": "hit" if cached else "miss"})
 
 
 # ===== Run the application =====
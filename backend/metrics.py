@@ -0,0 +1,279 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+
+# Seconds; generation stages run from milliseconds (prompt building) to minutes (model calls)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Metric:
+    """One metric family; samples are keyed by label values"""
+
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def lines(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in sorted(values):
+            yield from self._sample_lines(labels, value)
+
+    def _sample_lines(self, labels: tuple, value) -> Iterator[str]:
+        yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels, value: float):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(Metric):
+    """Cumulative buckets, sum and count per label set"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels):
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # [count per bucket (the last one is +Inf), sum]
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][bisect_left(self.buckets, value)] += 1
+            state[1] += value
+
+    def _sample_lines(self, labels: tuple, value) -> Iterator[str]:
+        counts, total = value
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            le = f'le="{_number(bound)}"'
+            yield f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}"
+        yield f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}"
+        yield f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}"
+
+
+class Registry:
+    """Metrics plus collectors that report values owned elsewhere (cache
+    and queue stats) at scrape time.
+
+    With enabled False every recording helper below returns before doing
+    any work, and the app does not install the request middleware.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.metrics: List[Metric] = []
+        self.collectors: List[Callable[[], list]] = []
+
+    def add(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable):
+        """collector() returns [(name, kind, help, {label values: value}, label names)]"""
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        """Prometheus text exposition format"""
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.lines())
+        for collector in self.collectors:
+            for name, kind, help_text, values, labelnames in collector():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in sorted(values.items()):
+                    if value is not None:
+                        lines.append(f"{name}{_labels(labelnames, labels)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Enabled from METRICS_ENABLED by configure(), once .env is loaded
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.add(Counter(
+    "cvcraft_http_requests_total", "HTTP requests by route template and status", ("method", "route", "status")))
+HTTP_DURATION = REGISTRY.add(Histogram(
+    "cvcraft_http_request_duration_seconds", "HTTP request latency until the last body byte", ("method", "route")))
+HTTP_IN_FLIGHT = REGISTRY.add(Gauge(
+    "cvcraft_http_requests_in_flight", "HTTP requests being served"))
+STAGE_DURATION = REGISTRY.add(Histogram(
+    "cvcraft_stage_duration_seconds", "Time spent in each stage of generation and extraction", ("operation", "stage")))
+GENERATIONS_IN_FLIGHT = REGISTRY.add(Gauge(
+    "cvcraft_generations_in_flight", "CV generations running, including cache lookups and saving"))
+MODEL_CALLS_IN_FLIGHT = REGISTRY.add(Gauge(
+    "cvcraft_model_calls_in_flight", "Gemini calls waiting for an answer", ("operation",)))
+MODEL_TOKENS = REGISTRY.add(Counter(
+    "cvcraft_model_tokens_total", "Tokens sent to and returned by the model (estimated when the API reports none)",
+    ("operation", "direction")))
+MODEL_BYTES = REGISTRY.add(Counter(
+    "cvcraft_model_bytes_total", "UTF-8 bytes of prompts and responses", ("operation", "direction")))
+
+
+def configure() -> bool:
+    """Turn recording on or off from METRICS_ENABLED (default on)"""
+    REGISTRY.enabled = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes", "on")
+    return REGISTRY.enabled
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_TIMER = _NullTimer()
+
+
+@contextmanager
+def _timed(operation: str, stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_DURATION.observe(time.perf_counter() - start, operation, stage)
+
+
+def stage(operation: str, stage_name: str):
+    """Context manager timing one stage, e.g. stage("generate", "model_call")"""
+    return _timed(operation, stage_name) if REGISTRY.enabled else NULL_TIMER
+
+
+@contextmanager
+def _tracking(gauge: Gauge, labels: tuple):
+    gauge.inc(*labels)
+    try:
+        yield
+    finally:
+        gauge.dec(*labels)
+
+
+def generation_in_flight():
+    """Count a generation in the in-flight gauge while the block runs"""
+    return _tracking(GENERATIONS_IN_FLIGHT, ()) if REGISTRY.enabled else NULL_TIMER
+
+
+@contextmanager
+def _model_call(operation: str):
+    with _tracking(MODEL_CALLS_IN_FLIGHT, (operation,)), _timed(operation, "model_call"):
+        yield
+
+
+def model_call(operation: str):
+    """Time a model call as the "model_call" stage and count it in flight"""
+    return _model_call(operation) if REGISTRY.enabled else NULL_TIMER
+
+
+def record_model_io(operation: str, prompt: str, response_text: str, usage: Optional[dict]):
+    """Token and byte counts of one model call; usage is a token_usage() report"""
+    if not REGISTRY.enabled:
+        return
+    MODEL_BYTES.inc(operation, "prompt", amount=len(prompt.encode("utf-8")))
+    MODEL_BYTES.inc(operation, "response", amount=len((response_text or "").encode("utf-8")))
+    if usage:
+        MODEL_TOKENS.inc(operation, "prompt", amount=usage["prompt_tokens"])
+        MODEL_TOKENS.inc(operation, "output", amount=usage["output_tokens"])
+
+
+def cache_collector(caches: Dict[str, object]) -> Callable:
+    """Collector for objects with hits/misses counters (ResponseCache)"""
+    def collect():
+        hits = {(name,): cache.hits for name, cache in caches.items()}
+        misses = {(name,): cache.misses for name, cache in caches.items()}
+        ratios = {
+            (name,): cache.hits / (cache.hits + cache.misses) if cache.hits + cache.misses else None
+            for name, cache in caches.items()
+        }
+        return [
+            ("cvcraft_cache_hits_total", "counter", "Cache hits", hits, ("cache",)),
+            ("cvcraft_cache_misses_total", "counter", "Cache misses", misses, ("cache",)),
+            ("cvcraft_cache_hit_ratio", "gauge", "Hits / lookups since start", ratios, ("cache",)),
+        ]
+    return collect
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route request counts, latency and
+    in-flight requests. Routes are labelled by their path template
+    (/api/projects/{project_id}), so label sets stay bounded."""
+
+    def __init__(self, app, exclude: Tuple[str, ...] = ("/metrics",)):
+        self.app = app
+        self.exclude = exclude
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude:
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUESTS.inc(scope["method"], path, str(status[0]))
+            HTTP_DURATION.observe(time.perf_counter() - start, scope["method"], path)
@@ -0,0 +1,126 @@
+import asyncio
+import os
+import threading
+from typing import Awaitable, Callable, Optional, Tuple
+
+
+TASK_DEFAULT_MODELS = {
+    "generation": "gemini-3-flash-preview",
+    "extraction": "gemini-2.0-flash-exp",
+}
+
+_stats = {"primary": 0, "hedged": 0, "hedge_wins": 0, "fallbacks": 0}
+_stats_lock = threading.Lock()
+
+
+class ModelRoute:
+    """Models serving one task.
+
+    The primary model answers by default. When it fails, the fallback
+    model is tried; when it is still running after latency_budget seconds,
+    the fallback is started alongside it (hedged) and the first answer wins.
+    """
+
+    def __init__(self, task: str, primary: str, fallback: Optional[str] = None, latency_budget: float = 0.0):
+        self.task = task
+        self.primary = primary
+        self.fallback = fallback if fallback != primary else None
+        self.latency_budget = latency_budget
+
+    def __repr__(self):
+        return f"ModelRoute({self.task}: {self.primary} -> {self.fallback}, budget {self.latency_budget}s)"
+
+
+def get_model_route(task: str) -> ModelRoute:
+    """Route for "generation" or "extraction" from the environment.
+
+    <TASK>_MODEL picks the primary model (falling back to GEMINI_MODEL, then
+    the task default), <TASK>_FALLBACK_MODEL the fallback and
+    <TASK>_LATENCY_BUDGET_SECONDS when to hedge (0 only falls back on errors).
+    """
+    prefix = task.upper()
+    primary = os.getenv(f"{prefix}_MODEL") or os.getenv("GEMINI_MODEL") or TASK_DEFAULT_MODELS[task]
+    return ModelRoute(
+        task,
+        primary,
+        fallback=os.getenv(f"{prefix}_FALLBACK_MODEL") or None,
+        latency_budget=float(os.getenv(f"{prefix}_LATENCY_BUDGET_SECONDS", "0")),
+    )
+
+
+def _count(name: str):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def routing_stats() -> dict:
+    """How often calls were answered by the primary, hedged and fell back"""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _succeeded(task: asyncio.Future) -> bool:
+    return task.done() and not task.cancelled() and task.exception() is None
+
+
+async def routed_call(route: ModelRoute, call: Callable[[str], Awaitable],
+                      discard: Optional[Callable[[object], Awaitable]] = None) -> Tuple[object, str]:
+    """Run call(model) along a route; returns (result, model that answered).
+
+    discard is awaited with the result of a call that finished but lost the
+    race, so it can release resources such as an open stream. If every
+    model fails, the primary model's error is raised.
+    """
+    if not route.fallback:
+        _count("primary")
+        return await call(route.primary), route.primary
+
+    primary = asyncio.ensure_future(call(route.primary))
+    tasks = {primary: route.primary}
+    winner = None
+    try:
+        await asyncio.wait({primary}, timeout=route.latency_budget or None)
+        if _succeeded(primary):
+            winner = primary
+            _count("primary")
+            return primary.result(), route.primary
+
+        over_budget = not primary.done()
+        _count("hedged" if over_budget else "fallbacks")
+        hedge = asyncio.ensure_future(call(route.fallback))
+        tasks[hedge] = route.fallback
+
+        while not all(task.done() for task in tasks):
+            await asyncio.wait([task for task in tasks if not task.done()], return_when=asyncio.FIRST_COMPLETED)
+            for task in (primary, hedge):  # The primary wins a tie
+                if _succeeded(task):
+                    winner = task
+                    if task is hedge and over_budget:
+                        _count("hedge_wins")
+                    return task.result(), tasks[task]
+        raise primary.exception()
+    finally:
+        losers = [task for task in tasks if task is not winner]
+        # A cancelled call that was its model's half-open circuit trial
+        # releases the trial (see ResilientCaller.call), so hedging never
+        # leaves the losing model's circuit stuck
+        for task in losers:
+            task.cancel()
+        results = await asyncio.gather(*losers, return_exceptions=True)
+        if discard is not None:
+            for result in results:
+                if not isinstance(result, BaseException):
+                    await discard(result)
+
+
+def routed_call_sync(route: ModelRoute, call: Callable[[str], object]) -> Tuple[object, str]:
+    """Blocking version of routed_call: falls back on errors, never hedges"""
+    try:
+        result = call(route.primary)
+    except Exception:
+        if not route.fallback:
+            raise
+        _count("fallbacks")
+        return call(route.fallback), route.fallback
+    _count("primary")
+    return result, route.primary
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Literal
+from typing import Dict, List, Optional, Literal
 from datetime import datetime
 
 
@@ -45,6 +45,39 @@ class CVGenerateRequest(BaseModel):
     job_description: JobDescription
     max_items: int = Field(default=5, ge=1, le=10, description="Maximum number of projects/experiences to include")
     custom_instructions: Optional[str] = Field(default=None, description="Additional specific instructions for the AI")
+    bypass_cache: bool = Field(default=False, description="Skip the response cache and call the model again")
+    background: bool = Field(default=False, description="Queue the generation and return a job to poll instead of waiting")
+
+
+class CVBatchGenerateRequest(BaseModel):
+    """Request model for generating one CV per job description"""
+    job_descriptions: List[JobDescription] = Field(min_length=1, max_length=50)
+    max_items: int = Field(default=5, ge=1, le=10, description="Maximum number of projects/experiences to include")
+    custom_instructions: Optional[str] = Field(default=None, description="Additional specific instructions for the AI")
+    bypass_cache: bool = Field(default=False, description="Skip the response cache and call the model again")
+
+
+class TokenUsage(BaseModel):
+    """Prompt and output size of one generation call"""
+    encoding: str
+    prompt_chars: int
+    prompt_tokens: int
+    output_tokens: int
+    estimated: bool = False  # True when counted locally rather than by the API
+
+
+class RejectedEdit(BaseModel):
+    """A section edit that failed validation and was not applied"""
+    section: str
+    reason: str
+
+
+class ItemMatch(BaseModel):
+    """Where a selected item's title appears in the generated LaTeX"""
+    id: str
+    title: str
+    start: int
+    end: int
 
 
 class CVGenerateResponse(BaseModel):
@@ -53,6 +86,22 @@ class CVGenerateResponse(BaseModel):
     job_id: str
     generated_at: str
     selected_items: List[str] = []
+    cached: bool = False
+    token_usage: Optional[TokenUsage] = None
+    model: Optional[str] = None
+    item_matches: List[ItemMatch] = []
+    rejected_edits: List[RejectedEdit] = []  # GENERATION_MODE=edits only
+
+
+class GenerationJob(BaseModel):
+    """Status of a queued CV generation"""
+    job_id: str
+    status: Literal["queued", "running", "completed", "failed"]
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    error: Optional[str] = None
+    result: Optional[CVGenerateResponse] = None
 
 
 class CVHistoryItem(BaseModel):
@@ -62,6 +111,7 @@ class CVHistoryItem(BaseModel):
     position: Optional[str] = None
     generated_at: str
     file_path: str
+    model: Optional[str] = None  # Gemini model that wrote the CV
 
 
 class BaselineCVResponse(BaseModel):
@@ -110,3 +160,24 @@ class UserDataResponse(BaseModel):
     personal_info: Optional[PersonalInfo] = None
     skills: List[SkillCategory] = []
     all_items: List[Project] = []  # Combined education, experience, projects, certifications
+
+
+class ImportRowError(BaseModel):
+    """One rejected row of a bulk import"""
+    section: Optional[str] = None  # Portfolio key the row came from, if any
+    row: Optional[int] = None  # Item number in its array (JSON) or line number (JSONL)
+    id: Optional[str] = None
+    field: Optional[str] = None
+    message: str
+
+
+class ImportReport(BaseModel):
+    """Outcome of a bulk import"""
+    imported: int
+    counts: Dict[str, int]
+    rows: int
+    duplicates: int
+    failed: int
+    errors: List[ImportRowError] = []
+    errors_truncated: bool = False
+    dry_run: bool = False
@@ -0,0 +1,310 @@
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import shutil
+import signal
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows: no rlimits, timeouts still apply
+    resource = None
+
+
+logger = logging.getLogger(__name__)
+
+PDF_ENGINES = ["tectonic", "pdflatex"]
+
+# Minimal document compiled in each slot at startup when there is no baseline CV
+WARMUP_LATEX = "\\documentclass{article}\n\\begin{document}\nwarm-up\n\\end{document}\n"
+
+LOG_ERROR = re.compile(r'^(?:! (.+)|[^:\n]+:(\d+): (.+)|error: (.+))$', re.MULTILINE)
+LOG_LINE = re.compile(r'^l\.(\d+)', re.MULTILINE)
+RERUN = re.compile(r'Rerun to get|Label\(s\) may have changed')
+
+
+class CompileError(Exception):
+    """Raised when the LaTeX engine fails on a document"""
+
+    def __init__(self, message: str, errors: List[dict], log: str = ""):
+        super().__init__(message)
+        self.errors = errors  # [{"line": int or None, "message": str}]
+        self.log = log  # Tail of the engine log
+
+
+class EngineUnavailableError(Exception):
+    """Raised when no LaTeX engine is installed or configured"""
+
+
+def find_engine(engine: str = "auto") -> Tuple[Optional[str], Optional[str]]:
+    """(engine name, executable path) for LATEX_ENGINE, or (None, None)"""
+    names = PDF_ENGINES if engine == "auto" else [engine]
+    for name in names:
+        if name not in PDF_ENGINES:
+            raise ValueError(f"Unknown LATEX_ENGINE '{engine}', expected 'auto', 'tectonic' or 'pdflatex'")
+        path = shutil.which(name)
+        if path:
+            return name, path
+    return None, None
+
+
+def parse_log_errors(log: str) -> List[dict]:
+    """Errors from an engine log, with the source line when the log names one"""
+    errors = []
+    for match in LOG_ERROR.finditer(log):
+        message = match.group(1) or match.group(3) or match.group(4)
+        line = int(match.group(2)) if match.group(2) else None
+        if line is None and match.group(1):
+            following = LOG_LINE.search(log, match.end(), match.end() + 500)
+            line = int(following.group(1)) if following else None
+        errors.append({"line": line, "message": message.strip()})
+    return errors[:20]
+
+
+def _limit_resources(max_memory_mb: int, cpu_seconds: int):
+    """preexec_fn for engine processes: cap memory, CPU time and file size"""
+    def apply():
+        if resource is None:
+            return
+        if max_memory_mb:
+            limit = max_memory_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1))
+        resource.setrlimit(resource.RLIMIT_FSIZE, (100 * 1024 * 1024, 100 * 1024 * 1024))
+    return apply
+
+
+class CompileSlot:
+    """One concurrent compile: a scratch directory reused between jobs, not a
+    process (every compile starts a fresh engine)"""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.compiles = 0
+
+    def reset(self):
+        """Clear the previous job's files, keeping the directory"""
+        for path in self.directory.iterdir():
+            if path.is_dir():
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                path.unlink(missing_ok=True)
+
+
+class LatexCompiler:
+    """Compiles documents to PDF, at most `workers` at a time.
+
+    Every compile runs a new engine process in one of the pool's compile
+    slots (pre-created scratch directories); no engine stays resident
+    between jobs. At startup each slot compiles a priming document
+    (ideally the baseline CV, so its class and packages are read), which
+    fills the OS file cache and, for tectonic, downloads the bundle files
+    up front, so the first real compiles don't pay for that.
+
+    Engine processes are sandboxed: no shell escape (tectonic runs
+    --untrusted), TeX file access restricted to the scratch directory, a
+    minimal environment, memory/CPU/file size limits, and a wall clock
+    timeout after which the whole process group is killed.
+    """
+
+    def __init__(self, work_dir: Path, engine: str = "auto", workers: int = 2, timeout: float = 30,
+                 max_memory_mb: int = 2048, executable: Optional[str] = None):
+        if executable:
+            if engine == "auto":
+                engine = "tectonic" if "tectonic" in Path(executable).name else "pdflatex"
+            self.engine, self.executable = engine, executable
+        else:
+            self.engine, self.executable = find_engine(engine)
+        self.work_dir = Path(work_dir)
+        self.timeout = timeout
+        self.max_memory_mb = max_memory_mb
+        self.slots = [CompileSlot(self.work_dir / f"slot-{i}") for i in range(max(1, workers))]
+        self._idle: Optional[asyncio.Queue] = None
+        self._in_flight: Dict[Path, asyncio.Future] = {}
+        self._stats = {"compiles": 0, "failures": 0, "timeouts": 0, "cache_hits": 0, "compile_seconds": 0.0,
+                       "warmup_failures": 0}
+        self._warmup_error: Optional[str] = None
+
+    @property
+    def available(self) -> bool:
+        return self.executable is not None
+
+    def _pool(self) -> asyncio.Queue:
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+            for slot in self.slots:
+                slot.directory.mkdir(parents=True, exist_ok=True)
+                self._idle.put_nowait(slot)
+        return self._idle
+
+    async def start(self, warmup_latex: Optional[str] = None):
+        """Prime the TeX caches with one compile per slot; failures are
+        logged and counted in stats(), not raised"""
+        if not self.available:
+            return
+        slots = [await self._pool().get() for _ in self.slots]
+        try:
+            results = await asyncio.gather(
+                *(self._run(slot, warmup_latex or WARMUP_LATEX) for slot in slots),
+                return_exceptions=True
+            )
+        finally:
+            for slot in slots:
+                self._pool().put_nowait(slot)
+        failed = [r for r in results if isinstance(r, Exception)]
+        if failed:
+            self._stats["warmup_failures"] += len(failed)
+            self._warmup_error = str(failed[0])
+            logger.warning("LaTeX warm-up failed in %d of %d slot(s): %s", len(failed), len(slots), failed[0])
+
+    async def stop(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+        self._idle = None
+
+    def _command(self) -> List[str]:
+        if self.engine == "tectonic":
+            return [self.executable, "--untrusted", "--keep-logs", "--chatter", "minimal", "--outdir", ".", "cv.tex"]
+        return [self.executable, "-interaction=nonstopmode", "-halt-on-error", "-file-line-error",
+                "-no-shell-escape", "-jobname=cv", "cv.tex"]
+
+    def _environment(self) -> dict:
+        env = {key: os.environ[key] for key in ("PATH", "HOME", "LANG", "TEXMFHOME", "TEXMFVAR",
+                                                 "TEXMFCONFIG", "TECTONIC_CACHE_DIR") if key in os.environ}
+        # kpathsea "paranoid" mode: no absolute or parent paths, so documents only reach
+        # the scratch directory and the TeX trees
+        env.update(openin_any="p", openout_any="p", shell_escape="f")
+        return env
+
+    async def _run_engine(self, slot: CompileSlot) -> str:
+        process = await asyncio.create_subprocess_exec(
+            *self._command(), cwd=slot.directory, env=self._environment(),
+            stdin=asyncio.subprocess.DEVNULL, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+            start_new_session=True,
+            preexec_fn=_limit_resources(self.max_memory_mb, int(self.timeout) + 1) if resource else None
+        )
+        try:
+            output, _ = await asyncio.wait_for(process.communicate(), self.timeout)
+        except asyncio.TimeoutError:
+            self._stats["timeouts"] += 1
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            await process.wait()
+            raise CompileError(f"LaTeX compilation timed out after {self.timeout:g}s", [])
+        finally:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+        log_path = slot.directory / "cv.log"
+        log = log_path.read_text(encoding="utf-8", errors="replace") if log_path.exists() else ""
+        log = log or output.decode("utf-8", errors="replace")
+        if process.returncode != 0:
+            errors = parse_log_errors(log) or [{"line": None, "message": f"{self.engine} exited with {process.returncode}"}]
+            raise CompileError(errors[0]["message"], errors, log[-4000:])
+        return log
+
+    async def _run(self, slot: CompileSlot, latex: str) -> Path:
+        """Compile in the slot's directory; returns the PDF path there"""
+        await asyncio.to_thread(slot.reset)
+        (slot.directory / "cv.tex").write_text(latex, encoding="utf-8")
+        log = await self._run_engine(slot)
+        # pdflatex needs another pass for references; tectonic reruns by itself
+        if self.engine == "pdflatex" and RERUN.search(log):
+            await self._run_engine(slot)
+        slot.compiles += 1
+        pdf_path = slot.directory / "cv.pdf"
+        if not pdf_path.exists():
+            raise CompileError("LaTeX engine produced no PDF", [], log[-4000:])
+        return pdf_path
+
+    async def compile_to(self, latex: str, pdf_path: Path):
+        """Compile a document in the next free slot and move the PDF to pdf_path"""
+        if not self.available:
+            raise EngineUnavailableError("No LaTeX engine found; install tectonic or pdflatex")
+        slot = await self._pool().get()
+        start = time.perf_counter()
+        try:
+            compiled = await self._run(slot, latex)
+            os.replace(compiled, pdf_path)  # Scratch dirs sit on the same filesystem as data/
+            self._stats["compiles"] += 1
+        except CompileError:
+            self._stats["failures"] += 1
+            raise
+        finally:
+            self._stats["compile_seconds"] += time.perf_counter() - start
+            self._pool().put_nowait(slot)
+
+    async def get_pdf(self, generated_dir: Path, job_id: str, latex: str) -> Tuple[Path, bool]:
+        """PDF for a generated CV, cached by content hash next to its .tex.
+
+        Returns (path, cached). Concurrent requests for the same document
+        share one compile.
+        """
+        pdf_path = pdf_cache_path(generated_dir, job_id, latex, self.engine or "")
+        if pdf_path.exists():
+            self._stats["cache_hits"] += 1
+            return pdf_path, True
+        pending = self._in_flight.get(pdf_path)
+        if pending is not None:
+            await asyncio.shield(pending)
+            return pdf_path, True
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[pdf_path] = future
+        try:
+            tmp_path = pdf_path.with_name(f".{pdf_path.name}.tmp")
+            await self.compile_to(latex, tmp_path)
+            os.replace(tmp_path, pdf_path)
+            await asyncio.to_thread(_remove_stale_pdfs, generated_dir, job_id, pdf_path)
+            future.set_result(pdf_path)
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Waiters re-raise it; don't warn when there are none
+            raise
+        finally:
+            del self._in_flight[pdf_path]
+        return pdf_path, False
+
+    def stats(self) -> dict:
+        compiles = self._stats["compiles"] + self._stats["failures"]
+        return {
+            "engine": self.engine,
+            "slots": len(self.slots),
+            "compiles": self._stats["compiles"],
+            "failures": self._stats["failures"],
+            "timeouts": self._stats["timeouts"],
+            "cache_hits": self._stats["cache_hits"],
+            "warmup_failures": self._stats["warmup_failures"],
+            "warmup_error": self._warmup_error,
+            "mean_compile_seconds": round(self._stats["compile_seconds"] / compiles, 3) if compiles else None,
+        }
+
+
+def pdf_cache_path(generated_dir: Path, job_id: str, latex: str, engine: str) -> Path:
+    """data/generated/{job_id}.{content hash}.pdf"""
+    digest = hashlib.sha256(f"{engine}\n{latex}".encode("utf-8")).hexdigest()[:16]
+    return Path(generated_dir) / f"{job_id}.{digest}.pdf"
+
+
+def _remove_stale_pdfs(generated_dir: Path, job_id: str, keep: Path):
+    for path in Path(generated_dir).glob(f"{job_id}.*.pdf"):
+        if path != keep:
+            path.unlink(missing_ok=True)
+
+
+def create_latex_compiler(data_dir: Path) -> LatexCompiler:
+    """Compiler configured from the LATEX_* environment variables; scratch
+    directories live under data/cache/latex"""
+    return LatexCompiler(
+        Path(data_dir) / "cache" / "latex",
+        engine=os.getenv("LATEX_ENGINE", "auto").lower(),
+        workers=int(os.getenv("LATEX_WORKERS", "2")),
+        timeout=float(os.getenv("LATEX_COMPILE_TIMEOUT_SECONDS", "30")),
+        max_memory_mb=int(os.getenv("LATEX_MAX_MEMORY_MB", "2048")),
+        executable=os.getenv("LATEX_ENGINE_PATH") or None
+    )
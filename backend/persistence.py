@@ -0,0 +1,260 @@
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def atomic_write(file_path: Path, content: str):
+    """Write text to a file so readers never see a partial write.
+
+    The content goes to a temp file in the same directory, is fsynced, and
+    then renamed over the target, so a crash leaves either the old or the
+    new file on disk.
+    """
+    file_path = Path(file_path)
+    fd, tmp_path = tempfile.mkstemp(dir=file_path.parent, prefix=f".{file_path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    _fsync_dir(file_path.parent)
+
+
+def atomic_write_json(file_path: Path, data: any):
+    """Atomically write data as indented JSON"""
+    atomic_write(file_path, json.dumps(data, indent=2, ensure_ascii=False))
+
+
+def _fsync_dir(dir_path: Path):
+    """Persist a rename by syncing the containing directory (POSIX only)"""
+    if fcntl is None:
+        return
+    fd = os.open(dir_path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class FileLock:
+    """Re-entrant lock on a file, shared by threads and worker processes.
+
+    Threads in this process serialize on an RLock; other processes (e.g.
+    multiple uvicorn workers) are excluded with an OS lock on a sibling
+    ``.lock`` file. Use get_file_lock() so each path has a single instance.
+    """
+
+    def __init__(self, file_path: Path):
+        self.lock_path = Path(file_path).with_name(Path(file_path).name + ".lock")
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                self._fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+                self._lock_fd(self._fd)
+            except BaseException:
+                if self._fd is not None:
+                    os.close(self._fd)
+                    self._fd = None
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            try:
+                self._unlock_fd(self._fd)
+            finally:
+                os.close(self._fd)
+                self._fd = None
+        self._thread_lock.release()
+
+    @staticmethod
+    def _lock_fd(fd: int):
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            return
+        os.lseek(fd, 0, os.SEEK_SET)
+        while True:
+            try:
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue  # LK_LOCK gives up after ~10s; keep waiting
+
+    @staticmethod
+    def _unlock_fd(fd: int):
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+_file_locks: Dict[Path, FileLock] = {}
+_file_locks_guard = threading.Lock()
+
+
+def get_file_lock(file_path: Path) -> FileLock:
+    """Get the process-wide lock for a file path"""
+    key = Path(file_path).resolve()
+    with _file_locks_guard:
+        lock = _file_locks.get(key)
+        if lock is None:
+            lock = _file_locks[key] = FileLock(key)
+        return lock
+
+
+UNCHANGED = object()
+
+
+class CommitGroup:
+    """One round of writes coalesced by a GroupCommit"""
+
+    def __init__(self):
+        self.data = UNCHANGED  # Latest staged data, written when the group commits
+        self.members = 0
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.result = None  # What the write function returned
+
+
+class GroupCommit:
+    """Coalesces concurrent read-modify-writes of one file into one write.
+
+    The first writer takes the file lock and leads a group. Writers that
+    arrive while the group is open do not queue for the lock: one at a time,
+    they read and replace the group's staged data, and the leader writes it
+    once for all of them. Nobody returns before that write is on disk, and
+    the file lock is held until then, so other processes never see staged
+    data. Writers that arrive during the write form the next group. With no
+    concurrency this is a plain locked write. Use get_group_commit() so each
+    path has a single instance.
+    """
+
+    def __init__(self, lock: FileLock):
+        self.lock = lock
+        self._cond = threading.Condition(threading.Lock())
+        self._state = "idle"  # idle -> opening -> open -> writing -> idle
+        self._waiting = 0
+        self._group = CommitGroup()
+        self._members = threading.local()
+
+    def current(self) -> Optional[CommitGroup]:
+        """The group the calling thread is writing in, if any"""
+        return getattr(self._members, "group", None)
+
+    @contextmanager
+    def join(self, write: Callable[[any], any]):
+        """Run the block as a member of the open group, then wait for the
+        group's write: write(data) of the last staged data, called once in
+        the leader's thread. Yields the CommitGroup; the block stages data by
+        setting its data attribute. A failed write is raised in every member.
+        """
+        if self.current() is not None:
+            yield self.current()  # Nested block joins its own group
+            return
+        with self._cond:
+            leader = self._enter()
+            group = self._group
+            group.members += 1
+            self._members.group = group
+            try:
+                yield group
+            finally:
+                self._members.group = None
+                if leader:
+                    self._commit(group, write)
+                else:
+                    self._cond.notify_all()  # The leader may be waiting for us
+                    while not group.done:
+                        self._cond.wait()
+            if group.error is not None:
+                raise group.error
+
+    def _enter(self) -> bool:
+        """Wait for an open group, leading one if none is forming; called and
+        returns with the condition held. Returns whether this thread leads"""
+        while True:
+            if self._state == "open":
+                return False
+            if self._state == "idle":
+                self._state = "opening"
+                self._cond.release()
+                try:
+                    self.lock.acquire()
+                except BaseException:
+                    self._cond.acquire()
+                    self._state = "idle"
+                    self._cond.notify_all()
+                    raise
+                self._cond.acquire()
+                self._state = "open"
+                self._cond.notify_all()
+                return True
+            self._waiting += 1
+            self._cond.wait()
+            self._waiting -= 1
+
+    def _commit(self, group: CommitGroup, write: Callable[[any], any]):
+        """Write the group's data and release the file lock (leader only)"""
+        while self._waiting:
+            # Writers that queued during the previous write join this group
+            self._cond.wait()
+        self._state = "writing"
+        self._group = CommitGroup()
+        self._cond.release()
+        try:
+            if group.data is not UNCHANGED:
+                group.result = write(group.data)
+        except BaseException as e:
+            group.error = e
+        finally:
+            self.lock.release()
+            self._cond.acquire()
+            group.done = True
+            self._state = "idle"
+            self._cond.notify_all()
+
+
+_group_commits: Dict[Path, GroupCommit] = {}
+
+
+def get_group_commit(file_path: Path) -> GroupCommit:
+    """Get the process-wide group commit for a file path"""
+    key = Path(file_path).resolve()
+    lock = get_file_lock(key)
+    with _file_locks_guard:
+        group_commit = _group_commits.get(key)
+        if group_commit is None:
+            group_commit = _group_commits[key] = GroupCommit(lock)
+        return group_commit
@@ -0,0 +1,153 @@
+import json
+import os
+import re
+from typing import List, Tuple
+
+from models import Project
+
+
+PROMPT_ENCODINGS = ["compact", "json"]
+
+BEGIN_DOCUMENT = "\\begin{document}"
+END_DOCUMENT = "\\end{document}"
+VERBATIM_BEGIN = re.compile(r'\\begin\{(verbatim|lstlisting|minted)\*?\}')
+VERBATIM_END = re.compile(r'\\end\{(verbatim|lstlisting|minted)\*?\}')
+NEWCOMMAND_PATTERN = re.compile(r'\\(?:newcommand|renewcommand|providecommand|DeclareRobustCommand)\*?\s*\{?\s*(\\[A-Za-z@]+)')
+PREAMBLE_NOTE = "% [Preamble omitted and restored automatically. Start the output at \\begin{document}.{macros}]"
+
+
+def get_prompt_encoding() -> str:
+    """Prompt encoding from PROMPT_ENCODING: "json" (default) or "compact" """
+    encoding = os.getenv("PROMPT_ENCODING", "json").lower()
+    if encoding not in PROMPT_ENCODINGS:
+        raise ValueError(f"Unknown PROMPT_ENCODING '{encoding}', expected 'compact' or 'json'")
+    return encoding
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token) for reporting"""
+    return (len(text) + 3) // 4
+
+
+def _comment_start(line: str) -> int:
+    """Index of the first unescaped % in a line, or -1"""
+    backslashes = 0
+    for i, char in enumerate(line):
+        if char == "\\":
+            backslashes += 1
+            continue
+        if char == "%" and backslashes % 2 == 0:
+            return i
+        backslashes = 0
+    return -1
+
+
+def strip_latex_comments(latex: str) -> str:
+    """Remove comments, indentation, trailing spaces and repeated blank lines.
+
+    A trailing % that swallows a line break is kept (without its comment
+    text) so the typeset output does not change. Verbatim-like environments
+    are left untouched.
+    """
+    lines = []
+    in_verbatim = False
+    for line in latex.splitlines():
+        if in_verbatim:
+            lines.append(line)
+            in_verbatim = not VERBATIM_END.search(line)
+            continue
+        if VERBATIM_BEGIN.search(line):
+            in_verbatim = not VERBATIM_END.search(line)
+            lines.append(line.strip())
+            continue
+
+        comment = _comment_start(line)
+        if comment >= 0:
+            code = line[:comment]
+            if not code.strip():
+                continue  # Whole-line comment
+            line = code.lstrip() + "%"
+        else:
+            line = line.strip()
+
+        if not line and (not lines or not lines[-1]):
+            continue
+        lines.append(line)
+    return "\n".join(lines).strip()
+
+
+def compact_text(text: str) -> str:
+    """Drop trailing spaces and collapse runs of blank lines in free text"""
+    text = re.sub(r'[ \t]+\n', '\n', text.strip())
+    return re.sub(r'\n{3,}', '\n\n', text)
+
+
+def split_preamble(latex: str) -> Tuple[str, str]:
+    """Split a document into (preamble, body) at \\begin{document}.
+
+    The body starts with \\begin{document}. Without one the preamble is empty.
+    """
+    position = latex.find(BEGIN_DOCUMENT)
+    if position < 0:
+        return "", latex
+    return latex[:position], latex[position:]
+
+
+def compact_baseline_cv(baseline_cv: str) -> str:
+    """Baseline CV for the prompt: comments and whitespace stripped, and the
+    preamble replaced by a note listing the custom commands it defines"""
+    preamble, body = split_preamble(baseline_cv)
+    body = strip_latex_comments(body)
+    if not preamble:
+        return body
+    macros = list(dict.fromkeys(NEWCOMMAND_PATTERN.findall(strip_latex_comments(preamble))))
+    note = PREAMBLE_NOTE.replace("{macros}", f" Custom commands: {', '.join(macros)}" if macros else "")
+    return f"{note}\n{body}"
+
+
+def restore_preamble(generated: str, baseline_cv: str) -> str:
+    """Put the baseline's original preamble back in front of a generated body.
+
+    Anything the model wrote before \\begin{document} is replaced. Output
+    without \\begin{document} is taken as the body alone (see wrap_body).
+    """
+    preamble, _ = split_preamble(baseline_cv)
+    if not preamble:
+        return generated
+    position = generated.find(BEGIN_DOCUMENT)
+    if position < 0:
+        return wrap_body(preamble, generated)
+    return preamble + generated[position:]
+
+
+def wrap_body(preamble: str, body: str) -> str:
+    """A document from the baseline preamble and generated body content that
+    lacks \\begin{document}, adding \\end{document} when that is missing too"""
+    body = body.strip()
+    if END_DOCUMENT not in body:
+        body = f"{body}\n{END_DOCUMENT}"
+    return f"{preamble}{BEGIN_DOCUMENT}\n{body}\n"
+
+
+def encode_project(project: Project, with_id: bool = False) -> str:
+    """One project as a short text record, skipping empty fields (and the
+    id unless with_id)"""
+    details = ", ".join(value for value in (project.category, project.date_range) if value)
+    lines = [f"### {project.title}" + (f" ({details})" if details else "")]
+    if with_id:
+        lines.append(f"ID: {project.id}")
+    if project.technologies:
+        lines.append("Tech: " + ", ".join(project.technologies))
+    if project.description:
+        lines.append(" ".join(project.description.split()))
+    lines.extend(f"- {' '.join(bullet.split())}" for bullet in project.bullets if bullet.strip())
+    return "\n".join(lines)
+
+
+def encode_projects(projects: List[Project], encoding: str, with_ids: bool = False) -> str:
+    """Projects database block for the prompt, including its code fence.
+    JSON always includes ids; compact records only with_ids."""
+    if encoding == "compact":
+        return "```\n" + "\n\n".join(encode_project(p, with_ids) for p in projects) + "\n```"
+    projects_json = json.dumps([p.dict() for p in projects], indent=2, ensure_ascii=False)
+    return f"```json\n{projects_json}\n```"
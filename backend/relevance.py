@@ -0,0 +1,128 @@
+import math
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from models import Project
+
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is", "it", "of", "on",
+    "or", "our", "the", "to", "we", "with", "you", "your", "will", "this", "that", "using",
+}
+
+# Repeat weights for each project field in the indexed document
+FIELD_WEIGHTS = {"title": 3, "technologies": 2, "description": 1, "bullets": 1}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens, keeping names like c++, c# and node.js intact"""
+    tokens = (token.rstrip(".") for token in TOKEN_PATTERN.findall(text.lower()))
+    return [token for token in tokens if token and token not in STOPWORDS]
+
+
+def project_terms(project: Project) -> Counter:
+    """Weighted term frequencies of a project's searchable fields"""
+    terms = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        value = getattr(project, field)
+        text = " ".join(value) if isinstance(value, list) else value
+        for token in tokenize(text):
+            terms[token] += weight
+    return terms
+
+
+class ProjectIndex:
+    """In-memory BM25 inverted index over projects.
+
+    Supports incremental upsert/remove so it can follow project CRUD
+    without a full rebuild.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._doc_terms: Dict[str, Counter] = {}
+        self._doc_lengths: Dict[str, int] = {}
+        self._order: Dict[str, int] = {}  # insertion order, used to break ties
+        self._total_length = 0
+        self._next_order = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._doc_terms)
+
+    def rebuild(self, projects: List[Project]):
+        with self._lock:
+            self._postings.clear()
+            self._doc_terms.clear()
+            self._doc_lengths.clear()
+            self._order.clear()
+            self._total_length = 0
+            self._next_order = 0
+            for project in projects:
+                self._add(project)
+
+    def upsert(self, project: Project):
+        with self._lock:
+            order = self._order.get(project.id)
+            self._remove(project.id)
+            self._add(project)
+            if order is not None:
+                self._order[project.id] = order
+
+    def remove(self, project_id: str):
+        with self._lock:
+            self._remove(project_id)
+
+    def search(self, query: str, top_k: int) -> List[Tuple[str, float]]:
+        """Best top_k (project_id, score) pairs; unmatched projects fill the
+        remaining slots in insertion order with score 0"""
+        query_terms = set(tokenize(query))
+        with self._lock:
+            doc_count = len(self._doc_terms)
+            if doc_count == 0:
+                return []
+            avg_length = self._total_length / doc_count
+            scores: Dict[str, float] = {}
+            for term in query_terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[doc_id] / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], self._order[item[0]]))[:top_k]
+            if len(ranked) < top_k:
+                unscored = sorted((doc_id for doc_id in self._order if doc_id not in scores), key=self._order.get)
+                ranked.extend((doc_id, 0.0) for doc_id in unscored[:top_k - len(ranked)])
+            return ranked
+
+    def _add(self, project: Project):
+        terms = project_terms(project)
+        self._doc_terms[project.id] = terms
+        length = sum(terms.values())
+        self._doc_lengths[project.id] = length
+        self._total_length += length
+        self._order[project.id] = self._next_order
+        self._next_order += 1
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[project.id] = tf
+
+    def _remove(self, project_id: str):
+        terms = self._doc_terms.pop(project_id, None)
+        if terms is None:
+            return
+        self._total_length -= self._doc_lengths.pop(project_id)
+        self._order.pop(project_id, None)
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(project_id, None)
+                if not postings:
+                    del self._postings[term]
@@ -0,0 +1,318 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+import requests
+from google.genai import errors
+
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling upstream while the circuit breaker is open"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Gemini API unavailable, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+def is_retryable(error: Exception) -> bool:
+    """Rate limits, transient server errors and dropped connections"""
+    if isinstance(error, errors.APIError):
+        return error.code in RETRYABLE_STATUS_CODES
+    return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Retry-After header of an API error response, if any"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Token bucket rate limiter shared by threads and event loops.
+
+    rate is tokens per second and burst the bucket size; a rate of 0
+    disables limiting.
+    """
+
+    def __init__(self, rate: float, burst: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._clock = clock
+        self._tokens = self.burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token, returning how long the caller must wait before using it"""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            # A negative balance is a queue of reservations waiting for refill
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+class CircuitBreaker:
+    """Fails fast after failure_threshold consecutive failures.
+
+    After reset_timeout seconds the circuit lets a single trial call
+    through (half-open); its success closes the circuit, its failure opens
+    it again. A trial cancelled before it has an outcome hands the slot to
+    the next caller.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+
+    def allow(self) -> bool:
+        """Raise CircuitOpenError unless a call may go through now; returns
+        True when the caller is the half-open trial"""
+        if self.failure_threshold <= 0:
+            return False
+        with self._lock:
+            if self.state == "closed":
+                return False
+            remaining = self.opened_at + self.reset_timeout - self._clock()
+            if self.state == "open" and remaining <= 0:
+                self.state = "half_open"
+                return True
+            raise CircuitOpenError(max(remaining, 0.0) if self.state == "open" else self.reset_timeout)
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def record_response(self):
+        """The upstream answered with an error that says nothing about its
+        health (a 400, say): a half-open trial closes the circuit, other
+        calls change nothing"""
+        with self._lock:
+            if self.state == "half_open":
+                self.state = "closed"
+                self.failures = 0
+
+    def release_trial(self):
+        """Give up the half-open trial without an outcome (it was cancelled);
+        the next caller becomes the trial"""
+        with self._lock:
+            if self.state == "half_open":
+                self.state = "open"  # opened_at is unchanged, so the timeout has already passed
+
+    def record_failure(self):
+        if self.failure_threshold <= 0:
+            return
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.times_opened += 1
+                self.state = "open"
+                self.opened_at = self._clock()
+
+
+class ResilientCaller:
+    """Rate limiting, retries with exponential backoff and full jitter, and a
+    circuit breaker around calls to an upstream API.
+
+    Rate limit, server and connection errors are retried up to max_retries
+    times; they and timeouts count toward opening the circuit. The call
+    itself is passed in as a function, so a fake transport can stand in for
+    Gemini; clocks, sleeps and the random source are injectable as well.
+    """
+
+    def __init__(self, limiter: TokenBucket, breaker: CircuitBreaker, max_retries: int = 3,
+                 base_delay: float = 0.5, max_delay: float = 20.0,
+                 sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+                 sleep_sync: Callable[[float], None] = time.sleep, rng: random.Random = None):
+        self.limiter = limiter
+        self.breaker = breaker
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._sleep = sleep
+        self._sleep_sync = sleep_sync
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self.metrics = {
+            "calls": 0,
+            "successes": 0,
+            "failures": 0,
+            "retries": 0,
+            "circuit_rejections": 0,
+            "rate_limit_wait_seconds": 0.0,
+        }
+
+    def _count(self, name: str, value: float = 1):
+        with self._lock:
+            self.metrics[name] += value
+
+    def backoff(self, attempt: int, error: Exception) -> float:
+        """Delay before retry number attempt + 1: full jitter, or Retry-After"""
+        hinted = retry_after_seconds(error)
+        if hinted is not None:
+            return min(hinted, self.max_delay)
+        return self._rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _admit(self) -> tuple:
+        """Check the circuit and take a rate limit token; returns (the wait,
+        whether this attempt is the half-open trial)"""
+        try:
+            trial = self.breaker.allow()
+        except CircuitOpenError:
+            self._count("circuit_rejections")
+            raise
+        self._count("calls")
+        wait = self.limiter.reserve()
+        if wait > 0:
+            self._count("rate_limit_wait_seconds", wait)
+        return wait, trial
+
+    def _failed(self, error: Exception, attempt: int) -> float:
+        """Record a failed attempt and return the delay before the next one,
+        or re-raise the error when there is no next attempt"""
+        retryable = is_retryable(error)
+        if retryable or isinstance(error, asyncio.TimeoutError):
+            # A timeout says the upstream is unhealthy, but is not worth waiting for twice
+            self.breaker.record_failure()
+        else:
+            # Answered, if unhelpfully: a half-open trial must still end
+            self.breaker.record_response()
+        if not retryable:
+            raise error
+        if attempt >= self.max_retries:
+            self._count("failures")
+            raise error
+        self._count("retries")
+        return self.backoff(attempt, error)
+
+    def _succeeded(self):
+        self.breaker.record_success()
+        self._count("successes")
+
+    async def call(self, attempt_fn: Callable[[], Awaitable]):
+        """Await attempt_fn() (a fresh awaitable per attempt) with the full policy"""
+        attempt = 0
+        while True:
+            wait, trial = self._admit()
+            try:
+                if wait > 0:
+                    await self._sleep(wait)
+                result = await attempt_fn()
+            except Exception as e:
+                delay = self._failed(e, attempt)
+            except BaseException:
+                # Cancelled before an outcome: don't leave the circuit half-open for good
+                if trial:
+                    self.breaker.release_trial()
+                raise
+            else:
+                self._succeeded()
+                return result
+            await self._sleep(delay)
+            attempt += 1
+
+    def call_sync(self, attempt_fn: Callable[[], object]):
+        """Blocking version of call() for synchronous callers"""
+        attempt = 0
+        while True:
+            wait, trial = self._admit()
+            try:
+                if wait > 0:
+                    self._sleep_sync(wait)
+                result = attempt_fn()
+            except Exception as e:
+                delay = self._failed(e, attempt)
+            except BaseException:
+                if trial:
+                    self.breaker.release_trial()
+                raise
+            else:
+                self._succeeded()
+                return result
+            self._sleep_sync(delay)
+            attempt += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            metrics = dict(self.metrics)
+        metrics["rate_limit_wait_seconds"] = round(metrics["rate_limit_wait_seconds"], 3)
+        metrics["circuit_state"] = self.breaker.state
+        metrics["circuit_opened"] = self.breaker.times_opened
+        return metrics
+
+
+def _read_config() -> tuple:
+    return (
+        float(os.getenv("GEMINI_RATE_LIMIT_PER_MINUTE", "0")),
+        float(os.getenv("GEMINI_RATE_LIMIT_BURST", "5")),
+        int(os.getenv("GEMINI_MAX_RETRIES", "3")),
+        float(os.getenv("GEMINI_RETRY_BASE_SECONDS", "0.5")),
+        float(os.getenv("GEMINI_RETRY_MAX_SECONDS", "20")),
+        int(os.getenv("GEMINI_CIRCUIT_FAILURES", "5")),
+        float(os.getenv("GEMINI_CIRCUIT_RESET_SECONDS", "30")),
+    )
+
+
+_callers: Dict[str, ResilientCaller] = {}
+_callers_config: Optional[tuple] = None
+_callers_lock = threading.Lock()
+
+
+def get_resilient_caller(model: str) -> ResilientCaller:
+    """Process-wide ResilientCaller for one Gemini model (quotas and outages
+    are per model), rebuilt when the settings change"""
+    global _callers_config
+    config = _read_config()
+    with _callers_lock:
+        if _callers_config != config:
+            _callers.clear()
+            _callers_config = config
+        caller = _callers.get(model)
+        if caller is None:
+            per_minute, burst, max_retries, base_delay, max_delay, failures, reset_timeout = config
+            caller = ResilientCaller(
+                TokenBucket(per_minute / 60, burst),
+                CircuitBreaker(failures, reset_timeout),
+                max_retries=max_retries,
+                base_delay=base_delay,
+                max_delay=max_delay,
+            )
+            _callers[model] = caller
+        return caller
+
+
+def resilience_stats() -> Dict[str, dict]:
+    """Call, retry and circuit metrics per model"""
+    with _callers_lock:
+        callers = dict(_callers)
+    return {model: caller.stats() for model, caller in callers.items()}
+
+
+def reset_resilient_callers():
+    """Drop all callers and their state; the next calls build fresh ones"""
+    global _callers_config
+    with _callers_lock:
+        _callers.clear()
+        _callers_config = None
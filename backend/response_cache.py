@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from persistence import atomic_write_json
+
+
+def content_hash(*parts) -> str:
+    """Stable SHA-256 over JSON-serializable parts"""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """Persistent content-addressed cache of JSON values on disk.
+
+    Each entry is one file named by its key. An in-memory LRU index tracks
+    size and age so the cache can enforce max_entries, max_bytes and
+    ttl_seconds. Several worker processes may share the directory; an entry
+    evicted by another process simply reads as a miss.
+
+    get() and put() do blocking file I/O (put fsyncs), so async callers
+    run them with asyncio.to_thread.
+    """
+
+    def __init__(self, directory: Path, max_entries: int = 500, max_bytes: int = 50 * 1024 * 1024,
+                 ttl_seconds: Optional[float] = None):
+        self.directory = Path(directory)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # key -> (size_bytes, created_at), least recently used first
+        self._index: "OrderedDict[str, tuple]" = OrderedDict()
+        self._total_bytes = 0
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        entries = []
+        for path in self.directory.glob("*.json"):
+            stat = path.stat()
+            entries.append((stat.st_mtime, path.stem, stat.st_size))
+        for mtime, key, size in sorted(entries):
+            self._index[key] = (size, mtime)
+            self._total_bytes += size
+        with self._lock:
+            self._evict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return the cached value, or None on a miss or expired entry"""
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, ValueError):
+            with self._lock:
+                self.misses += 1
+                self._forget(key)
+            return None
+
+        if self.ttl_seconds and time.time() - entry["created_at"] > self.ttl_seconds:
+            with self._lock:
+                self.misses += 1
+                self._remove(key)
+            return None
+
+        with self._lock:
+            self.hits += 1
+            if key not in self._index:
+                # Written by another worker process
+                self._index[key] = (path.stat().st_size, entry["created_at"])
+                self._total_bytes += self._index[key][0]
+            self._index.move_to_end(key)
+        try:
+            os.utime(path)  # Keep LRU order across restarts
+        except FileNotFoundError:
+            pass
+        return entry["value"]
+
+    def put(self, key: str, value: dict):
+        """Store a value and evict old entries beyond the limits"""
+        if not self.enabled:
+            return
+        created_at = time.time()
+        path = self._path(key)
+        atomic_write_json(path, {"created_at": created_at, "value": value})
+        size = path.stat().st_size
+        with self._lock:
+            self._forget(key)
+            self._index[key] = (size, created_at)
+            self._total_bytes += size
+            self._evict()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._index),
+                "bytes": self._total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def _forget(self, key: str):
+        """Drop a key from the index (lock held)"""
+        entry = self._index.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= entry[0]
+
+    def _remove(self, key: str):
+        """Drop a key from the index and disk (lock held)"""
+        self._forget(key)
+        try:
+            self._path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        """Remove expired, then least recently used entries (lock held)"""
+        if self.ttl_seconds:
+            cutoff = time.time() - self.ttl_seconds
+            for key in [k for k, (_, created_at) in self._index.items() if created_at < cutoff]:
+                self._remove(key)
+        while self._index and (len(self._index) > self.max_entries or self._total_bytes > self.max_bytes):
+            self._remove(next(iter(self._index)))
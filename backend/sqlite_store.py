@@ -0,0 +1,497 @@
+import json
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from change_log import tombstone_cutoff
+from data_manager import (
+    DataManager, generate_stable_id, encode_cursor, decode_cursor, check_fields, change_key,
+    PROJECT_SORTS, HISTORY_FIELDS, PROJECT_FIELDS
+)
+from models import Project, ProjectCreate, ProjectUpdate, CVHistoryItem, PersonalInfo, SkillCategory
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL,
+    technologies TEXT NOT NULL DEFAULT '[]',
+    date_range TEXT NOT NULL,
+    category TEXT NOT NULL,
+    bullets TEXT NOT NULL DEFAULT '[]'
+);
+CREATE INDEX IF NOT EXISTS idx_projects_category ON projects (category);
+CREATE INDEX IF NOT EXISTS idx_projects_title ON projects (lower(title));
+
+CREATE TABLE IF NOT EXISTS cv_history (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL UNIQUE,
+    company TEXT,
+    position TEXT,
+    generated_at TEXT NOT NULL,
+    file_path TEXT NOT NULL,
+    model TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_cv_history_generated_at ON cv_history (generated_at);
+
+CREATE TABLE IF NOT EXISTS kv (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+INSERT OR IGNORE INTO kv (key, value) VALUES ('projects_version', '0');
+
+CREATE TABLE IF NOT EXISTS changes (
+    key TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    changed_at TEXT NOT NULL,
+    deleted INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_changes_version ON changes (version);
+INSERT OR IGNORE INTO kv (key, value) VALUES ('change_version', '0');
+"""
+
+# Rows fetched per query while streaming an export
+EXPORT_PAGE_SIZE = 500
+# Expired deletion markers are dropped once every this many changes
+COMPACT_EVERY_VERSIONS = 1000
+
+PROJECT_COLUMNS = ["id", "title", "description", "technologies", "date_range", "category", "bullets"]
+HISTORY_COLUMNS = ["job_id", "company", "position", "generated_at", "file_path", "model"]
+
+
+def _project_row(project: dict) -> tuple:
+    """Flatten a project dict into column values"""
+    return (
+        project["id"], project["title"], project["description"],
+        json.dumps(project.get("technologies", []), ensure_ascii=False),
+        project["date_range"], project["category"],
+        json.dumps(project.get("bullets", []), ensure_ascii=False),
+    )
+
+
+def _project_dict(row: sqlite3.Row) -> dict:
+    """Rebuild a project dict from a row"""
+    data = {column: row[column] for column in PROJECT_COLUMNS}
+    data["technologies"] = json.loads(data["technologies"])
+    data["bullets"] = json.loads(data["bullets"])
+    return data
+
+
+class SQLiteDataManager(DataManager):
+    """DataManager backed by a SQLite database in WAL mode.
+
+    Projects and CV history are rows, so mutations no longer rewrite the
+    whole portfolio, and several uvicorn workers can read concurrently.
+    The baseline CV and generated .tex files stay on disk as before.
+    """
+
+    def _init_storage(self):
+        """Open the database, create the schema and migrate JSON data once"""
+        self.db_file = self.data_dir / "cvcraft.db"
+        self._local = threading.local()
+        self._projects_cache = None
+        self._projects_cache_lock = threading.Lock()
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        history_columns = {row["name"] for row in conn.execute("PRAGMA table_info(cv_history)")}
+        if "model" not in history_columns:
+            conn.execute("ALTER TABLE cv_history ADD COLUMN model TEXT")  # Databases created before model routing
+        if self._get_kv("migrated_from_json") is None:
+            self.migrate_from_json()
+
+    def _conn(self) -> sqlite3.Connection:
+        """Per-thread connection (sqlite3 connections are not thread-safe)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file, isolation_level=None, check_same_thread=False, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def batch(self):
+        """Run the enclosed operations in one write transaction"""
+        conn = self._conn()
+        if conn.in_transaction:
+            yield  # Nested batch joins the outer transaction
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @contextmanager
+    def _locked(self, file_path: Path):
+        """Read-modify-write sequences run inside a write transaction"""
+        with self.batch():
+            yield
+
+    def _in_batch(self) -> bool:
+        return self._conn().in_transaction
+
+    def clear_cache(self):
+        """Drop the cached project models"""
+        self._projects_cache = None
+
+    # ===== Key/Value Metadata =====
+
+    def _get_kv(self, key: str) -> any:
+        row = self._conn().execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+        return json.loads(row["value"]) if row else None
+
+    def _set_kv(self, key: str, value: any):
+        self._conn().execute(
+            "INSERT INTO kv (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, json.dumps(value, ensure_ascii=False))
+        )
+
+    def _get_metadata_value(self, key: str) -> any:
+        return self._get_kv(key)
+
+    def _set_metadata_value(self, key: str, value: any):
+        self._set_kv(key, value)
+
+    # ===== Projects Operations =====
+
+    def _projects_version(self) -> int:
+        """Counter bumped by every project write, in any process"""
+        return self._get_kv("projects_version")
+
+    def _bump_projects_version(self):
+        self._conn().execute(
+            "UPDATE kv SET value = CAST(CAST(value AS INTEGER) + 1 AS TEXT) WHERE key = 'projects_version'"
+        )
+
+    def _projects_view(self) -> tuple:
+        """Cached Project models and index, reloaded when the version moves"""
+        version = self._projects_version()
+        cached = self._projects_cache
+        if cached is not None and cached[0] == version:
+            return cached[1], cached[2]
+        rows = self._conn().execute(f"SELECT {', '.join(PROJECT_COLUMNS)} FROM projects ORDER BY seq").fetchall()
+        models = [Project(**_project_dict(row)) for row in rows]
+        index = {model.id: model for model in models}
+        with self._projects_cache_lock:
+            self._projects_cache = (version, models, index)
+        return models, index
+
+    def get_project(self, project_id: str) -> Optional[Project]:
+        """Get a specific project by ID"""
+        row = self._conn().execute(
+            f"SELECT {', '.join(PROJECT_COLUMNS)} FROM projects WHERE id = ?", (project_id,)
+        ).fetchone()
+        return Project(**_project_dict(row)) if row else None
+
+    def _upsert_project(self, project: dict):
+        self._conn().execute(
+            f"INSERT INTO projects ({', '.join(PROJECT_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET title = excluded.title, description = excluded.description, "
+            "technologies = excluded.technologies, date_range = excluded.date_range, "
+            "category = excluded.category, bullets = excluded.bullets",
+            _project_row(project)
+        )
+        self._bump_projects_version()
+
+    def create_project(self, project_data: ProjectCreate) -> Project:
+        """Create a new project, or update the one with the same stable ID"""
+        new_project = Project(id=generate_stable_id(project_data.title), **project_data.dict())
+        with self._projects_write() as changes:
+            self._upsert_project(new_project.dict())
+            changes["upserted"].append(new_project)
+        return new_project
+
+    def update_project(self, project_id: str, project_data: ProjectUpdate) -> Optional[Project]:
+        """Update an existing project"""
+        with self._projects_write() as changes:
+            existing = self.get_project(project_id)
+            if existing is None:
+                return None
+            updated = Project(**{**existing.dict(), **project_data.dict(exclude_unset=True)})
+            self._upsert_project(updated.dict())
+            changes["upserted"].append(updated)
+        return updated
+
+    def delete_project(self, project_id: str) -> bool:
+        """Delete a project"""
+        with self._projects_write() as changes:
+            deleted = self._conn().execute("DELETE FROM projects WHERE id = ?", (project_id,)).rowcount
+            if deleted:
+                self._bump_projects_version()
+                changes["removed"].append(project_id)
+        return deleted > 0
+
+    def query_projects(self, category: Optional[str] = None, technology: Optional[str] = None,
+                       search: Optional[str] = None, sort: str = "created", order: str = "asc",
+                       limit: Optional[int] = None, cursor: Optional[str] = None,
+                       fields: Optional[List[str]] = None) -> dict:
+        """Filter, sort and page through projects with a keyset query"""
+        if sort not in PROJECT_SORTS:
+            raise ValueError(f"Unknown sort '{sort}'. Allowed: {', '.join(PROJECT_SORTS)}")
+        fields = check_fields(fields, PROJECT_FIELDS, "id")
+        sort_columns = {"created": ["seq"], "title": ["lower(title)", "seq"], "category": ["category", "seq"]}[sort]
+
+        where, params = [], []
+        if category:
+            where.append("category = ?")
+            params.append(category)
+        if technology:
+            where.append("EXISTS (SELECT 1 FROM json_each(technologies) WHERE lower(json_each.value) = ?)")
+            params.append(technology.lower())
+        if search:
+            where.append("instr(lower(title || ' ' || description), ?) > 0")
+            params.append(search.lower())
+
+        rows, next_cursor = self._keyset_query(
+            "projects", PROJECT_COLUMNS, sort, sort_columns, where, params, order == "desc", limit, cursor
+        )
+        items = [_project_dict(row) for row in rows]
+        if fields:
+            items = [{f: item[f] for f in fields} for item in items]
+        return {"items": items, "next_cursor": next_cursor}
+
+    def _keyset_query(self, table: str, columns: List[str], sort: str, sort_columns: List[str], where: List[str],
+                      params: list, descending: bool, limit: Optional[int], cursor: Optional[str]) -> tuple:
+        """Run a keyset-paginated SELECT; returns (rows, next_cursor). Cursors
+        are tied to the sort name and direction they were issued for."""
+        where, params = list(where), list(params)
+        if cursor:
+            after = decode_cursor(cursor, sort, descending, len(sort_columns))
+            where.append(f"({', '.join(sort_columns)}) {'<' if descending else '>'} ({', '.join('?' * len(after))})")
+            params.extend(after)
+
+        direction = "DESC" if descending else "ASC"
+        sql = f"SELECT {', '.join(columns)}, {', '.join(f'{c} AS _k{i}' for i, c in enumerate(sort_columns))} FROM {table}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY " + ", ".join(f"{c} {direction}" for c in sort_columns)
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit + 1)
+
+        rows = self._conn().execute(sql, params).fetchall()
+        next_cursor = None
+        if limit and len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor(sort, descending, [last[f"_k{i}"] for i in range(len(sort_columns))])
+        return rows, next_cursor
+
+    def _project_ids(self) -> set:
+        return {row["id"] for row in self._conn().execute("SELECT id FROM projects")}
+
+    def _insert_projects(self, items: List[dict]):
+        if not items:
+            return
+        with self._projects_write() as changes:
+            self._conn().executemany(
+                f"INSERT OR IGNORE INTO projects ({', '.join(PROJECT_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [_project_row(item) for item in items]
+            )
+            self._bump_projects_version()
+            changes["upserted"].extend(Project(**item) for item in items)
+
+    # ===== Generated CV Operations =====
+
+    def _add_history_item(self, item: dict):
+        with self.batch():
+            self._conn().execute(
+                f"INSERT OR REPLACE INTO cv_history ({', '.join(HISTORY_COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in HISTORY_COLUMNS)})",
+                tuple(item.get(column) for column in HISTORY_COLUMNS)
+            )
+            self._record_changes([change_key("history", item["job_id"])])
+
+    def get_cv_history(self) -> List[CVHistoryItem]:
+        """Get CV generation history, newest first"""
+        rows = self._conn().execute(
+            f"SELECT {', '.join(HISTORY_COLUMNS)} FROM cv_history ORDER BY seq DESC"
+        ).fetchall()
+        return [CVHistoryItem(**dict(row)) for row in rows]
+
+    def query_cv_history(self, company: Optional[str] = None, since: Optional[str] = None,
+                         until: Optional[str] = None, order: str = "desc", limit: Optional[int] = None,
+                         cursor: Optional[str] = None, fields: Optional[List[str]] = None) -> dict:
+        """Filter and page through CV history using the generated_at index"""
+        fields = check_fields(fields, HISTORY_FIELDS, "job_id")
+        where, params = [], []
+        if company:
+            where.append("instr(lower(company), ?) > 0")
+            params.append(company.lower())
+        if since:
+            where.append("generated_at >= ?")
+            params.append(since)
+        if until:
+            where.append("generated_at < ?")
+            params.append(until)
+
+        rows, next_cursor = self._keyset_query(
+            "cv_history", HISTORY_COLUMNS, "generated_at", ["generated_at", "seq"], where, params, order == "desc",
+            limit, cursor
+        )
+        items = [{column: row[column] for column in (fields or HISTORY_COLUMNS)} for row in rows]
+        return {"items": items, "next_cursor": next_cursor}
+
+    # ===== Personal Info Operations =====
+
+    def get_personal_info(self) -> PersonalInfo:
+        """Get personal information"""
+        return PersonalInfo(**(self._get_kv("personal_info") or {}))
+
+    def save_personal_info(self, personal_info: PersonalInfo) -> dict:
+        """Save personal information"""
+        with self.batch():
+            self._set_kv("personal_info", personal_info.dict())
+            self._record_changes([change_key("personal_info")])
+        return {"message": "Personal information saved successfully"}
+
+    # ===== Skills Operations =====
+
+    def get_skills(self) -> List[SkillCategory]:
+        """Get all skills"""
+        return [SkillCategory(**item) for item in (self._get_kv("skills") or [])]
+
+    def save_skills(self, skills: List[SkillCategory]) -> dict:
+        """Save skills"""
+        with self.batch():
+            self._set_kv("skills", [skill.dict() for skill in skills])
+            self._record_changes([change_key("skills")])
+        return {"message": "Skills saved successfully"}
+
+    # ===== Change Log & Export =====
+
+    def _record_changes(self, keys: List[str], deleted: List[str] = ()):
+        if not keys and not deleted:
+            return
+        with self.batch():
+            conn = self._conn()
+            conn.execute("UPDATE kv SET value = CAST(CAST(value AS INTEGER) + 1 AS TEXT) WHERE key = 'change_version'")
+            version = self.change_version()
+            changed_at = datetime.now().isoformat()
+            conn.executemany(
+                "INSERT INTO changes (key, version, changed_at, deleted) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET version = excluded.version, "
+                "changed_at = excluded.changed_at, deleted = excluded.deleted",
+                [(key, version, changed_at, 0) for key in keys] + [(key, version, changed_at, 1) for key in deleted]
+            )
+            if version % COMPACT_EVERY_VERSIONS == 0:
+                self._drop_old_tombstones()
+
+    def _drop_old_tombstones(self):
+        """Delete deletion markers past the retention period, raising the floor"""
+        conn = self._conn()
+        cutoff = tombstone_cutoff()
+        newest = conn.execute(
+            "SELECT MAX(version), MAX(changed_at) FROM changes WHERE deleted = 1 AND changed_at < ?", (cutoff,)
+        ).fetchone()
+        if newest[0] is None:
+            return
+        floor_version, floor_at = self._change_floor()
+        self._set_kv("change_floor", [max(floor_version, newest[0]), max(floor_at, newest[1])])
+        conn.execute("DELETE FROM changes WHERE deleted = 1 AND changed_at < ?", (cutoff,))
+
+    def _change_floor(self) -> tuple:
+        return tuple(self._get_kv("change_floor") or (0, ""))
+
+    def change_version(self) -> int:
+        return self._get_kv("change_version")
+
+    def _iter_changes(self, since_version: Optional[int], since: Optional[str]) -> Iterator[tuple]:
+        """Changed records by version, one page at a time"""
+        where, params = "version > ?", [since_version or 0]
+        while True:
+            rows = self._conn().execute(
+                f"SELECT key, version, changed_at, deleted FROM changes "
+                f"WHERE {where} AND changed_at >= ? ORDER BY version, key LIMIT ?",
+                (*params, since or "", EXPORT_PAGE_SIZE)
+            ).fetchall()
+            for row in rows:
+                yield row["key"], row["version"], row["changed_at"], bool(row["deleted"])
+            if len(rows) < EXPORT_PAGE_SIZE:
+                return
+            where, params = "(version, key) > (?, ?)", [rows[-1]["version"], rows[-1]["key"]]
+
+    def _iter_projects(self) -> Iterator[dict]:
+        """Projects in insertion order, one page at a time"""
+        last = 0
+        while True:
+            rows = self._conn().execute(
+                f"SELECT seq, {', '.join(PROJECT_COLUMNS)} FROM projects WHERE seq > ? ORDER BY seq LIMIT ?",
+                (last, EXPORT_PAGE_SIZE)
+            ).fetchall()
+            for row in rows:
+                yield _project_dict(row)
+            if len(rows) < EXPORT_PAGE_SIZE:
+                return
+            last = rows[-1]["seq"]
+
+    def _iter_history(self) -> Iterator[dict]:
+        last = 0
+        while True:
+            rows = self._conn().execute(
+                f"SELECT seq, {', '.join(HISTORY_COLUMNS)} FROM cv_history WHERE seq > ? ORDER BY seq LIMIT ?",
+                (last, EXPORT_PAGE_SIZE)
+            ).fetchall()
+            for row in rows:
+                yield {column: row[column] for column in HISTORY_COLUMNS}
+            if len(rows) < EXPORT_PAGE_SIZE:
+                return
+            last = rows[-1]["seq"]
+
+    def _get_history_record(self, job_id: str) -> Optional[dict]:
+        row = self._conn().execute(
+            f"SELECT {', '.join(HISTORY_COLUMNS)} FROM cv_history WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    # ===== Migration =====
+
+    def migrate_from_json(self) -> dict:
+        """One-shot import of projects.json, personal_info.json, skills.json
+        and metadata.json into the database.
+
+        The JSON files are left in place as a backup. Returns row counts.
+        """
+        def read(file_path: Path, default):
+            if not file_path.exists():
+                return default
+            with open(file_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+
+        projects = read(self.projects_file, [])
+        metadata = read(self.metadata_file, {})
+        history = metadata.get("cv_history", [])
+
+        with self.batch():
+            if self._get_kv("migrated_from_json") is not None:
+                return {"projects": 0, "cv_history": 0}
+            self._insert_projects([Project(**item).dict() for item in projects])
+            # History is stored newest first; insert oldest first so seq order matches
+            for item in reversed(history):
+                self._add_history_item(CVHistoryItem(**item).dict())
+            if self.personal_info_file.exists():
+                self._set_kv("personal_info", read(self.personal_info_file, {}))
+            if self.skills_file.exists():
+                self._set_kv("skills", read(self.skills_file, []))
+            self._set_kv("baseline_cv_uploaded_at", metadata.get("baseline_cv_uploaded_at"))
+            self._set_kv("migrated_from_json", True)
+
+        return {"projects": len(projects), "cv_history": len(history)}
+
+
+if __name__ == "__main__":
+    # python sqlite_store.py [data_dir] - create the database and run the JSON migration
+    manager = SQLiteDataManager(sys.argv[1] if len(sys.argv) > 1 else "../data")
+    print(f"Database ready at {manager.db_file}")
@@ -0,0 +1,237 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Deque, Dict, Optional
+
+from data_manager import DataManager, create_data_manager
+
+
+TENANT_MODES = ["none", "header", "token"]
+USER_HEADER = "X-User-ID"
+# Single-tenant mode (and jobs created before multi-tenancy) belong to this user
+DEFAULT_USER = "default"
+USER_ID = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_.@-]{0,63}$')
+
+
+class TenantAuthError(Exception):
+    """Raised when a request carries no valid user id or token"""
+
+
+class QuotaExceededError(Exception):
+    """Raised when a user has used up their generations for the hour"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def check_user_id(user_id: str) -> str:
+    # Ids name directories, so only a safe character set is accepted
+    if not USER_ID.match(user_id or ""):
+        raise TenantAuthError("Invalid user id: use 1-64 letters, digits, '_', '.', '@' or '-'")
+    return user_id
+
+
+def _signature(user_id: str, secret: str) -> str:
+    digest = hmac.new(secret.encode("utf-8"), user_id.encode("utf-8"), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).decode().rstrip("=")
+
+
+def issue_token(user_id: str, secret: str) -> str:
+    """Bearer token for a user: "<user_id>.<HMAC-SHA256 of the id>" """
+    return f"{check_user_id(user_id)}.{_signature(user_id, secret)}"
+
+
+def verify_token(token: str, secret: str) -> str:
+    """User id of a token issued with the same secret"""
+    user_id, _, signature = token.rpartition(".")
+    if not user_id or not hmac.compare_digest(signature, _signature(user_id, secret)):
+        raise TenantAuthError("Invalid token")
+    return check_user_id(user_id)
+
+
+def shard_dir(data_dir: Path, user_id: str) -> Path:
+    """data/users/<2 hex chars of the id's hash>/<user_id>, so no directory
+    holds more than a few hundred entries per 100k users"""
+    shard = hashlib.sha256(user_id.encode("utf-8")).hexdigest()[:2]
+    return Path(data_dir) / "users" / shard / user_id
+
+
+class TenantPool:
+    """Resolves users and hands out their DataManagers.
+
+    mode "none" serves one store in data_dir, as before multi-tenancy.
+    "header" trusts the X-User-ID header (for deployments behind an
+    authenticating proxy) and "token" expects an "Authorization: Bearer"
+    token from issue_token(). Each user's store lives in its own shard
+    directory and is opened on first use; at most max_open stores stay
+    open, least recently used first out. An evicted store is simply
+    reopened later; requests still holding it finish normally, since file
+    locks are shared per path across instances.
+    """
+
+    def __init__(self, data_dir: Path, mode: str = "none", secret: Optional[str] = None, max_open: int = 64):
+        if mode not in TENANT_MODES:
+            raise ValueError(f"Unknown TENANT_AUTH '{mode}', expected 'none', 'header' or 'token'")
+        if mode == "token" and not secret:
+            raise ValueError("TENANT_AUTH=token needs TENANT_TOKEN_SECRET")
+        self.data_dir = Path(data_dir)
+        self.mode = mode
+        self.secret = secret
+        self.max_open = max(1, max_open)
+        self._stores: "OrderedDict[str, DataManager]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.evicted = 0
+        self.default = create_data_manager(str(self.data_dir)) if mode == "none" else None
+
+    @property
+    def multi_tenant(self) -> bool:
+        return self.mode != "none"
+
+    def resolve(self, headers) -> str:
+        """User id for a request's headers; raises TenantAuthError"""
+        if self.mode == "none":
+            return DEFAULT_USER
+        if self.mode == "header":
+            user_id = headers.get(USER_HEADER)
+            if not user_id:
+                raise TenantAuthError(f"Missing {USER_HEADER} header")
+            return check_user_id(user_id.strip())
+        scheme, _, token = (headers.get("authorization") or "").partition(" ")
+        if scheme.lower() != "bearer" or not token.strip():
+            raise TenantAuthError("Missing bearer token")
+        return verify_token(token.strip(), self.secret)
+
+    def get(self, user_id: str) -> DataManager:
+        """The user's store, opened on first use"""
+        if self.default is not None:
+            return self.default
+        with self._lock:
+            store = self._stores.get(user_id)
+            if store is not None:
+                self._stores.move_to_end(user_id)
+                return store
+        # Opening creates directories (and runs the SQLite schema), so not under the lock
+        store = create_data_manager(str(shard_dir(self.data_dir, user_id)))
+        with self._lock:
+            existing = self._stores.get(user_id)
+            if existing is not None:
+                self._stores.move_to_end(user_id)
+                return existing  # Opened concurrently; keep the first
+            self._stores[user_id] = store
+            self.opened += 1
+            while len(self._stores) > self.max_open:
+                self._stores.popitem(last=False)
+                self.evicted += 1
+        return store
+
+    def stats(self) -> dict:
+        return {"mode": self.mode, "open_stores": len(self._stores) if self.multi_tenant else 1,
+                "max_open": self.max_open, "opened": self.opened, "evicted": self.evicted}
+
+
+class TenantLimiter:
+    """Per-user generation limits, so one heavy user can't take every
+    model call: at most max_concurrent generations at a time (others
+    wait), and at most per_hour started in any rolling hour (0: no
+    limit). State lives in this worker process only."""
+
+    def __init__(self, max_concurrent: int = 4, per_hour: int = 0):
+        self.max_concurrent = max_concurrent
+        self.per_hour = per_hour
+        self._slots: Dict[str, list] = {}  # user -> [semaphore, holders and waiters]
+        self._usage: Dict[str, Deque[float]] = {}  # user -> start times in the last hour
+        self._lock = threading.Lock()
+
+    def consume(self, user_id: str, count: int = 1):
+        """Count count generations against the user's hourly quota, or
+        raise QuotaExceededError without counting any"""
+        if not self.per_hour:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if len(self._usage) > 1024:
+                # Forget users idle for an hour
+                for user, times in list(self._usage.items()):
+                    if not times or times[-1] <= now - 3600:
+                        del self._usage[user]
+            usage = self._usage.setdefault(user_id, deque())
+            while usage and usage[0] <= now - 3600:
+                usage.popleft()
+            if len(usage) + count > self.per_hour:
+                # Wait until enough of the oldest starts leave the window
+                freed = len(usage) + count - self.per_hour
+                retry_after = usage[freed - 1] + 3600 - now if count <= self.per_hour else 3600
+                raise QuotaExceededError(
+                    f"Generation quota exceeded ({self.per_hour} per hour, {len(usage)} used)", max(1.0, retry_after)
+                )
+            usage.extend([now] * count)
+
+    def refund(self, user_id: str, count: int = 1):
+        """Give back count generations that were counted but never reached
+        the model (queue full, circuit open, cancelled while waiting)"""
+        if not self.per_hour or count <= 0:
+            return
+        with self._lock:
+            usage = self._usage.get(user_id)
+            for _ in range(min(count, len(usage or ()))):
+                usage.pop()
+
+    @asynccontextmanager
+    async def slot(self, user_id: str):
+        """Hold one of the user's generation slots"""
+        if not self.max_concurrent:
+            yield
+            return
+        state = self._slots.get(user_id)
+        if state is None:
+            state = self._slots[user_id] = [asyncio.Semaphore(self.max_concurrent), 0]
+        state[1] += 1
+        try:
+            async with state[0]:
+                yield
+        finally:
+            state[1] -= 1
+            if state[1] == 0:
+                del self._slots[user_id]
+
+    def stats(self) -> dict:
+        return {"max_concurrent": self.max_concurrent, "per_hour": self.per_hour,
+                "active_users": len(self._slots)}
+
+
+def create_tenant_pool(data_dir: str = "../data") -> TenantPool:
+    """Pool configured from TENANT_AUTH, TENANT_TOKEN_SECRET and TENANT_POOL_SIZE"""
+    return TenantPool(
+        Path(data_dir),
+        mode=os.getenv("TENANT_AUTH", "none").lower(),
+        secret=os.getenv("TENANT_TOKEN_SECRET") or None,
+        max_open=int(os.getenv("TENANT_POOL_SIZE", "64"))
+    )
+
+
+def create_tenant_limiter() -> TenantLimiter:
+    """Limiter configured from TENANT_MAX_CONCURRENT_GENERATIONS and TENANT_GENERATIONS_PER_HOUR"""
+    return TenantLimiter(
+        max_concurrent=int(os.getenv("TENANT_MAX_CONCURRENT_GENERATIONS", "4")),
+        per_hour=int(os.getenv("TENANT_GENERATIONS_PER_HOUR", "0"))
+    )
+
+
+if __name__ == "__main__":
+    # python tenancy.py <user_id> - print a bearer token signed with TENANT_TOKEN_SECRET
+    from dotenv import load_dotenv
+    load_dotenv()
+    if len(sys.argv) != 2 or not os.getenv("TENANT_TOKEN_SECRET"):
+        sys.exit("usage: TENANT_TOKEN_SECRET=... python tenancy.py <user_id>")
+    print(issue_token(sys.argv[1], os.getenv("TENANT_TOKEN_SECRET")))
@@ -0,0 +1,32 @@
+import importlib
+import os
+import sys
+
+import pytest
+
+# Tests import the backend modules the same way main.py does
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from data_manager import DataManager  # noqa: E402
+from sqlite_store import SQLiteDataManager  # noqa: E402
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def store(request, tmp_path):
+    """An empty store on each storage backend"""
+    manager_class = DataManager if request.param == "json" else SQLiteDataManager
+    return manager_class(str(tmp_path / "data"))
+
+
+@pytest.fixture
+def main_module(tmp_path, monkeypatch):
+    """The app module, imported from a scratch directory and not in
+    single-user mode, so importing it opens no store in the repository's
+    data directory. Tests swap in their own main.tenants."""
+    monkeypatch.setenv("TENANT_AUTH", "header")
+    if "main" not in sys.modules:
+        (tmp_path / "cwd").mkdir()
+        monkeypatch.chdir(tmp_path / "cwd")
+    return importlib.import_module("main")
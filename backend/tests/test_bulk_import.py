@@ -0,0 +1,111 @@
+import io
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from bulk_import import ImportFormatError, bulk_import, import_portfolio
+from data_manager import generate_stable_id
+from tenancy import TenantPool
+
+
+def run(store, payload, file_format="json", **kwargs) -> dict:
+    if file_format == "jsonl":
+        data = "\n".join(json.dumps(item) for item in payload)
+    else:
+        data = json.dumps(payload)
+    return bulk_import(store, io.BytesIO(data.encode("utf-8")), file_format, **kwargs)
+
+
+def item(title, **fields):
+    return {"title": title, "description": "", "category": "project", "date_range": "2024", **fields}
+
+
+def test_project_list_rows_without_id_are_always_new(store):
+    rows = [item("Compiler"), item("Compiler")]
+    assert run(store, rows, items_only=True)["imported"] == 2
+    report = run(store, rows, "jsonl", items_only=True)
+    assert report["imported"] == 2 and report["duplicates"] == 0
+    ids = [project.id for project in store.get_all_projects()]
+    assert len(ids) == len(set(ids)) == 4
+    assert generate_stable_id("Compiler") not in ids
+
+
+def test_portfolio_rows_without_id_dedup_by_title(store):
+    portfolio = {"projects": [item("Compiler"), item("compiler ")], "experience": [item("Acme", category="experience")]}
+    report = run(store, portfolio)
+    assert report["imported"] == 2 and report["duplicates"] == 1
+    assert store.get_project(generate_stable_id("Compiler")).title == "Compiler"
+
+    again = run(store, portfolio)
+    assert again["imported"] == 0 and again["duplicates"] == 3
+
+
+def test_explicit_ids_dedup_everywhere(store):
+    rows = [item("One", id="p1"), item("Two", id="p1")]
+    report = run(store, rows, items_only=True)
+    assert report["imported"] == 1 and report["duplicates"] == 1
+    assert run(store, {"projects": [item("Other", id="p1")]})["duplicates"] == 1
+    assert store.get_project("p1").title == "One"
+
+
+def test_non_string_id_is_reported_not_replaced(store):
+    report = run(store, [item("Numbered", id=7)], items_only=True)
+    assert report["imported"] == 0 and report["failed"] == 1
+    assert report["errors"][0]["field"] == "id" and report["errors"][0]["id"] == "7"
+
+
+@pytest.fixture
+def client(main_module, tmp_path, monkeypatch):
+    monkeypatch.setattr(main_module, "tenants", TenantPool(tmp_path / "data", "header"))
+    return TestClient(main_module.app, headers={"X-User-ID": "alice"})
+
+
+def upload(client, url, payload, name="items.json"):
+    return client.post(url, files={"file": (name, json.dumps(payload).encode("utf-8"), "application/json")})
+
+
+def test_bulk_endpoint_reports_non_string_ids(client):
+    response = upload(client, "/api/portfolio/import/bulk", [item("Numbered", id=5), item("Fine", id="p1")])
+    assert response.status_code == 200
+    report = response.json()
+    assert report["imported"] == 1 and report["failed"] == 1
+    assert report["errors"][0]["id"] == "5" and report["errors"][0]["field"] == "id"
+
+
+@pytest.mark.parametrize("portfolio", [{"projects": [item("Compiler")]}, {"experience": []}, {}])
+def test_project_import_rejects_portfolio_objects(store, portfolio):
+    with pytest.raises(ImportFormatError, match="array of projects"):
+        run(store, portfolio, items_only=True, dry_run=True)
+    assert store.get_all_projects() == []
+
+
+def test_project_import_endpoint_rejects_portfolio_objects(client):
+    response = upload(client, "/api/projects/import", {"projects": [item("Compiler")]})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "JSON file must contain an array of projects"
+    assert upload(client, "/api/projects/import", [item("Compiler")]).status_code == 200
+
+
+def test_parsed_portfolio_reports_failed_rows(store):
+    report = import_portfolio(store, {
+        "personal_info": {"name": "Jane"},
+        "projects": [item("Compiler"), {"title": "No category"}],
+        "experience": None,
+        "extraction": {"method": "local"},
+    })
+    assert report["imported"] == 1 and report["failed"] == 1
+    assert report["errors"][0]["section"] == "projects" and report["errors"][0]["row"] == 2
+    assert store.get_personal_info().name == "Jane"
+
+
+def test_baseline_upload_reports_rows_it_could_not_import(client, main_module, monkeypatch):
+    async def extract(latex, cache=None):
+        return {"projects": [item("Compiler"), {"title": "No category"}]}
+
+    monkeypatch.setattr(main_module, "extract_cv_data_async", extract)
+    latex = b"\\documentclass{article}\\begin{document}CV\\end{document}"
+    response = client.post("/api/cv/baseline", files={"file": ("cv.tex", latex, "text/plain")})
+    assert response.status_code == 201
+    assert "extracted data saved" in response.json()["message"]
+    assert "1 invalid rows skipped (first: row 2:" in response.json()["detail"]
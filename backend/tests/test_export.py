@@ -0,0 +1,154 @@
+import pytest
+
+import change_log
+import sqlite_store
+from bulk_import import import_portfolio
+from data_manager import DataManager
+from models import PersonalInfo, ProjectCreate, ProjectUpdate, SkillCategory
+
+
+def project(title: str) -> ProjectCreate:
+    return ProjectCreate(title=title, description=f"{title} description", technologies=["Python"],
+                         date_range="2024", category="project")
+
+
+def export(store, **options) -> list:
+    return list(store.iter_export(**options))
+
+
+def data_records(records: list) -> list:
+    return [(r["type"], r.get("id") or (r["data"].get("id") or r["data"].get("job_id")
+                                        if isinstance(r["data"], dict) else None))
+            for r in records[1:-1]]
+
+
+def test_full_export_streams_every_record(store):
+    first = store.create_project(project("Search engine"))
+    store.create_project(project("Data lake"))
+    store.save_generated_cv("\\documentclass{article}", job_id="job1", company="Acme")
+
+    records = export(store)
+    header, end = records[0], records[-1]
+    assert header["type"] == "export" and header["incremental"] is False
+    assert header["version"] == store.change_version()
+    assert [r["type"] for r in records[1:-1]] == ["personal_info", "skills", "project", "project", "history"]
+    assert records[3]["data"]["id"] == first.id
+    assert end == {"type": "end", "version": header["version"], "records": 5}
+
+
+def test_incremental_export_sends_changes_and_deletions(store):
+    kept = store.create_project(project("Search engine"))
+    renamed = store.create_project(project("Data lake"))
+    removed = store.create_project(project("Scheduler"))
+    version = export(store)[0]["version"]
+
+    store.update_project(renamed.id, ProjectUpdate(title="Data lakehouse"))
+    store.delete_project(removed.id)
+    store.save_skills([SkillCategory(category="Languages", items=["Go"])])
+
+    records = export(store, since_version=version)
+    assert records[0]["incremental"] is True
+    assert data_records(records) == [("project", renamed.id), ("deleted", removed.id), ("skills", None)]
+    assert records[1]["data"]["title"] == "Data lakehouse"
+    assert kept.id not in str(records)
+    assert records[-1]["records"] == 3
+    assert data_records(export(store, since_version=records[0]["version"])) == []
+
+
+def test_failed_batch_logs_no_changes(store):
+    store.create_project(project("Search engine"))
+    version = store.change_version()
+    with pytest.raises(RuntimeError):
+        with store.batch():
+            store.save_personal_info(PersonalInfo(name="Jane"))
+            raise RuntimeError("abort")
+    assert store.change_version() == version
+    assert data_records(export(store, since_version=version)) == []
+
+
+def test_batch_logs_its_changes(store):
+    version = store.change_version()
+    import_portfolio(store, {
+        "personal_info": {"name": "Jane"},
+        "skills": [{"category": "Languages", "items": ["Python"]}],
+        "projects": [project("Search engine").dict(), project("Data lake").dict()],
+    })
+    assert store.change_version() > version
+    types = sorted(kind for kind, _ in data_records(export(store, since_version=version)))
+    assert types == ["personal_info", "project", "project", "skills"]
+
+
+def test_json_batch_logs_one_version(tmp_path):
+    store = DataManager(str(tmp_path))
+    with store.batch():
+        created = store.create_project(project("Search engine"))
+        store.save_skills([SkillCategory(category="Languages", items=["Go"])])
+        store.delete_project(created.id)
+    assert store.change_version() == 1
+    assert sorted(data_records(export(store, since_version=0))) == [("deleted", created.id), ("skills", None)]
+
+
+def test_json_writes_leave_metadata_alone(tmp_path):
+    store = DataManager(str(tmp_path))
+    before = store.metadata_file.read_bytes()
+    created = store.create_project(project("Search engine"))
+    store.save_skills([SkillCategory(category="Languages", items=["Go"])])
+    store.delete_project(created.id)
+    assert store.metadata_file.read_bytes() == before
+    assert store.change_version() == 3
+
+
+def test_json_change_log_is_shared_between_instances(tmp_path):
+    writer, reader = DataManager(str(tmp_path)), DataManager(str(tmp_path))
+    assert reader.change_version() == 0
+    created = writer.create_project(project("Search engine"))
+    assert reader.change_version() == 1
+    assert data_records(export(reader, since_version=0)) == [("project", created.id)]
+
+
+def test_json_compaction_drops_old_deletions(tmp_path, monkeypatch):
+    store = DataManager(str(tmp_path))
+    kept = store.create_project(project("Search engine"))
+    for i in range(5):
+        store.update_project(kept.id, ProjectUpdate(description=f"Revision {i}"))
+    removed = store.create_project(project("Scheduler"))
+    store.delete_project(removed.id)
+    version = store.change_version()
+
+    monkeypatch.setenv("CHANGE_LOG_RETENTION_DAYS", "0")
+    store._change_log.compact()
+    assert len(store.changes_file.read_text().splitlines()) == 2  # Floor line and the live project
+    assert store.change_version() == version
+    assert store._change_floor()[0] == version
+
+    # From before the dropped deletion only a full export is complete
+    records = export(store, since_version=version - 1)
+    assert records[0]["incremental"] is False and "reason" in records[0]
+    assert ("project", kept.id) in data_records(records)
+    assert export(store, since_version=version)[0]["incremental"] is True
+
+    after = store.create_project(project("Data lake"))
+    assert DataManager(str(tmp_path)).change_version() == version + 1
+    assert data_records(export(store, since_version=version)) == [("project", after.id)]
+
+
+def test_json_change_log_compacts_itself(tmp_path, monkeypatch):
+    monkeypatch.setattr(change_log, "COMPACT_MIN_ENTRIES", 10)
+    store = DataManager(str(tmp_path))
+    created = store.create_project(project("Search engine"))
+    for i in range(30):
+        store.update_project(created.id, ProjectUpdate(description=f"Revision {i}"))
+    assert len(store.changes_file.read_text().splitlines()) <= 11
+    assert store.change_version() == 31
+
+
+def test_sqlite_drops_old_deletions(tmp_path, monkeypatch):
+    monkeypatch.setattr(sqlite_store, "COMPACT_EVERY_VERSIONS", 1)
+    monkeypatch.setenv("CHANGE_LOG_RETENTION_DAYS", "0")
+    store = sqlite_store.SQLiteDataManager(str(tmp_path))
+    removed = store.create_project(project("Scheduler"))
+    store.delete_project(removed.id)
+    store.create_project(project("Search engine"))  # Compacts the deletion away
+    assert store._change_floor()[0] == 2
+    assert export(store, since_version=1)[0]["incremental"] is False
+    assert export(store, since_version=2)[0]["incremental"] is True
@@ -0,0 +1,68 @@
+import asyncio
+import re
+
+import pytest
+
+import gemini_service
+from gemini_service import extract_cv_data_async
+from response_cache import ResponseCache
+
+HEADER = "\\documentclass{article}\n\\begin{document}\n\\name{Jane Doe}\n"
+PROJECTS = "\\section{Projects}\n\\item Compiler\n\\item R\\&D Tools\n"
+EXPERIENCE = "\\section{Experience}\n\\item Acme\n"
+
+
+@pytest.fixture
+def model_calls(monkeypatch):
+    """The LaTeX sent to the (fake) model, one entry per call"""
+    calls = []
+
+    async def extract(client, route, latex):
+        calls.append(latex)
+        name = re.search(r"\\name\{(.*)\}", latex)
+        lines = re.findall(r"\\section\{(\w+)\}|\\item (.+)", latex)
+        result = {"personal_info": {"name": name.group(1)} if name else {}, "projects": [], "experience": []}
+        key = None
+        for heading, title in lines:
+            if heading:
+                key = heading.lower()
+            else:
+                result[key].append({"title": title.replace("\\&", "&"), "id": title})
+        return result
+
+    monkeypatch.setattr(gemini_service, "parse_cv_locally", lambda latex: None)
+    monkeypatch.setattr(gemini_service, "get_client", lambda: None)
+    monkeypatch.setattr(gemini_service, "_extract_text_async", extract)
+    return calls
+
+
+def titles(result):
+    return [item["title"] for key in ("projects", "experience") for item in result[key]]
+
+
+def test_cold_upload_is_one_call_and_seeds_the_sections(tmp_path, model_calls):
+    cache = ResponseCache(tmp_path)
+    first = asyncio.run(extract_cv_data_async(HEADER + PROJECTS + EXPERIENCE, cache))
+    assert model_calls == [HEADER + PROJECTS + EXPERIENCE]
+    assert titles(first) == ["Compiler", "R&D Tools", "Acme"]
+
+    changed = EXPERIENCE.replace("Acme", "Globex")
+    second = asyncio.run(extract_cv_data_async(HEADER + PROJECTS + changed, cache))
+    assert model_calls[1:] == [changed]
+    assert titles(second) == ["Compiler", "R&D Tools", "Globex"]
+    assert second["personal_info"] == {"name": "Jane Doe"}
+
+
+def test_unattributable_items_leave_the_sections_unseeded(tmp_path, model_calls, monkeypatch):
+    cache = ResponseCache(tmp_path)
+    extract = gemini_service._extract_text_async
+
+    async def inventive(client, route, latex):
+        result = await extract(client, route, latex)
+        result["projects"].append({"title": "Not in the CV"})
+        return result
+
+    monkeypatch.setattr(gemini_service, "_extract_text_async", inventive)
+    asyncio.run(extract_cv_data_async(HEADER + PROJECTS, cache))
+    asyncio.run(extract_cv_data_async(HEADER + PROJECTS + EXPERIENCE, cache))
+    assert model_calls == [HEADER + PROJECTS, HEADER + PROJECTS + EXPERIENCE]
@@ -0,0 +1,42 @@
+import pytest
+from google import genai
+
+import gemini_client
+from gemini_client import PooledApiClient, PooledClient, get_client, pooling_supported, reset_client
+
+
+@pytest.fixture(autouse=True)
+def fresh_client(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    reset_client()
+    yield
+    reset_client()
+
+
+def test_pinned_sdk_gets_the_pooled_client():
+    assert pooling_supported()
+    client = get_client()
+    assert isinstance(client, PooledClient)
+    assert isinstance(client._api_client, PooledApiClient)
+    assert get_client() is client
+
+
+def test_missing_private_module_falls_back_to_the_stock_client(monkeypatch):
+    monkeypatch.setattr(gemini_client, "ApiClient", None)
+    assert not pooling_supported()
+    client = get_client()
+    assert type(client) is genai.Client
+
+
+def test_changed_hook_signature_falls_back_to_the_stock_client(monkeypatch):
+    def _async_request(self, request, stream=False):
+        pass
+
+    monkeypatch.setattr(gemini_client.ApiClient, "_async_request", _async_request)
+    assert not pooling_supported()
+    assert type(get_client()) is genai.Client
+
+
+def test_renamed_client_hook_falls_back_to_the_stock_client(monkeypatch):
+    monkeypatch.delattr(genai.Client, "_get_api_client")
+    assert not pooling_supported()
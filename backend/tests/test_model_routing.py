@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from model_routing import ModelRoute, routed_call, routing_stats
+from resilience import CircuitBreaker, ResilientCaller, TokenBucket
+
+
+def make_caller(failures=1, reset_timeout=0.0):
+    return ResilientCaller(TokenBucket(0, 1), CircuitBreaker(failures, reset_timeout), max_retries=0)
+
+
+def test_primary_answers_within_budget():
+    route = ModelRoute("generation", "primary", "fallback", latency_budget=1.0)
+
+    async def call(model):
+        return f"answer from {model}"
+
+    assert asyncio.run(routed_call(route, call)) == ("answer from primary", "primary")
+
+
+def test_primary_error_falls_back():
+    route = ModelRoute("generation", "primary", "fallback")
+
+    async def call(model):
+        if model == "primary":
+            raise RuntimeError("primary down")
+        return "fallback answer"
+
+    before = routing_stats()["fallbacks"]
+    assert asyncio.run(routed_call(route, call)) == ("fallback answer", "fallback")
+    assert routing_stats()["fallbacks"] == before + 1
+
+
+def test_every_model_failing_raises_the_primary_error():
+    route = ModelRoute("generation", "primary", "fallback")
+
+    async def call(model):
+        raise RuntimeError(f"{model} down")
+
+    with pytest.raises(RuntimeError, match="primary down"):
+        asyncio.run(routed_call(route, call))
+
+
+def test_slow_primary_is_hedged_and_cancelled():
+    route = ModelRoute("generation", "primary", "fallback", latency_budget=0.01)
+    cancelled = []
+    discarded = []
+
+    async def call(model):
+        if model == "primary":
+            try:
+                await asyncio.sleep(3600)
+            except asyncio.CancelledError:
+                cancelled.append(model)
+                raise
+        return model
+
+    async def discard(result):
+        discarded.append(result)
+
+    assert asyncio.run(routed_call(route, call, discard=discard)) == ("fallback", "fallback")
+    assert cancelled == ["primary"]
+    assert discarded == []  # A cancelled call has no result to release
+
+
+def test_hedged_half_open_trial_releases_the_circuit():
+    """Cancelling the losing primary must not leave its breaker half-open"""
+    callers = {"primary": make_caller(), "fallback": make_caller()}
+    breaker = callers["primary"].breaker
+    breaker.record_failure()  # Open; with no reset timeout the next call is the trial
+    route = ModelRoute("generation", "primary", "fallback", latency_budget=0.01)
+    slow = {"primary": True}
+
+    def call(model):
+        async def attempt():
+            if model == "primary" and slow["primary"]:
+                await asyncio.sleep(3600)
+            return model
+        return callers[model].call(attempt)
+
+    assert asyncio.run(routed_call(route, call)) == ("fallback", "fallback")
+    assert breaker.state == "open"
+
+    slow["primary"] = False
+    assert asyncio.run(routed_call(route, call)) == ("primary", "primary")
+    assert breaker.state == "closed"
@@ -0,0 +1,107 @@
+import base64
+import json
+
+import pytest
+
+from data_manager import DataManager
+from models import ProjectCreate
+
+
+def project(title: str, category: str = "project") -> ProjectCreate:
+    return ProjectCreate(title=title, description="", technologies=["Python"], date_range="2024", category=category)
+
+
+@pytest.fixture
+def filled(store):
+    for i, (title, category) in enumerate([("delta", "project"), ("Alpha", "experience"), ("charlie", "project"),
+                                           ("Bravo", "education"), ("echo", "experience")]):
+        store.create_project(project(title, category))
+        store.save_generated_cv("\\documentclass{article}", job_id=f"job{i}", company="Acme")
+    return store
+
+
+def pages(query, limit: int, start: str = None, **options) -> tuple:
+    """Every item reached by following next_cursor, and the number of pages"""
+    items, cursor, count = [], start, 0
+    while True:
+        page = query(limit=limit, cursor=cursor, **options)
+        items.extend(page["items"])
+        count += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return items, count
+
+
+@pytest.mark.parametrize("sort", ["created", "title", "category"])
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_project_cursor_round_trip(filled, sort, order):
+    everything = filled.query_projects(sort=sort, order=order)["items"]
+    paged, count = pages(filled.query_projects, 2, sort=sort, order=order)
+    assert paged == everything and len(paged) == 5
+    assert count == 3
+
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_history_cursor_round_trip(filled, order):
+    everything = filled.query_cv_history(order=order)["items"]
+    paged, _ = pages(filled.query_cv_history, 2, order=order, fields=["job_id"])
+    assert [item["job_id"] for item in paged] == [item["job_id"] for item in everything]
+    assert len(paged) == 5
+
+
+def test_cursor_is_tied_to_its_sort_and_order(filled):
+    cursor = filled.query_projects(sort="title", limit=2)["next_cursor"]
+    with pytest.raises(ValueError, match="sort=title order=asc"):
+        filled.query_projects(sort="category", limit=2, cursor=cursor)
+    with pytest.raises(ValueError, match="not sort=title order=desc"):
+        filled.query_projects(sort="title", order="desc", limit=2, cursor=cursor)
+    with pytest.raises(ValueError):
+        filled.query_cv_history(limit=2, cursor=cursor)
+    assert filled.query_projects(sort="title", limit=2, cursor=cursor)["items"]
+
+
+@pytest.mark.parametrize("payload", [
+    {"sort": "title", "order": "asc", "key": ["x"]},  # Wrong key length
+    {"sort": "title", "order": "asc"},
+    ["alpha", 1],  # Cursor format without the sort
+])
+def test_malformed_cursor_is_rejected(filled, payload):
+    cursor = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        filled.query_projects(sort="title", limit=2, cursor=cursor)
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        filled.query_projects(sort="title", limit=2, cursor="not base64 json")
+
+
+@pytest.mark.parametrize("sort", ["created", "title"])
+def test_writes_between_pages_neither_skip_nor_repeat(filled, sort):
+    everything = [item["id"] for item in filled.query_projects(sort=sort)["items"]]
+    first = filled.query_projects(sort=sort, limit=2)
+    seen = [item["id"] for item in first["items"]]
+
+    # Remove an already returned project and add a new one before the next page
+    assert filled.delete_project(seen[0])
+    added = filled.create_project(project("zulu"))
+    rest, _ = pages(filled.query_projects, 2, start=first["next_cursor"], sort=sort)
+    assert [item["id"] for item in rest] == everything[2:] + [added.id]
+
+
+def test_json_projects_keep_their_sequence(tmp_path):
+    store = DataManager(str(tmp_path))
+    ids = [store.create_project(project(title)).id for title in ("a", "b", "c")]
+    store.delete_project(ids[1])
+    items = store.query_projects()["items"]
+    assert [item["id"] for item in items] == [ids[0], ids[2]]
+    assert "seq" not in items[0]
+    assert all("seq" not in record.get("data", {}) for record in store.iter_export() if record["type"] == "project")
+
+
+def test_json_files_without_seq_are_numbered_in_order(tmp_path):
+    legacy = [{**project(title).dict(), "id": title} for title in ("a", "b", "c", "d")]
+    (tmp_path / "projects.json").write_text(json.dumps(legacy))
+    store = DataManager(str(tmp_path))
+    first = store.query_projects(limit=2)
+    store.delete_project("a")
+    rest, _ = pages(store.query_projects, 2, start=first["next_cursor"])
+    assert [item["id"] for item in rest] == ["c", "d"]
+    assert [item["seq"] for item in json.loads((tmp_path / "projects.json").read_text())] == [2, 3, 4]
@@ -0,0 +1,70 @@
+import asyncio
+import logging
+import os
+import sys
+
+import pytest
+
+from pdf_compiler import WARMUP_LATEX, LatexCompiler
+
+FAKE_LATEX = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "fake_latex.py")
+
+
+@pytest.fixture
+def compiler(tmp_path):
+    """Compiler running benchmarks/fake_latex.py in place of pdflatex"""
+    script = tmp_path / "pdflatex"
+    script.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{FAKE_LATEX}" --seconds 0 "$@"\n')
+    script.chmod(0o755)
+    return LatexCompiler(tmp_path / "latex", workers=2, executable=str(script))
+
+
+def test_warmup_primes_every_slot(compiler):
+    async def scenario():
+        await compiler.start()
+        try:
+            return [slot.compiles for slot in compiler.slots], compiler.stats()
+        finally:
+            await compiler.stop()
+
+    compiles, stats = asyncio.run(scenario())
+    assert compiles == [1, 1]
+    assert stats["slots"] == 2
+    assert stats["warmup_failures"] == 0
+    assert stats["warmup_error"] is None
+
+
+def test_warmup_failure_is_logged_and_counted(compiler, caplog):
+    broken = WARMUP_LATEX.replace("warm-up", "\\undefinedcommand")
+
+    async def scenario():
+        await compiler.start(broken)
+        try:
+            return compiler.stats()
+        finally:
+            await compiler.stop()
+
+    with caplog.at_level(logging.WARNING, logger="pdf_compiler"):
+        stats = asyncio.run(scenario())
+    assert stats["warmup_failures"] == 2
+    assert "Undefined control sequence" in stats["warmup_error"]
+    assert "LaTeX warm-up failed in 2 of 2 slot(s)" in caplog.text
+    # Warm-up runs don't count as compiles of user documents
+    assert stats["compiles"] == 0 and stats["failures"] == 0
+
+
+def test_get_pdf_compiles_once_then_serves_the_cache(compiler, tmp_path):
+    generated = tmp_path / "generated"
+    generated.mkdir()
+
+    async def scenario():
+        try:
+            first = await compiler.get_pdf(generated, "job1", WARMUP_LATEX)
+            second = await compiler.get_pdf(generated, "job1", WARMUP_LATEX)
+            return first, second
+        finally:
+            await compiler.stop()
+
+    (path, cached), (again, cached_again) = asyncio.run(scenario())
+    assert not cached and cached_again and path == again
+    assert path.read_bytes().startswith(b"%PDF")
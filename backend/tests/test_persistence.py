@@ -0,0 +1,77 @@
+import threading
+import time
+
+import pytest
+
+import data_manager
+from data_manager import DataManager
+from models import ProjectCreate
+
+
+def project(title: str) -> ProjectCreate:
+    return ProjectCreate(title=title, description="", technologies=[], date_range="2024", category="project")
+
+
+@pytest.fixture
+def slow_writes(monkeypatch):
+    """Count project file writes and make each take long enough to overlap"""
+    writes = []
+    write = data_manager.atomic_write_json
+
+    def slow_write(file_path, data):
+        if file_path.name == "projects.json":
+            writes.append(len(data))
+            time.sleep(0.05)
+        write(file_path, data)
+
+    monkeypatch.setattr(data_manager, "atomic_write_json", slow_write)
+    return writes
+
+
+def run_threads(count: int, target):
+    errors = []
+
+    def run(i):
+        try:
+            target(i)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+def test_concurrent_writes_share_disk_writes(tmp_path, slow_writes):
+    store = DataManager(str(tmp_path))
+    version = store.change_version()
+    assert run_threads(8, lambda i: store.create_project(project(f"p{i}"))) == []
+
+    assert len(slow_writes) < 8
+    assert slow_writes[-1] == 8
+    reopened = DataManager(str(tmp_path))
+    assert sorted(p.title for p in reopened.get_all_projects()) == [f"p{i}" for i in range(8)]
+    assert sorted(p["seq"] for p in reopened._load_json(reopened.projects_file)) == list(range(1, 9))
+    changed = [record for record in reopened.iter_export(since_version=version) if record["type"] == "project"]
+    assert len(changed) == 8
+    assert [p.title for p in store.rank_projects("p3", top_k=1)] == ["p3"]
+
+
+def test_failed_group_write_fails_every_writer(tmp_path, monkeypatch):
+    store = DataManager(str(tmp_path))
+    write = data_manager.atomic_write_json
+
+    def failing_write(file_path, data):
+        time.sleep(0.05)
+        raise OSError("disk full")
+
+    monkeypatch.setattr(data_manager, "atomic_write_json", failing_write)
+    errors = run_threads(4, lambda i: store.create_project(project(f"p{i}")))
+    assert len(errors) == 4 and all(str(e) == "disk full" for e in errors)
+
+    monkeypatch.setattr(data_manager, "atomic_write_json", write)
+    store.create_project(project("after"))
+    assert [p.title for p in DataManager(str(tmp_path)).get_all_projects()] == ["after"]
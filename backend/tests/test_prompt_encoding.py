@@ -0,0 +1,53 @@
+import pytest
+
+from gemini_service import LatexStreamCleaner
+from prompt_encoding import get_prompt_encoding, restore_preamble
+
+BASELINE = (
+    "\\documentclass{article}\n"
+    "\\newcommand{\\cvitem}[1]{#1}\n"
+    "\\begin{document}\n"
+    "Baseline body\n"
+    "\\end{document}\n"
+)
+PREAMBLE = BASELINE[:BASELINE.index("\\begin{document}")]
+
+
+def test_default_encoding_is_json(monkeypatch):
+    monkeypatch.delenv("PROMPT_ENCODING", raising=False)
+    assert get_prompt_encoding() == "json"
+    monkeypatch.setenv("PROMPT_ENCODING", "Compact")
+    assert get_prompt_encoding() == "compact"
+    monkeypatch.setenv("PROMPT_ENCODING", "yaml")
+    with pytest.raises(ValueError):
+        get_prompt_encoding()
+
+
+def test_restore_replaces_whatever_precedes_the_body():
+    generated = "% model preamble\n\\begin{document}\nTailored\n\\end{document}\n"
+    assert restore_preamble(generated, BASELINE) == PREAMBLE + "\\begin{document}\nTailored\n\\end{document}\n"
+
+
+@pytest.mark.parametrize("generated", [
+    "Tailored body\n",
+    "\nTailored body\n\\end{document}\n",
+])
+def test_body_without_begin_document_gets_the_baseline_preamble(generated):
+    restored = restore_preamble(generated, BASELINE)
+    assert restored == PREAMBLE + "\\begin{document}\nTailored body\n\\end{document}\n"
+
+
+def test_baseline_without_preamble_leaves_output_alone():
+    assert restore_preamble("Tailored body", "Just text") == "Tailored body"
+
+
+@pytest.mark.parametrize("response", [
+    "```latex\n% junk\n\\begin{document}\nTailored\n\\end{document}\n```",
+    "```latex\nTailored body only\n```",
+])
+def test_stream_cleaner_matches_restore_preamble(response):
+    cleaner = LatexStreamCleaner(BASELINE, "compact")
+    streamed = "".join(cleaner.feed(response[i:i + 7]) for i in range(0, len(response), 7)) + cleaner.finish()
+    body = response.removeprefix("```latex\n").removesuffix("```").strip()
+    assert streamed == restore_preamble(body, BASELINE)
+    assert streamed.startswith(PREAMBLE + "\\begin{document}")
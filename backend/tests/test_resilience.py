@@ -0,0 +1,165 @@
+import asyncio
+
+import pytest
+import requests
+from google.genai import errors
+
+from resilience import CircuitBreaker, CircuitOpenError, ResilientCaller, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def api_error(code: int) -> errors.APIError:
+    response = requests.Response()
+    response.status_code = code
+    response._content = b'{"message": "fake", "status": "FAKE"}'
+    return errors.APIError(code, response)
+
+
+async def no_sleep(seconds):
+    pass
+
+
+def make_caller(clock, failures=2, reset_timeout=30.0, max_retries=0):
+    breaker = CircuitBreaker(failures, reset_timeout, clock=clock)
+    caller = ResilientCaller(TokenBucket(0, 1, clock=clock), breaker, max_retries=max_retries,
+                             sleep=no_sleep, sleep_sync=lambda seconds: None)
+    return caller, breaker
+
+
+def fail_with(error):
+    def attempt():
+        raise error
+    return attempt
+
+
+def open_circuit(caller, clock):
+    for _ in range(caller.breaker.failure_threshold):
+        with pytest.raises(errors.APIError):
+            caller.call_sync(fail_with(api_error(503)))
+    assert caller.breaker.state == "open"
+    clock.now += caller.breaker.reset_timeout
+
+
+def test_consecutive_failures_open_the_circuit():
+    clock = FakeClock()
+    caller, breaker = make_caller(clock)
+    open_circuit(caller, clock)
+    clock.now -= 1
+    with pytest.raises(CircuitOpenError):
+        caller.call_sync(lambda: "ok")
+    assert caller.stats()["circuit_rejections"] == 1
+
+
+def test_retryable_errors_are_retried():
+    clock = FakeClock()
+    caller, breaker = make_caller(clock, failures=10, max_retries=2)
+    outcomes = [api_error(503), api_error(429)]
+
+    def attempt():
+        if outcomes:
+            raise outcomes.pop(0)
+        return "ok"
+
+    assert caller.call_sync(attempt) == "ok"
+    assert caller.stats()["retries"] == 2
+    assert breaker.state == "closed" and breaker.failures == 0
+
+
+def test_successful_trial_closes_the_circuit():
+    clock = FakeClock()
+    caller, breaker = make_caller(clock)
+    open_circuit(caller, clock)
+    assert caller.call_sync(lambda: "ok") == "ok"
+    assert breaker.state == "closed"
+
+
+def test_failed_trial_reopens_the_circuit():
+    clock = FakeClock()
+    caller, breaker = make_caller(clock)
+    open_circuit(caller, clock)
+    with pytest.raises(errors.APIError):
+        caller.call_sync(fail_with(api_error(503)))
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        caller.call_sync(lambda: "ok")
+
+
+def test_trial_with_non_retryable_error_closes_the_circuit():
+    clock = FakeClock()
+    caller, breaker = make_caller(clock)
+    open_circuit(caller, clock)
+    with pytest.raises(errors.APIError):
+        caller.call_sync(fail_with(api_error(400)))
+    assert breaker.state == "closed"
+    assert caller.call_sync(lambda: "ok") == "ok"
+
+
+def test_non_retryable_error_leaves_a_closed_circuit_alone():
+    clock = FakeClock()
+    caller, breaker = make_caller(clock, failures=3)
+    with pytest.raises(errors.APIError):
+        caller.call_sync(fail_with(api_error(503)))
+    with pytest.raises(ValueError):
+        caller.call_sync(fail_with(ValueError("bad response")))
+    assert breaker.state == "closed" and breaker.failures == 1
+
+
+def test_cancelled_trial_hands_the_slot_to_the_next_caller():
+    clock = FakeClock()
+    caller, breaker = make_caller(clock)
+    open_circuit(caller, clock)
+
+    async def scenario():
+        started = asyncio.Event()
+
+        async def hang():
+            started.set()
+            await asyncio.sleep(3600)
+
+        trial = asyncio.ensure_future(caller.call(hang))
+        await started.wait()
+        assert breaker.state == "half_open"
+        with pytest.raises(CircuitOpenError):
+            await caller.call(succeed)
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+        assert breaker.state == "open"
+        return await caller.call(succeed)
+
+    async def succeed():
+        return "ok"
+
+    assert asyncio.run(scenario()) == "ok"
+    assert breaker.state == "closed"
+
+
+def test_interrupted_sync_trial_hands_the_slot_to_the_next_caller():
+    clock = FakeClock()
+    caller, breaker = make_caller(clock)
+    open_circuit(caller, clock)
+    with pytest.raises(KeyboardInterrupt):
+        caller.call_sync(fail_with(KeyboardInterrupt()))
+    assert breaker.state == "open"
+    assert caller.call_sync(lambda: "ok") == "ok"
+    assert breaker.state == "closed"
+
+
+def test_timeouts_count_as_failures_without_retrying():
+    clock = FakeClock()
+    caller, breaker = make_caller(clock, failures=5, max_retries=3)
+
+    async def attempt():
+        raise asyncio.TimeoutError()
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(caller.call(attempt))
+    assert breaker.failures == 1
+    assert caller.stats()["retries"] == 0
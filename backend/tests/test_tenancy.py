@@ -0,0 +1,142 @@
+from collections import deque
+
+import pytest
+from fastapi.testclient import TestClient
+
+from job_queue import QueueFullError
+from models import ProjectCreate
+from resilience import CircuitOpenError
+from tenancy import (QuotaExceededError, TenantAuthError, TenantLimiter, TenantPool, issue_token, shard_dir,
+                     verify_token)
+
+SECRET = "test-secret"
+PROJECT = {"title": "Compiler", "description": "", "technologies": [], "date_range": "2024", "category": "project"}
+
+
+def test_tokens_round_trip_and_reject_forgeries():
+    token = issue_token("alice", SECRET)
+    assert verify_token(token, SECRET) == "alice"
+    for forged in (issue_token("alice", "other-secret"), token.replace("alice", "bob", 1), "alice", ""):
+        with pytest.raises(TenantAuthError):
+            verify_token(forged, SECRET)
+
+
+@pytest.mark.parametrize("user_id", ["", "../alice", "a/b", ".hidden", "x" * 65])
+def test_unsafe_user_ids_are_rejected(tmp_path, user_id):
+    with pytest.raises(TenantAuthError):
+        TenantPool(tmp_path, "header").resolve({"X-User-ID": user_id})
+
+
+def test_resolve_by_mode(tmp_path):
+    assert TenantPool(tmp_path / "single").resolve({}) == "default"
+    assert TenantPool(tmp_path, "header").resolve({"X-User-ID": " alice "}) == "alice"
+    pool = TenantPool(tmp_path, "token", secret=SECRET)
+    assert pool.resolve({"authorization": f"Bearer {issue_token('bob', SECRET)}"}) == "bob"
+    for headers in ({}, {"authorization": "Basic abc"}, {"X-User-ID": "bob"}):
+        with pytest.raises(TenantAuthError):
+            pool.resolve(headers)
+    with pytest.raises(ValueError):
+        TenantPool(tmp_path, "token")
+
+
+def test_users_get_separate_stores(tmp_path):
+    pool = TenantPool(tmp_path, "header")
+    alice, bob = pool.get("alice"), pool.get("bob")
+    alice.create_project(ProjectCreate(**PROJECT))
+    assert [p.title for p in alice.get_all_projects()] == ["Compiler"]
+    assert bob.get_all_projects() == []
+    assert alice.data_dir == shard_dir(tmp_path, "alice") != bob.data_dir
+    assert pool.get("alice") is alice
+
+
+def test_least_recently_used_store_is_evicted_and_reopened(tmp_path):
+    pool = TenantPool(tmp_path, "header", max_open=2)
+    alice = pool.get("alice")
+    pool.get("bob")
+    pool.get("alice")  # bob is now the least recently used
+    pool.get("carol")
+    assert pool.stats()["open_stores"] == 2 and pool.stats()["evicted"] == 1
+    assert pool.get("alice") is alice
+    reopened = pool.get("bob")
+    assert pool.stats()["opened"] == 4
+    assert reopened.data_dir == shard_dir(tmp_path, "bob")
+
+
+@pytest.fixture
+def client(main_module, tmp_path, monkeypatch):
+    """The app with token auth over stores in tmp_path"""
+    monkeypatch.setattr(main_module, "tenants", TenantPool(tmp_path / "data", "token", secret=SECRET))
+    return TestClient(main_module.app)
+
+
+def auth(user_id: str) -> dict:
+    return {"Authorization": f"Bearer {issue_token(user_id, SECRET)}"}
+
+
+def test_api_requests_only_see_their_own_user(client):
+    created = client.post("/api/projects", json=PROJECT, headers=auth("alice"))
+    assert created.status_code == 201
+    project_id = created.json()["id"]
+
+    assert [p["id"] for p in client.get("/api/projects", headers=auth("alice")).json()] == [project_id]
+    assert client.get("/api/projects", headers=auth("bob")).json() == []
+    assert client.get(f"/api/projects/{project_id}", headers=auth("bob")).status_code == 404
+    assert client.delete(f"/api/projects/{project_id}", headers=auth("bob")).status_code == 404
+    assert client.get(f"/api/projects/{project_id}", headers=auth("alice")).status_code == 200
+
+
+def test_api_rejects_missing_and_forged_tokens(client):
+    assert client.get("/api/projects").status_code == 401
+    forged = {"Authorization": f"Bearer {issue_token('alice', 'other-secret')}"}
+    response = client.get("/api/projects", headers=forged)
+    assert response.status_code == 401
+    assert response.headers["WWW-Authenticate"] == "Bearer"
+
+
+def test_refund_gives_back_counted_generations():
+    limiter = TenantLimiter(per_hour=2)
+    limiter.consume("alice", 2)
+    with pytest.raises(QuotaExceededError):
+        limiter.consume("alice")
+    limiter.refund("alice")
+    limiter.consume("alice")
+    limiter.refund("bob", 3)  # Nothing counted, nothing to give back
+    limiter.consume("bob", 2)
+
+
+@pytest.fixture
+def generation_client(client, main_module, monkeypatch):
+    """The app with a baseline CV and a project for alice and a quota of one generation"""
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(main_module, "tenant_limiter", TenantLimiter(per_hour=1))
+    store = main_module.tenants.get("alice")
+    store.save_baseline_cv("\\documentclass{article}")
+    store.create_project(ProjectCreate(**PROJECT))
+    return client
+
+
+GENERATE = {"job_description": {"text": "Compiler engineer"}}
+
+
+def test_full_queue_does_not_use_quota(generation_client, main_module, monkeypatch):
+    class FullQueue:
+        async def submit(self, request, user_id):
+            raise QueueFullError("Job queue is full (1 jobs waiting)")
+
+    monkeypatch.setattr(main_module, "job_queue", FullQueue())
+    for _ in range(2):
+        response = generation_client.post("/api/cv/generate", json={**GENERATE, "background": True},
+                                          headers=auth("alice"))
+        assert response.status_code == 429
+        assert response.json()["detail"].startswith("Job queue is full")
+
+
+def test_open_circuit_does_not_use_quota(generation_client, main_module, monkeypatch):
+    async def generate(**kwargs):
+        raise CircuitOpenError(30)
+
+    monkeypatch.setattr(main_module, "generate_cv_async", generate)
+    for _ in range(2):
+        response = generation_client.post("/api/cv/generate", json=GENERATE, headers=auth("alice"))
+        assert response.status_code == 503
+    assert main_module.tenant_limiter._usage["alice"] == deque()
@@ -0,0 +1,180 @@
+import re
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+from latex_parser import CONTROL_WORD
+
+
+# Escaped characters that stand for themselves in the rendered text
+ESCAPED_SYMBOLS = "&%$#_{}"
+DASHES = str.maketrans({"–": "-", "—": "-", "~": " "})
+TOKEN = re.compile(r'\w+|[^\w\s]')
+
+
+class ItemMatch:
+    """One occurrence of an item title in the generated LaTeX"""
+
+    def __init__(self, item_id: str, title: str, start: int, end: int):
+        self.id = item_id
+        self.title = title
+        self.start = start  # Character offsets into the LaTeX source
+        self.end = end
+
+    def to_dict(self) -> dict:
+        return {"id": self.id, "title": self.title, "start": self.start, "end": self.end}
+
+
+def normalize_latex(latex: str) -> Tuple[str, List[Tuple[int, int]]]:
+    """Lowercased rendered text of a LaTeX string with whitespace collapsed,
+    plus the source span of every character in it.
+
+    Control words (\\textbf, \\item, ...), braces and comments are dropped,
+    escapes like \\& become their symbol and dashes (--, en/em dash)
+    become "-", the same text normalize_title gives for a plain title.
+    """
+    chars: List[str] = []
+    spans: List[Tuple[int, int]] = []
+
+    def emit(char: str, start: int, end: int):
+        if char.isspace():
+            if not chars or chars[-1] == " ":
+                return
+            char = " "
+        chars.append(char)
+        spans.append((start, end))
+
+    i = 0
+    length = len(latex)
+    while i < length:
+        char = latex[i]
+        if char == "\\":
+            match = CONTROL_WORD.match(latex, i)
+            symbol = match.group(2)
+            if symbol and symbol in ESCAPED_SYMBOLS:
+                emit(symbol, i, i + 2)
+            elif not symbol or symbol == "\\":
+                emit(" ", i, match.end())  # A command or line break separates words
+            i = match.end()
+        elif char == "%":
+            newline = latex.find("\n", i)
+            i = length if newline < 0 else newline
+        elif char in "{}":
+            if latex.startswith("}{", i):
+                emit(" ", i, i + 1)  # Separate arguments: \cventry{2020}{Title}
+            i += 1
+        elif char == "-":
+            start = i
+            while i < length and latex[i] == "-":
+                i += 1
+            emit("-", start, i)
+        else:
+            emit(char.translate(DASHES).lower(), i, i + 1)
+            i += 1
+    return "".join(chars), spans
+
+
+def normalize_title(title: str) -> str:
+    """Plain-text title normalized like normalize_latex output; titles are
+    stored as typed, so %, _ and braces are literal here"""
+    title = title.translate(DASHES)
+    if "--" in title:
+        title = re.sub(r'-+', "-", title)
+    return " ".join(title.lower().split())
+
+
+class TitleMatcher:
+    """Aho-Corasick automaton over item titles, with words as its alphabet.
+
+    Built once per request from the candidate items, then finds every
+    title in a document in a single pass over its words, however many
+    items there are. Matching whole words respects word boundaries ("Go"
+    does not match inside "Google", "API 1" not inside "API 12"), and
+    where titles overlap the longest one wins ("Data Platform v2" over
+    "Data Platform").
+    """
+
+    def __init__(self, items: List[Tuple[str, str]]):
+        # State 0 is the root; goto[state] maps a word to the next state
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[List[int]] = [[]]  # Indexes into self.patterns ending in each state
+        self.patterns: List[Tuple[str, str, int]] = []  # (item id, title, length in words)
+        for item_id, title in items:
+            words = TOKEN.findall(normalize_title(title))
+            if words:
+                self._add(words, item_id, title)
+        self._link()
+
+    def _add(self, words: List[str], item_id: str, title: str):
+        goto = self.goto
+        state = 0
+        for word in words:
+            following = goto[state].get(word)
+            if following is None:
+                following = len(goto)
+                goto[state][word] = following
+                goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            state = following
+        self.output[state].append(len(self.patterns))
+        self.patterns.append((item_id, title, len(words)))
+
+    def _link(self):
+        goto, fail, output = self.goto, self.fail, self.output
+        queue = list(goto[0].values())
+        for state in queue:  # Breadth-first, so shorter suffixes are linked first
+            for word, following in goto[state].items():
+                queue.append(following)
+                fallback = fail[state]
+                while fallback and word not in goto[fallback]:
+                    fallback = fail[fallback]
+                target = goto[fallback].get(word, 0)
+                fail[following] = target if target != following else 0
+                if output[fail[following]]:
+                    output[following] = output[following] + output[fail[following]]
+
+    def find(self, latex: str) -> List[ItemMatch]:
+        """Every title occurrence in the document, in order; overlapping
+        occurrences are resolved leftmost-longest"""
+        text, spans = normalize_latex(latex)
+        tokens = list(TOKEN.finditer(text))
+        found: Dict[Tuple[int, int], List[int]] = {}
+        state = 0
+        goto, fail, output = self.goto, self.fail, self.output
+        for position, token in enumerate(tokens):
+            word = token.group()
+            while state and word not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(word, 0)
+            for index in output[state]:
+                found.setdefault((position + 1 - self.patterns[index][2], position + 1), []).append(index)
+
+        matches = []
+        covered_until = 0
+        for start, end in sorted(found, key=lambda span: (span[0], -span[1])):
+            if start < covered_until:
+                continue
+            covered_until = end
+            source_start = spans[tokens[start].start()][0]
+            source_end = spans[tokens[end - 1].end() - 1][1]
+            for index in found[(start, end)]:  # Items sharing a normalized title all match
+                item_id, title, _ = self.patterns[index]
+                matches.append(ItemMatch(item_id, title, source_start, source_end))
+        return matches
+
+    @staticmethod
+    def selected_ids(matches: List[ItemMatch]) -> List[str]:
+        """IDs of the matched items in order of first appearance"""
+        return list(dict.fromkeys(match.id for match in matches))
+
+
+@lru_cache(maxsize=8)
+def _cached_matcher(items: Tuple[Tuple[str, str], ...]) -> TitleMatcher:
+    return TitleMatcher(list(items))
+
+
+def get_title_matcher(items: List[Tuple[str, str]]) -> TitleMatcher:
+    """Matcher for (id, title) items, reused while the items are unchanged
+    (consecutive generations usually send the same candidates)"""
+    return _cached_matcher(tuple(items))
@@ -1,5 +1,5 @@
-import React, { useState } from 'react';
-import { generateCV } from '../services/api';
+import React, { useEffect, useRef, useState } from 'react';
+import { generateCVStream } from '../services/api';
 
 function GenerateCV() {
     const [formData, setFormData] = useState({
@@ -11,7 +11,12 @@ function GenerateCV() {
     });
     const [loading, setLoading] = useState(false);
     const [result, setResult] = useState(null);
+    const [streamedText, setStreamedText] = useState('');
     const [message, setMessage] = useState({ type: '', text: '' });
+    const abortRef = useRef(null);
+
+    // Cancel a running generation when leaving the page
+    useEffect(() => () => abortRef.current?.abort(), []);
 
     const handleSubmit = async (e) => {
         e.preventDefault();
@@ -24,19 +29,30 @@ function GenerateCV() {
         setLoading(true);
         setMessage({ type: '', text: '' });
         setResult(null);
+        setStreamedText('');
+
+        abortRef.current?.abort();
+        const controller = new AbortController();
+        abortRef.current = controller;
 
         try {
-            const response = await generateCV(
+            const response = await generateCVStream(
                 formData.jobDescription,
                 formData.company,
                 formData.position,
                 formData.maxItems,
-                formData.customInstructions
+                formData.customInstructions,
+                false,
+                {
+                    onChunk: (text) => setStreamedText((previous) => previous + text),
+                    signal: controller.signal,
+                }
             );
 
             setResult(response);
             setMessage({ type: 'success', text: 'CV generated successfully!' });
         } catch (error) {
+            if (error.name === 'AbortError') return;
             setMessage({
                 type: 'error',
                 text: error.response?.data?.detail || 'Failed to generate CV. Please check your baseline CV and projects.'
@@ -188,7 +204,13 @@ function GenerateCV() {
                 <div className="bg-white rounded-lg border border-gray-200 shadow-sm p-6">
                     <h3 className="text-xl font-semibold text-gray-700 mb-4">Generated CV</h3>
 
-                    {loading ? (
+                    {loading && streamedText ? (
+                        <div className="bg-gray-900 rounded-lg border border-gray-800 p-4 max-h-[600px] overflow-y-auto">
+                            <pre className="text-xs text-green-400 font-mono whitespace-pre-wrap">
+                                {streamedText}
+                            </pre>
+                        </div>
+                    ) : loading ? (
                         <div className="flex flex-col items-center justify-center h-96 text-gray-500">
                             <svg className="w-16 h-16 mb-4 animate-pulse" fill="none" stroke="currentColor" viewBox="0 0 24 24">
                                 <path strokeLinecap="round" strokeLinejoin="round" strokeWidth={2} d="M9 3v2m6-2v2M9 19v2m6-2v2M5 9H3m2 6H3m18-6h-2m2 6h-2M7 19h10a2 2 0 002-2V7a2 2 0 00-2-2H7a2 2 0 00-2 2v10a2 2 0 002 2zM9 9h6v6H9V9z" />
@@ -202,6 +224,7 @@ function GenerateCV() {
                                 <div className="text-sm text-gray-600">
                                     <p>Job ID: <span className="font-mono">{result.job_id}</span></p>
                                     <p>Generated: {new Date(result.generated_at).toLocaleString()}</p>
+                                    {result.model && <p>Model: <span className="font-mono">{result.model}</span></p>}
                                     {result.selected_items.length > 0 && (
                                         <p>Selected {result.selected_items.length} projects</p>
                                     )}
@@ -1,9 +1,13 @@
 import React, { useState, useEffect } from 'react';
-import { getCVHistory, downloadGeneratedCV, getGeneratedCVContent } from '../services/api';
+import { getCVHistoryPage, downloadGeneratedCV, downloadGeneratedPDF, getGeneratedCVContent } from '../services/api';
+
+const PAGE_SIZE = 20;
 
 function History() {
     const [history, setHistory] = useState([]);
     const [loading, setLoading] = useState(true);
+    const [nextCursor, setNextCursor] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [message, setMessage] = useState({ type: '', text: '' });
     const [viewModal, setViewModal] = useState({ isOpen: false, content: '', jobId: '' });
     const [loadingContent, setLoadingContent] = useState(false);
@@ -15,8 +19,9 @@ function History() {
     const loadHistory = async () => {
         setLoading(true);
         try {
-            const data = await getCVHistory();
-            setHistory(data);
+            const page = await getCVHistoryPage({ limit: PAGE_SIZE });
+            setHistory(page.items);
+            setNextCursor(page.nextCursor);
         } catch (error) {
             console.error('Error loading history:', error);
             setMessage({ type: 'error', text: 'Failed to load history' });
@@ -25,6 +30,20 @@ function History() {
         }
     };
 
+    const loadMore = async () => {
+        setLoadingMore(true);
+        try {
+            const page = await getCVHistoryPage({ limit: PAGE_SIZE, cursor: nextCursor });
+            setHistory((prev) => [...prev, ...page.items]);
+            setNextCursor(page.nextCursor);
+        } catch (error) {
+            console.error('Error loading history:', error);
+            setMessage({ type: 'error', text: 'Failed to load more history' });
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     const handleDownload = async (jobId) => {
         try {
             const blob = await downloadGeneratedCV(jobId);
@@ -44,6 +63,34 @@ function History() {
         }
     };
 
+    const handleDownloadPDF = async (jobId) => {
+        try {
+            const blob = await downloadGeneratedPDF(jobId);
+            const url = URL.createObjectURL(blob);
+            const a = document.createElement('a');
+            a.href = url;
+            a.download = `cv_${jobId}.pdf`;
+            a.click();
+            URL.revokeObjectURL(url);
+
+            setMessage({ type: 'success', text: 'PDF downloaded successfully!' });
+        } catch (error) {
+            let detail = null;
+            try {
+                detail = JSON.parse(await error.response.data.text()).detail;
+            } catch {
+                // Not a JSON error body
+            }
+            const firstError = detail?.errors?.[0];
+            setMessage({
+                type: 'error',
+                text: firstError
+                    ? `LaTeX error${firstError.line ? ` on line ${firstError.line}` : ''}: ${firstError.message}`
+                    : detail?.message || detail || 'Failed to compile PDF'
+            });
+        }
+    };
+
     const handleViewCV = async (jobId) => {
         setLoadingContent(true);
         try {
@@ -146,6 +193,7 @@ function History() {
                                     <div className="flex items-center space-x-4 text-sm text-gray-500">
                                         <span>{formatDate(item.generated_at)}</span>
                                         <span className="font-mono">{item.job_id}</span>
+                                        {item.model && <span>{item.model}</span>}
                                     </div>
                                 </div>
 
@@ -163,6 +211,12 @@ function History() {
                                     >
                                         Download
                                     </button>
+                                    <button
+                                        onClick={() => handleDownloadPDF(item.job_id)}
+                                        className="px-4 py-2 bg-blue-50 text-blue-700 rounded-lg hover:bg-blue-100 transition-colors border border-blue-200 font-medium"
+                                    >
+                                        PDF
+                                    </button>
                                 </div>
                             </div>
                         </div>
@@ -170,9 +224,21 @@ function History() {
                 </div>
             )}
 
+            {nextCursor && (
+                <div className="mt-6 text-center">
+                    <button
+                        onClick={loadMore}
+                        disabled={loadingMore}
+                        className="px-4 py-2 bg-white text-gray-700 rounded-lg hover:bg-gray-50 transition-colors border border-gray-300 disabled:opacity-50 font-medium"
+                    >
+                        {loadingMore ? 'Loading...' : 'Load more'}
+                    </button>
+                </div>
+            )}
+
             {history.length > 0 && (
                 <div className="mt-6 text-center text-sm text-gray-500">
-                    Total CVs generated: {history.length}
+                    {nextCursor ? `Showing ${history.length} most recent CVs` : `Total CVs generated: ${history.length}`}
                 </div>
             )}
 
@@ -31,11 +31,17 @@ export const getBaselineCV = async () => {
 
 // ===== Projects API =====
 
-export const getProjects = async () => {
-    const response = await api.get('/api/projects');
+export const getProjects = async (params = {}) => {
+    const response = await api.get('/api/projects', { params });
     return response.data;
 };
 
+// Returns one page of projects; pass nextCursor back as params.cursor
+export const getProjectsPage = async (params = {}) => {
+    const response = await api.get('/api/projects', { params });
+    return { items: response.data, nextCursor: response.headers['x-next-cursor'] || null };
+};
+
 export const getProject = async (id) => {
     const response = await api.get(`/api/projects/${id}`);
     return response.data;
@@ -71,7 +77,7 @@ export const importProjects = async (file) => {
 
 // ===== CV Generation API =====
 
-export const generateCV = async (jobDescription, company, position, maxItems = 5, customInstructions = '') => {
+export const generateCV = async (jobDescription, company, position, maxItems = 5, customInstructions = '', bypassCache = false) => {
     const response = await api.post('/api/cv/generate', {
         job_description: {
             text: jobDescription,
@@ -80,16 +86,71 @@ export const generateCV = async (jobDescription, company, position, maxItems = 5
         },
         max_items: maxItems,
         custom_instructions: customInstructions || null,
+        bypass_cache: bypassCache,
     });
 
     return response.data;
 };
 
-export const getCVHistory = async () => {
-    const response = await api.get('/api/cv/history');
+// Streams the LaTeX over Server-Sent Events, calling onChunk with each piece of text.
+// Resolves with the same object as generateCV; abort the signal to cancel the generation.
+export const generateCVStream = async (jobDescription, company, position, maxItems = 5, customInstructions = '', bypassCache = false, { onChunk, signal } = {}) => {
+    const response = await fetch(`${API_BASE_URL}/api/cv/generate/stream`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
+            job_description: {
+                text: jobDescription,
+                company,
+                position,
+            },
+            max_items: maxItems,
+            custom_instructions: customInstructions || null,
+            bypass_cache: bypassCache,
+        }),
+        signal,
+    });
+
+    // Errors are thrown in the same shape as axios errors
+    if (!response.ok) {
+        const data = await response.json().catch(() => ({}));
+        throw { response: { data } };
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) >= 0) {
+            const message = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            const event = /^event: (.*)$/m.exec(message)?.[1];
+            const data = JSON.parse(/^data: (.*)$/m.exec(message)?.[1] || '{}');
+
+            if (event === 'chunk' && onChunk) onChunk(data.text);
+            else if (event === 'done') return data;
+            else if (event === 'error') throw { response: { data } };
+        }
+    }
+    throw { response: { data: { detail: 'Generation stream ended unexpectedly' } } };
+};
+
+export const getCVHistory = async (params = {}) => {
+    const response = await api.get('/api/cv/history', { params });
     return response.data;
 };
 
+// Returns one page of history; pass nextCursor back as params.cursor
+export const getCVHistoryPage = async (params = {}) => {
+    const response = await api.get('/api/cv/history', { params });
+    return { items: response.data, nextCursor: response.headers['x-next-cursor'] || null };
+};
+
 export const downloadGeneratedCV = async (jobId) => {
     const response = await api.get(`/api/cv/generated/${jobId}`, {
         responseType: 'blob',
@@ -98,6 +159,15 @@ export const downloadGeneratedCV = async (jobId) => {
     return response.data;
 };
 
+// Compiled on the server; errors come back as a blob holding the JSON detail
+export const downloadGeneratedPDF = async (jobId) => {
+    const response = await api.get(`/api/cv/generated/${jobId}/pdf`, {
+        responseType: 'blob',
+    });
+
+    return response.data;
+};
+
 export const getGeneratedCVContent = async (jobId) => {
     const response = await api.get(`/api/cv/generated/${jobId}/content`);
     return response.data;